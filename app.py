@@ -31,7 +31,7 @@ def load_campaign_data():
 def create_data_chunks():
     """Create and cache data chunks"""
     loader = load_campaign_data()
-    chunker = CampaignDataChunker(loader.campaigns_data)
+    chunker = CampaignDataChunker(loader.campaigns_data, loader=loader)
     return chunker.create_all_chunks()
 
 @st.cache_resource
@@ -49,7 +49,9 @@ def display_campaign_overview():
     st.markdown("### 📊 Campaign Portfolio Overview")
     
     loader = load_campaign_data()
-    summary = loader.get_performance_summary()
+    windows = {"Latest Day": "latest", "Last 7 Days": "7d", "Last 30 Days": "30d", "All Time": "all"}
+    window_label = st.radio("Summary Window:", list(windows.keys()), horizontal=True)
+    summary = loader.get_performance_summary(window=windows[window_label])
     
     # Key metrics in columns
     col1, col2, col3, col4 = st.columns(4)
@@ -117,8 +119,10 @@ def display_campaign_details():
             # Metrics over time
             metric_cols = ['spend', 'conversions', 'ctr', 'cpm', 'roas']
             selected_metrics = st.multiselect("Select Metrics:", metric_cols, default=['roas', 'cpm'])
+            show_moving_avg = st.checkbox("Show 7-day moving average", value=False)
             
             if selected_metrics:
+                rolling_df = loader.get_rolling_metrics(campaign['id']) if show_moving_avg else None
                 fig = go.Figure()
                 for metric in selected_metrics:
                     fig.add_trace(go.Scatter(
@@ -127,6 +131,14 @@ def display_campaign_details():
                         name=metric.upper(),
                         mode='lines+markers'
                     ))
+                    if rolling_df is not None and f"{metric}_ma7" in rolling_df:
+                        fig.add_trace(go.Scatter(
+                            x=rolling_df['date'],
+                            y=rolling_df[f"{metric}_ma7"],
+                            name=f"{metric.upper()} (7d avg)",
+                            mode='lines',
+                            line=dict(dash='dash')
+                        ))
                 fig.update_layout(title=f"Performance Trends - {campaign['name']}", height=400)
                 st.plotly_chart(fig, use_container_width=True)
             
@@ -1,99 +1,154 @@
 #!/usr/bin/env python3
 """
 Convert Kaggle Facebook Ads dataset to RAG format
-Usage: python scripts/convert_kaggle_data.py
+Usage: python scripts/convert_kaggle_data.py [--chunksize ROWS]
 """
 
-import json
+import argparse
+import numpy as np
 import pandas as pd
 import os
+import sys
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Optional
 
-def convert_kaggle_to_rag_format(input_csv: str, output_json: str):
-    """Convert Kaggle dataset to our RAG JSON format"""
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from json_stream import CampaignsJSONWriter
+
+# Performance field -> (Kaggle column names tried in order, default when none is present, type)
+KAGGLE_COLUMNS = {
+    "impressions": (("impressions", "Impressions"), 1000, int),
+    "clicks": (("clicks", "Clicks"), 30, int),
+    "spend": (("spend", "Spend"), 25.0, float),
+    "conversions": (("conversions", "Conversions"), 2, int),
+    "ctr": (("ctr", "CTR"), 3.0, float),
+    "cpm": (("cpm", "CPM"), 25.0, float),
+    "cpc": (("cpc", "CPC"), 0.83, float),
+    "roas": (("roas", "ROAS"), 3.0, float),
+    "frequency": (("frequency", "Frequency"), 1.5, float),
+    "reach": (("reach", "Reach"), 667, int)
+}
+
+def read_kaggle_csv(input_csv: str, chunksize: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """The whole CSV as one frame, or chunks of chunksize rows with progress and throughput"""
+    if not chunksize:
+        df = pd.read_csv(input_csv)
+        print(f"✅ Loaded {len(df)} rows from Kaggle dataset")
+        yield df
+        return
+    
+    rows = 0
+    started = time.perf_counter()
+    for chunk in pd.read_csv(input_csv, chunksize=chunksize):
+        yield chunk
+        rows += len(chunk)
+        elapsed = time.perf_counter() - started
+        print(f"📊 Converted {rows:,} rows ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def resolve_columns(columns) -> Dict[str, Optional[str]]:
+    """CSV column used for each performance field, or None where the field falls back to its default"""
+    return {
+        field: next((name for name in names if name in columns), None)
+        for field, (names, _, _) in KAGGLE_COLUMNS.items()
+    }
+
+
+def performance_columns(df: pd.DataFrame, mapping: Dict[str, Optional[str]]) -> Dict[str, List[Any]]:
+    """Every performance field as a list of Python values, one per row"""
+    columns = {}
+    for field, (_, default, kind) in KAGGLE_COLUMNS.items():
+        column = mapping[field]
+        if column is None:
+            columns[field] = [kind(default)] * len(df)
+        else:
+            # astype(int64) truncates like int() and, like it, refuses missing values
+            columns[field] = pd.to_numeric(df[column]).astype(np.int64 if kind is int else np.float64).tolist()
+    return columns
+
+
+def iter_kaggle_campaigns(df: pd.DataFrame, mapping: Optional[Dict[str, Optional[str]]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Campaign records for a frame of Kaggle rows (ids follow the row index, which continues across chunks)
+    
+    Each row becomes a campaign with a single day of performance. The column
+    mapping is resolved once per frame (or passed in) and every field is
+    converted column-wise, leaving only record assembly per row.
+    """
+    columns = performance_columns(df, mapping if mapping is not None else resolve_columns(df.columns))
+    fields = list(columns)
+    date_str = "2024-01-01"  # Default date
+    
+    for idx, values in zip(df.index.tolist(), zip(*columns.values())):
+        yield {
+            "id": f"kaggle_{idx}",
+            "name": f"Campaign {idx + 1}",
+            "objective": "CONVERSIONS",
+            "status": "ACTIVE",
+            "industry": "Mixed",
+            "audience": "Unknown",
+            "created_date": "2024-01-01",
+            "budget": {
+                "daily_budget": 100,
+                "total_budget": 3000
+            },
+            "targeting": {
+                "age_min": 18,
+                "age_max": 65,
+                "interests": ["general"],
+                "placements": ["feed", "stories"],
+                "devices": ["mobile", "desktop"]
+            },
+            "daily_performance": {date_str: dict(zip(fields, values))}
+        }
+
+
+def convert_kaggle_to_rag_format(input_csv: str, output_json: str, chunksize: Optional[int] = None):
+    """
+    Convert Kaggle dataset to our RAG JSON format
+    
+    With chunksize the CSV is read in chunks of that many rows and each chunk's
+    campaigns are written out before the next is read, so memory stays flat.
+    The column mapping is resolved against the first frame's columns and reused.
+    """
     
     print(f"🔄 Converting {input_csv} to RAG format...")
     
     try:
-        # Read Kaggle CSV
-        df = pd.read_csv(input_csv)
-        print(f"✅ Loaded {len(df)} rows from Kaggle dataset")
-        
-        # Create campaigns structure
-        campaigns = []
-        
-        # Process each row (assuming each row is a campaign or daily data)
-        for idx, row in df.iterrows():
-            campaign = {
-                "id": f"kaggle_{idx}",
-                "name": f"Campaign {idx + 1}",
-                "objective": "CONVERSIONS",
-                "status": "ACTIVE",
-                "industry": "Mixed",
-                "audience": "Unknown",
-                "created_date": "2024-01-01",
-                "budget": {
-                    "daily_budget": 100,
-                    "total_budget": 3000
-                },
-                "targeting": {
-                    "age_min": 18,
-                    "age_max": 65,
-                    "interests": ["general"],
-                    "placements": ["feed", "stories"],
-                    "devices": ["mobile", "desktop"]
-                }
-            }
-            
-            # Map Kaggle columns to our format (adjust based on actual dataset)
-            daily_performance = {}
-            date_str = "2024-01-01"  # Default date
+        mapping = None
+        with CampaignsJSONWriter(output_json) as writer:
+            for df in read_kaggle_csv(input_csv, chunksize):
+                if mapping is None:
+                    mapping = resolve_columns(df.columns)
+                    defaults = [field for field, column in mapping.items() if column is None]
+                    if defaults:
+                        print(f"⚠️ No column for {', '.join(defaults)}, using defaults")
+                for campaign in iter_kaggle_campaigns(df, mapping):
+                    writer.write(campaign)
             
-            # Try to map common column names
-            performance_data = {
-                "impressions": int(row.get('impressions', row.get('Impressions', 1000))),
-                "clicks": int(row.get('clicks', row.get('Clicks', 30))),
-                "spend": float(row.get('spend', row.get('Spend', 25.0))),
-                "conversions": int(row.get('conversions', row.get('Conversions', 2))),
-                "ctr": float(row.get('ctr', row.get('CTR', 3.0))),
-                "cpm": float(row.get('cpm', row.get('CPM', 25.0))),
-                "cpc": float(row.get('cpc', row.get('CPC', 0.83))),
-                "roas": float(row.get('roas', row.get('ROAS', 3.0))),
-                "frequency": float(row.get('frequency', row.get('Frequency', 1.5))),
-                "reach": int(row.get('reach', row.get('Reach', 667)))
-            }
-            
-            daily_performance[date_str] = performance_data
-            campaign["daily_performance"] = daily_performance
-            
-            campaigns.append(campaign)
-        
-        # Create final structure
-        rag_data = {
-            "campaigns": campaigns,
-            "global_insights": {
+            count = writer.close(global_insights={
                 "data_source": "kaggle",
                 "processed_date": datetime.now().isoformat(),
-                "total_campaigns": len(campaigns),
+                "total_campaigns": writer.count,
                 "conversion_note": "Converted from Kaggle Facebook Ads dataset"
-            }
-        }
+            })
         
-        # Save to JSON
-        os.makedirs(os.path.dirname(output_json), exist_ok=True)
-        with open(output_json, 'w') as f:
-            json.dump(rag_data, f, indent=2)
-        
-        print(f"✅ Converted {len(campaigns)} campaigns to {output_json}")
+        print(f"✅ Converted {count} campaigns to {output_json}")
         return True
-        
+    
     except Exception as e:
         print(f"❌ Error converting data: {e}")
         return False
 
 def main():
     """Main conversion function"""
+    parser = argparse.ArgumentParser(description="Convert a Kaggle Facebook Ads CSV to RAG format")
+    parser.add_argument("--chunksize", type=int, default=None, metavar="ROWS",
+                        help="Stream the CSV in chunks of ROWS rows with bounded memory")
+    args = parser.parse_args()
+    
     input_csv = "data/sources/kaggle_facebook_ads.csv"
     output_json = "data/real/campaigns.json"
     
@@ -102,7 +157,7 @@ def main():
         print("📥 Please download Kaggle dataset to data/sources/ first")
         return
     
-    success = convert_kaggle_to_rag_format(input_csv, output_json)
+    success = convert_kaggle_to_rag_format(input_csv, output_json, args.chunksize)
     
     if success:
         print("🎉 Conversion complete!")
@@ -1,199 +1,700 @@
 #!/usr/bin/env python3
 """
 Convert real Facebook Ads CSV data to RAG JSON format
-Usage: python scripts/convert_real_data.py
+Usage: python scripts/convert_real_data.py [--parquet [DIR]] [--input CSV_OR_GLOB ...] [--workers N] [--incremental]
 """
 
+import argparse
+import contextlib
+import glob
 import json
+import numpy as np
 import pandas as pd
 import os
+import shutil
+import sys
+import tempfile
+import time
 from datetime import datetime
-from typing import Dict, List, Any
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union
 
-def convert_real_csv_to_rag_format(input_csv: str, output_json: str):
-    """Convert real Facebook Ads CSV to RAG JSON format"""
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from json_stream import CampaignsJSONWriter, iter_campaigns_json
+from audience_facts import AudienceFactTable, ad_facts_path, ad_facts_partition_path
+from ad_aggregation import (
+    CAMPAIGN_ID_PREFIX, DAILY_SUMS, read_ads_csv, prepare_ads, aggregate_daily, derived_metrics, daily_performance_rows
+)
+
+INTEREST_COLUMNS = ["interest1", "interest2", "interest3"]
+MAX_INTERESTS = 10
+CAMPAIGN_BLOCK = 500  # Campaigns whose daily rows are formatted together when writing
+REGROUP_ROWS = 200_000  # Buffered chunk aggregates before they are folded into the running sums
+STAGED_SUFFIX = ".staged"  # Outputs of a run wait under this suffix until all of them are written
+
+# Global insight keys describing the output files rather than the data
+OUTPUT_STATE_KEYS = ("conversion_generation", "ad_fact_files")
+
+def ad_facts(ads: pd.DataFrame) -> AudienceFactTable:
+    """Ad-level audience fact table of prepared ad rows, keyed by output campaign id"""
+    frame = ads.rename(columns={column: name for name, column in DAILY_SUMS.items()})
+    frame["campaign_id"] = CAMPAIGN_ID_PREFIX + frame["campaign_id"]
+    return AudienceFactTable.from_frame(frame, INTEREST_COLUMNS)
+
+
+def collect_targeting(ads: pd.DataFrame) -> Dict[str, Dict[str, List[str]]]:
+    """Distinct ages, genders and interests of each campaign, in order of first appearance"""
+    targeting: Dict[str, Dict[str, List[str]]] = {}
+    for field, column in (("age_ranges", "age"), ("genders", "gender")):
+        values = ads[["campaign_id", column]].drop_duplicates()
+        for campaign_id, campaign_values in values.groupby("campaign_id", sort=False)[column]:
+            targeting.setdefault(campaign_id, {})[field] = campaign_values.tolist()
     
-    print(f"🔄 Converting real Facebook Ads data: {input_csv}")
+    # Interest columns melted row by row into one (campaign, interest) column pair, then deduplicated
+    values = ads[INTEREST_COLUMNS].to_numpy(dtype=np.float64).ravel()
+    interests = pd.DataFrame({
+        "campaign_id": np.repeat(ads["campaign_id"].to_numpy(), len(INTEREST_COLUMNS)),
+        "interest": values
+    }).dropna().drop_duplicates()
+    interests["interest"] = interests["interest"].astype(np.int64).astype(str)
+    for campaign_id, campaign_interests in interests.groupby("campaign_id", sort=False)["interest"]:
+        targeting.setdefault(campaign_id, {})["interests"] = campaign_interests.tolist()
+    return targeting
+
+
+class ConversionAccumulator:
+    """
+    Running per-(campaign, date) sums and per-campaign targeting values
     
-    try:
-        # Read CSV
-        df = pd.read_csv(input_csv)
-        print(f"✅ Loaded {len(df)} ad records from real Facebook data")
-        
-        # Group by campaign_id to create campaigns
-        campaigns = []
-        campaign_groups = df.groupby('campaign_id')
+    Chunks of ad rows are folded in as they are read, so memory grows with the
+    number of campaign-days in the export rather than the number of ad rows.
+    Chunk aggregates are buffered and regrouped into the running sums once they
+    hold as many rows as the sums (and at least REGROUP_ROWS), so each row is
+    regrouped a bounded number of times on average instead of once per chunk.
+    With spill_dir, each chunk's ad-level facts are written there as a partial
+    table, and save_facts() merges the partials on disk.
+    """
+    
+    def __init__(self, after: Optional[Dict[str, str]] = None, spill_dir: Optional[str] = None):
+        self._daily = pd.DataFrame(columns=["campaign_id", "date", *DAILY_SUMS, "ads"])
+        self._pending: List[pd.DataFrame] = []
+        self._pending_rows = 0
+        self.targeting: Dict[str, Dict[str, Dict[str, None]]] = {}
+        self.facts: List[Union[AudienceFactTable, str]] = []  # Tables, or paths of spilled ones
+        self.after = after
+        self.spill_dir = spill_dir
+        self.rows = 0
+        self.skipped = 0
+    
+    def add(self, df: pd.DataFrame):
+        """Fold a chunk of CSV rows into the running aggregates"""
+        ads = prepare_ads(df)
+        if self.after:
+            # Incremental mode: drop rows on or before the campaign's latest converted date
+            latest = ads["campaign_id"].map(self.after).fillna("")
+            newer = (ads["date"] > latest).to_numpy()
+            self.skipped += int(len(ads) - newer.sum())
+            ads = ads[newer]
+        partial = aggregate_daily(ads)
+        self._pending.append(partial)
+        self._pending_rows += len(partial)
+        if self._pending_rows >= max(len(self._daily), REGROUP_ROWS):
+            self._regroup()
+        self._merge_targeting(collect_targeting(ads))
+        self._keep_facts(ad_facts(ads))
+        self.rows += len(df)
+    
+    @property
+    def daily(self) -> pd.DataFrame:
+        """Per-(campaign, date) sums of all rows folded in so far, sorted by campaign and date"""
+        self._regroup()
+        return self._daily
+    
+    def _regroup(self):
+        """Fold the buffered chunk aggregates into the running sums"""
+        if not self._pending:
+            return
+        dailies = [self._daily, *self._pending] if not self._daily.empty else self._pending
+        self._pending, self._pending_rows = [], 0
+        if len(dailies) == 1:
+            self._daily = dailies[0]
+        else:
+            self._daily = pd.concat(dailies, ignore_index=True).groupby(
+                ["campaign_id", "date"], sort=True
+            ).sum().reset_index()
+    
+    def merge(self, others: List["ConversionAccumulator"]):
+        """
+        Fold other accumulators into this one, in the order given
         
-        for campaign_id, campaign_data in campaign_groups:
-            
-            # Get campaign basics from first row
-            first_row = campaign_data.iloc[0]
-            
-            # Calculate campaign totals
-            total_impressions = campaign_data['impressions'].sum()
-            total_clicks = campaign_data['clicks'].sum()
-            total_spend = campaign_data['spent'].sum()
-            total_conversions = campaign_data['total_conversion'].sum()
-            approved_conversions = campaign_data['approved_conversion'].sum()
-            
-            # Calculate derived metrics
-            ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0
-            cpm = (total_spend / total_impressions * 1000) if total_impressions > 0 else 0
-            cpc = (total_spend / total_clicks) if total_clicks > 0 else 0
-            conversion_rate = (total_conversions / total_clicks * 100) if total_clicks > 0 else 0
-            
-            # Get unique targeting data
-            ages = campaign_data['age'].unique()
-            genders = campaign_data['gender'].unique()
-            interests = set()
-            for _, row in campaign_data.iterrows():
-                if pd.notna(row['interest1']): interests.add(str(int(row['interest1'])))
-                if pd.notna(row['interest2']): interests.add(str(int(row['interest2'])))
-                if pd.notna(row['interest3']): interests.add(str(int(row['interest3'])))
-            
-            # Create campaign structure
-            campaign = {
-                "id": f"real_camp_{campaign_id}",
-                "name": f"Real Facebook Campaign {campaign_id}",
-                "objective": "CONVERSIONS",
-                "status": "ACTIVE",
-                "industry": "Mixed",
-                "audience": "Interest-based targeting",
-                "created_date": "2017-08-17",
-                "budget": {
-                    "daily_budget": round(total_spend / len(campaign_data) * 10, 2),  # Estimate
-                    "total_budget": round(total_spend * 30, 2)  # Estimate monthly
-                },
-                "targeting": {
-                    "age_ranges": ages.tolist(),
-                    "genders": genders.tolist(), 
-                    "interests": list(interests)[:10],  # Limit to top 10
-                    "placements": ["feed", "stories"],
-                    "devices": ["mobile", "desktop"]
-                }
-            }
-            
-            # Create daily performance data grouped by date
-            daily_performance = {}
-            date_groups = campaign_data.groupby(['reporting_start', 'reporting_end'])
-            
-            for (start_date, end_date), daily_data in date_groups:
-                # Convert date format from DD/MM/YYYY to YYYY-MM-DD
-                try:
-                    date_obj = datetime.strptime(start_date, '%d/%m/%Y')
-                    date_key = date_obj.strftime('%Y-%m-%d')
-                except:
-                    date_key = "2017-08-17"  # Fallback
-                
-                day_impressions = daily_data['impressions'].sum()
-                day_clicks = daily_data['clicks'].sum()
-                day_spend = daily_data['spent'].sum()
-                day_conversions = daily_data['total_conversion'].sum()
-                
-                # Calculate daily metrics
-                day_ctr = (day_clicks / day_impressions * 100) if day_impressions > 0 else 0
-                day_cpm = (day_spend / day_impressions * 1000) if day_impressions > 0 else 0
-                day_cpc = (day_spend / day_clicks) if day_clicks > 0 else 0
-                day_roas = (day_conversions * 50 / day_spend) if day_spend > 0 else 0  # Assume $50 per conversion
-                
-                daily_performance[date_key] = {
-                    "impressions": int(day_impressions),
-                    "clicks": int(day_clicks), 
-                    "spend": round(day_spend, 2),
-                    "conversions": int(day_conversions),
-                    "ctr": round(day_ctr, 2),
-                    "cpm": round(day_cpm, 2),
-                    "cpc": round(day_cpc, 2),
-                    "roas": round(day_roas, 2),
-                    "frequency": round(day_impressions / (day_impressions * 0.7), 2),  # Estimate
-                    "reach": int(day_impressions * 0.7)  # Estimate reach
-                }
-            
-            campaign["daily_performance"] = daily_performance
-            
-            # Add insights based on real data patterns
-            insights = []
-            if ctr < 1.0:
-                insights.append("Low CTR indicates potential audience or creative issues")
-            if conversion_rate > 5.0:
-                insights.append(f"High conversion rate of {conversion_rate:.1f}% shows strong audience targeting")
-            if cpm > 10:
-                insights.append("High CPM suggests competitive audience or premium placements")
-            
-            campaign["insights"] = {
-                "performance_summary": f"Campaign generated {total_conversions} conversions from {total_impressions:,} impressions",
-                "key_metrics": {
-                    "ctr": round(ctr, 2),
-                    "cpm": round(cpm, 2), 
-                    "conversion_rate": round(conversion_rate, 2)
-                },
-                "recommendations": insights
-            }
-            
-            campaigns.append(campaign)
+        The daily sums of all of them are regrouped once, and targeting values keep
+        first-appearance order across the sequence, so the merged result depends
+        only on the order of others, not on when each was produced.
+        """
+        dailies = [accumulator.daily for accumulator in [self, *others] if not accumulator.daily.empty]
+        if len(dailies) > 1:
+            self._daily = pd.concat(dailies, ignore_index=True).groupby(
+                ["campaign_id", "date"], sort=True
+            ).sum().reset_index()
+        elif dailies:
+            self._daily = dailies[0]
+        for other in others:
+            self._merge_targeting(other.targeting)
+            self.facts.extend(other.facts)
+            self.rows += other.rows
+            self.skipped += other.skipped
+    
+    def _merge_targeting(self, targeting: Dict[str, Dict[str, Any]]):
+        """Add targeting values (lists or ordered-set dicts) after the ones already seen"""
+        for campaign_id, fields in targeting.items():
+            merged = self.targeting.setdefault(campaign_id, {})
+            for field, values in fields.items():
+                # Dict keys keep first-appearance order across chunks
+                merged.setdefault(field, {}).update(dict.fromkeys(values))
+    
+    def _keep_facts(self, facts: AudienceFactTable):
+        """Hold a chunk's fact table, or write it to spill_dir and keep its path"""
+        if self.spill_dir is None:
+            self.facts.append(facts)
+            return
+        handle, path = tempfile.mkstemp(prefix="ad_facts_", suffix=".npz", dir=self.spill_dir)
+        os.close(handle)
+        facts.save(path)
+        self.facts.append(path)
+    
+    def save_facts(self, path: str) -> int:
+        """
+        Write the ad rows folded in so far to path as one fact table
         
-        # Create global insights from all data
-        global_insights = {
-            "data_source": "real_facebook_ads",
-            "original_dataset": "Facebook Ad Campaign Analysis - GitHub",
-            "processed_date": datetime.now().isoformat(),
-            "total_campaigns": len(campaigns),
-            "total_ad_records": len(df),
-            "date_range": "2017-08-17 to 2017-08-30",
-            "data_summary": {
-                "total_impressions": int(df['impressions'].sum()),
-                "total_clicks": int(df['clicks'].sum()),
-                "total_spend": round(df['spent'].sum(), 2),
-                "total_conversions": int(df['total_conversion'].sum()),
-                "overall_ctr": round(df['clicks'].sum() / df['impressions'].sum() * 100, 2),
-                "overall_cpm": round(df['spent'].sum() / df['impressions'].sum() * 1000, 2)
-            }
+        Spilled partials are merged on disk, so they are never all in memory at
+        once. Returns the number of rows written.
+        """
+        if self.spill_dir is None:
+            table = AudienceFactTable.concat(self.facts)
+            table.save(path)
+            return len(table)
+        return AudienceFactTable.merge_files(self.facts, path)
+    
+    def targeting_lists(self) -> Dict[str, Dict[str, List[str]]]:
+        """Accumulated targeting values as lists"""
+        return {
+            campaign_id: {field: list(values) for field, values in fields.items()}
+            for campaign_id, fields in self.targeting.items()
         }
+
+
+def campaign_totals(daily: pd.DataFrame) -> pd.DataFrame:
+    """Per-campaign sums and first/last reporting date of a daily aggregate, indexed by campaign_id"""
+    return daily.groupby("campaign_id", sort=True).agg(
+        **{name: (name, "sum") for name in DAILY_SUMS}, ads=("ads", "sum"),
+        first_date=("date", "min"), last_date=("date", "max")
+    )
+
+
+def campaign_record(campaign_id: str, totals: Dict[str, Any], rates: Dict[str, float],
+                    targeting: Dict[str, List[str]], daily_performance: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Campaign record from its totals, derived rates, targeting values and daily performance"""
+    total_spend = totals["spend"]
+    total_impressions = totals["impressions"]
+    total_conversions = totals["conversions"]
+    ctr, cpm, conversion_rate = rates["ctr"], rates["cpm"], rates["conversion_rate"]
+    
+    campaign = {
+        "id": f"{CAMPAIGN_ID_PREFIX}{campaign_id}",
+        "name": f"Real Facebook Campaign {campaign_id}",
+        "objective": "CONVERSIONS",
+        "status": "ACTIVE",
+        "industry": "Mixed",
+        "audience": "Interest-based targeting",
+        "created_date": "2017-08-17",
+        "budget": {
+            "daily_budget": round(total_spend / totals["ads"] * 10, 2),  # Estimate
+            "total_budget": round(total_spend * 30, 2)  # Estimate monthly
+        },
+        "targeting": {
+            "age_ranges": targeting.get("age_ranges", []),
+            "genders": targeting.get("genders", []),
+            "interests": targeting.get("interests", [])[:MAX_INTERESTS],
+            "placements": ["feed", "stories"],
+            "devices": ["mobile", "desktop"]
+        },
+        "daily_performance": daily_performance
+    }
+    
+    # Add insights based on real data patterns
+    insights = []
+    if ctr < 1.0:
+        insights.append("Low CTR indicates potential audience or creative issues")
+    if conversion_rate > 5.0:
+        insights.append(f"High conversion rate of {conversion_rate:.1f}% shows strong audience targeting")
+    if cpm > 10:
+        insights.append("High CPM suggests competitive audience or premium placements")
+    
+    campaign["insights"] = {
+        "performance_summary": f"Campaign generated {total_conversions} conversions from {total_impressions:,} impressions",
+        "key_metrics": {
+            "ctr": round(float(ctr), 2),
+            "cpm": round(float(cpm), 2),
+            "conversion_rate": round(float(conversion_rate), 2)
+        },
+        "recommendations": insights
+    }
+    return campaign
+
+
+def total_rates(totals: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Derived rates for every row of a campaign totals frame"""
+    return derived_metrics(*(totals[name].to_numpy(dtype=np.float64)
+                             for name in ("impressions", "clicks", "spend", "conversions")))
+
+
+def iter_campaigns(daily: pd.DataFrame, targeting: Dict[str, Dict[str, List[str]]]) -> Iterator[Dict[str, Any]]:
+    """
+    Campaign records with totals, targeting, daily performance and insights
+    
+    Daily performance dicts are built for CAMPAIGN_BLOCK campaigns at a time, so
+    only one block of records is held while the output is written.
+    """
+    daily = daily.sort_values(["campaign_id", "date"], kind="stable").reset_index(drop=True)
+    totals = campaign_totals(daily)
+    rates = total_rates(totals)
+    
+    dates = daily["date"].tolist()
+    bounds = np.searchsorted(daily["campaign_id"].to_numpy(), totals.index.to_numpy(), side="left").tolist()
+    bounds.append(len(daily))
+    day_rows, block_start = [], 0
+    
+    for i, (campaign_id, sums) in enumerate(totals.iterrows()):
+        if i % CAMPAIGN_BLOCK == 0:
+            block_start = bounds[i]
+            day_rows = daily_performance_rows(daily.iloc[block_start:bounds[min(i + CAMPAIGN_BLOCK, len(totals))]])
+        first, last = bounds[i] - block_start, bounds[i + 1] - block_start
         
-        # Create final RAG structure
-        rag_data = {
-            "campaigns": campaigns,
-            "global_insights": global_insights
+        yield campaign_record(
+            campaign_id, sums, {name: values[i] for name, values in rates.items()},
+            targeting.get(campaign_id, {}), dict(zip(dates[bounds[i]:bounds[i + 1]], day_rows[first:last]))
+        )
+
+
+def build_campaigns(daily: pd.DataFrame, targeting: Dict[str, Dict[str, List[str]]]) -> List[Dict[str, Any]]:
+    """All campaign records of a daily aggregate"""
+    return list(iter_campaigns(daily, targeting))
+
+
+def build_global_insights(totals: pd.DataFrame) -> Dict[str, Any]:
+    """Dataset-level summary from per-campaign totals"""
+    impressions = totals["impressions"].sum()
+    clicks = totals["clicks"].sum()
+    spend = totals["spend"].sum()
+    return {
+        "data_source": "real_facebook_ads",
+        "original_dataset": "Facebook Ad Campaign Analysis - GitHub",
+        "processed_date": datetime.now().isoformat(),
+        "total_campaigns": len(totals),
+        "total_ad_records": int(totals["ads"].sum()),
+        "date_range": f"{totals['first_date'].min()} to {totals['last_date'].max()}" if len(totals) else None,
+        "data_summary": {
+            "total_impressions": int(impressions),
+            "total_clicks": int(clicks),
+            "total_spend": round(float(spend), 2),
+            "total_conversions": int(totals["conversions"].sum()),
+            "overall_ctr": round(clicks / impressions * 100, 2) if impressions > 0 else 0,
+            "overall_cpm": round(spend / impressions * 1000, 2) if impressions > 0 else 0
         }
+    }
+
+
+def aggregates_path(output_json: str) -> str:
+    """
+    Sidecar file with the running aggregates behind an output, used by incremental runs
+    
+    It holds JSON but has no .json suffix, so directory loads of the output do
+    not take it for an account file.
+    """
+    return os.path.splitext(output_json)[0] + ".aggregates"
+
+
+def write_aggregates(totals: pd.DataFrame, targeting: Dict[str, Dict[str, List[str]]], path: str,
+                     state: Dict[str, Any]):
+    """Store per-campaign totals, date spans and full targeting values, with the output state, at path"""
+    campaigns = {}
+    for campaign_id, row in zip(totals.index, totals.to_dict("records")):
+        row["targeting"] = targeting.get(campaign_id, {})
+        campaigns[campaign_id] = row
+    
+    with open(path, 'w') as f:
+        json.dump({**state, "campaigns": campaigns}, f)
+
+
+def read_aggregates(output_json: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Dict[str, List[str]]], Dict[str, Any]]]:
+    """
+    Totals, targeting and output state stored by the last conversion into output_json, or None
+    
+    The state holds the conversion generation and the ad fact files of the output
+    (OUTPUT_STATE_KEYS); aggregates written before these were recorded get the
+    single fact table file, if present.
+    """
+    path = aggregates_path(output_json)
+    if not (os.path.exists(path) and os.path.exists(output_json)):
+        return None
+    with open(path, 'r') as f:
+        stored = json.load(f)
+    campaigns = stored.pop("campaigns")
+    
+    targeting = {campaign_id: row.pop("targeting") for campaign_id, row in campaigns.items()}
+    totals = pd.DataFrame.from_dict(campaigns, orient="index", columns=[*DAILY_SUMS, "ads", "first_date", "last_date"])
+    totals.index.name = "campaign_id"
+    state = {key: stored.get(key) for key in OUTPUT_STATE_KEYS}
+    if state["ad_fact_files"] is None:
+        facts_path = ad_facts_path(output_json)
+        state["ad_fact_files"] = [os.path.basename(facts_path)] if os.path.exists(facts_path) else []
+    return totals, targeting, state
+
+
+def merge_totals(totals: pd.DataFrame, new_totals: pd.DataFrame) -> pd.DataFrame:
+    """Add new per-campaign totals to running ones, widening each campaign's date span"""
+    if new_totals.empty:
+        return totals
+    grouped = pd.concat([totals, new_totals]).groupby(level=0, sort=True)
+    merged = grouped[[*DAILY_SUMS, "ads"]].sum()
+    merged["first_date"] = grouped["first_date"].min()
+    merged["last_date"] = grouped["last_date"].max()
+    return merged
+
+
+def merge_targeting(targeting: Dict[str, Dict[str, List[str]]],
+                    new_targeting: Dict[str, Dict[str, List[str]]]) -> Dict[str, Dict[str, List[str]]]:
+    """Append newly seen targeting values after the stored ones, keeping first-appearance order"""
+    merged = dict(targeting)
+    for campaign_id, fields in new_targeting.items():
+        current = dict(merged.get(campaign_id, {}))
+        for field, values in fields.items():
+            current[field] = list(dict.fromkeys([*current.get(field, []), *values]))
+        merged[campaign_id] = current
+    return merged
+
+
+def iter_appended_campaigns(output_json: str, daily: pd.DataFrame, totals: pd.DataFrame,
+                            targeting: Dict[str, Dict[str, List[str]]],
+                            stored_members: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Campaigns of an existing output with new days appended
+    
+    Campaigns without new days are passed through as stored. Campaigns with new
+    days get their daily rows appended and their budget, targeting and insights
+    rebuilt from the running totals; campaigns seen for the first time are
+    inserted in campaign id order, as a full conversion would place them. The
+    output's other top-level members are put in stored_members as they are read.
+    """
+    daily = daily.sort_values(["campaign_id", "date"], kind="stable").reset_index(drop=True)
+    new_days: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for campaign_id, date, row in zip(daily["campaign_id"].tolist(), daily["date"].tolist(),
+                                      daily_performance_rows(daily)):
+        new_days.setdefault(campaign_id, {})[date] = row
+    
+    rates = total_rates(totals)
+    positions = {campaign_id: i for i, campaign_id in enumerate(totals.index)}
+    
+    def updated(campaign_id: str, daily_performance: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        i = positions[campaign_id]
+        daily_performance.update(new_days[campaign_id])
+        return campaign_record(campaign_id, totals.iloc[i], {name: values[i] for name, values in rates.items()},
+                               targeting.get(campaign_id, {}), daily_performance)
+    
+    def created(campaign_id: str) -> Dict[str, Any]:
+        return updated(campaign_id, {})
+    
+    # The stored campaigns are in campaign id order, so ids with new days that sort
+    # before the next stored campaign are not in the output yet
+    pending = sorted(new_days)
+    next_pending = 0
+    for key, campaign in iter_campaigns_json(output_json):
+        if key != "campaigns":
+            if stored_members is not None:
+                stored_members[key] = campaign
+            continue
+        campaign_id = campaign["id"][len(CAMPAIGN_ID_PREFIX):]
+        while next_pending < len(pending) and pending[next_pending] < campaign_id:
+            yield created(pending[next_pending])
+            next_pending += 1
+        if next_pending < len(pending) and pending[next_pending] == campaign_id:
+            next_pending += 1
+            yield updated(campaign_id, campaign["daily_performance"])
+        else:
+            yield campaign
+    for campaign_id in pending[next_pending:]:
+        yield created(campaign_id)
+
+
+def read_ads(input_csv: str, accumulator: ConversionAccumulator, chunksize: Optional[int] = None):
+    """Fold the CSV into the accumulator, in chunks of chunksize rows when given"""
+    if not chunksize:
+        df = read_ads_csv(input_csv)
+        print(f"✅ Loaded {len(df)} ad records from real Facebook data")
+        accumulator.add(df)
+        return
+    
+    started = time.perf_counter()
+    for chunk in read_ads_csv(input_csv, chunksize=chunksize):
+        accumulator.add(chunk)
+        elapsed = time.perf_counter() - started
+        print(f"📊 Read {accumulator.rows:,} ad records ({accumulator.rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    print(f"✅ Streamed {accumulator.rows} ad records from real Facebook data")
+
+
+def accumulate_csv(input_csv: str, chunksize: Optional[int] = None, after: Optional[Dict[str, str]] = None,
+                   spill_dir: Optional[str] = None) -> Tuple[str, Optional[ConversionAccumulator], float, Optional[str]]:
+    """Aggregate one CSV export (runs in a worker process)"""
+    started = time.perf_counter()
+    try:
+        accumulator = ConversionAccumulator(after, spill_dir)
+        reader = read_ads_csv(input_csv, chunksize=chunksize) if chunksize else \
+            [read_ads_csv(input_csv)]
+        for chunk in reader:
+            accumulator.add(chunk)
+        return input_csv, accumulator, time.perf_counter() - started, None
+    except (OSError, ValueError, KeyError, pd.errors.ParserError) as e:
+        return input_csv, None, time.perf_counter() - started, str(e)
+
+
+def accumulate_csvs(input_csvs: List[str], chunksize: Optional[int] = None, max_workers: Optional[int] = None,
+                    after: Optional[Dict[str, str]] = None, spill_dir: Optional[str] = None) -> ConversionAccumulator:
+    """
+    Aggregate several CSV exports in a process pool, one worker per file
+    
+    Partial aggregates are merged in input order rather than completion order,
+    so the output is the same for any number of workers.
+    """
+    if len(input_csvs) > 1:
+        workers = min(max_workers or os.cpu_count() or 1, len(input_csvs))
+        print(f"⚡ Converting {len(input_csvs)} CSV exports with {workers} worker processes")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(accumulate_csv, input_csvs, [chunksize] * len(input_csvs),
+                                    [after] * len(input_csvs), [spill_dir] * len(input_csvs)))
+    else:
+        results = [accumulate_csv(input_csv, chunksize, after, spill_dir) for input_csv in input_csvs]
+    
+    partials, errors = [], []
+    for input_csv, partial, seconds, error in results:
+        if error:
+            print(f"❌ Could not convert {input_csv}: {error}")
+            errors.append(input_csv)
+            continue
+        print(f"✅ {input_csv}: {partial.rows} ad records, {len(partial.daily)} campaign-days in {seconds:.1f}s")
+        partials.append(partial)
+    if errors:
+        raise ValueError(f"{len(errors)} of {len(input_csvs)} CSV exports could not be converted")
+    
+    accumulator = ConversionAccumulator(after, spill_dir)
+    accumulator.merge(partials)
+    return accumulator
+
+
+def write_outputs(records: Iterator[Dict[str, Any]], global_insights: Dict[str, Any], output_json: str,
+                  parquet_dir: Optional[str] = None) -> int:
+    """Write campaigns to JSON (and the Parquet dataset if requested) as they are built; returns the campaign count"""
+    with contextlib.ExitStack() as stack:
+        writer = stack.enter_context(CampaignsJSONWriter(output_json))
+        parquet_writer = None
+        if parquet_dir:
+            from parquet_store import ParquetDatasetWriter
+            parquet_writer = stack.enter_context(ParquetDatasetWriter(parquet_dir))
+        for campaign in records:
+            writer.write(campaign)
+            if parquet_writer is not None:
+                parquet_writer.write(campaign)
+        count = writer.close(global_insights=global_insights)
+        if parquet_writer is not None:
+            parquet_writer.close({key: value for key, value in global_insights.items() if key not in OUTPUT_STATE_KEYS})
+    if parquet_dir:
+        print(f"✅ Wrote Parquet dataset (campaigns + monthly daily partitions) to {parquet_dir}")
+    return count
+
+
+def write_parquet_facts(fact_paths: List[str], parquet_dir: str):
+    """Store the output's ad-level facts, merged into one table, in the Parquet dataset"""
+    parquet_facts = ad_facts_path(parquet_dir)
+    if len(fact_paths) == 1:
+        shutil.copyfile(fact_paths[0], parquet_facts)
+    else:
+        AudienceFactTable.merge_files(fact_paths, parquet_facts)
+
+
+def commit_outputs(staged: Dict[str, str], output_json: str, fact_files: List[str]):
+    """
+    Move staged outputs into place in order, then delete fact files the output no longer lists
+    
+    The aggregates go last: the next incremental run starts from them, and a run
+    interrupted between the moves leaves a generation mismatch it refuses to build on.
+    """
+    for path, staged_path in staged.items():
+        os.replace(staged_path, path)
+    
+    output_dir = os.path.dirname(os.path.abspath(output_json))
+    pattern = ad_facts_partition_path(os.path.abspath(output_json), "*")
+    listed = {os.path.join(output_dir, name) for name in fact_files}
+    for path in [ad_facts_path(os.path.abspath(output_json)), *glob.glob(pattern)]:
+        if path not in listed and os.path.exists(path):
+            os.remove(path)
+
+
+def convert_real_csv_to_rag_format(input_csv: Union[str, List[str]], output_json: str, parquet_dir: str = None,
+                                   chunksize: Optional[int] = None, max_workers: Optional[int] = None,
+                                   incremental: bool = False):
+    """
+    Convert real Facebook Ads CSV to RAG JSON format (and optionally a partitioned Parquet dataset)
+    
+    With chunksize the CSV is streamed in chunks of that many rows into running
+    per-(campaign, date) aggregates, and campaigns are written out one at a time,
+    so memory stays flat as the number of ad rows grows. A list of CSV exports is
+    aggregated in parallel, one worker process per file, and merged into one output.
+    In both cases ad-level facts are spilled to a temporary directory next to the
+    output per chunk and merged once all rows are read.
+    
+    With incremental, only rows dated after each campaign's latest day in the
+    existing output are aggregated, and campaign totals and insights are updated
+    from the running aggregates stored next to it (see aggregates_path), so the
+    aggregation work is proportional to the new rows. The new rows' ad facts go
+    to a file of their own (ad_facts_partition_path) that the output lists next
+    to the earlier ones; the JSON is rewritten by streaming it, one campaign at a
+    time. Without stored aggregates this falls back to a full conversion.
+    
+    The JSON, its aggregates and the new fact file are written under staged names
+    and only moved into place once all are complete, tagged with one generation id.
+    """
+    
+    input_csvs = [input_csv] if isinstance(input_csv, str) else list(input_csv)
+    source = input_csvs[0] if len(input_csvs) == 1 else f"{len(input_csvs)} CSV exports"
+    print(f"🔄 Converting real Facebook Ads data: {source}")
+    
+    spill_dir = None
+    staged: Dict[str, str] = {}
+    try:
+        started = time.perf_counter()
+        if chunksize or len(input_csvs) > 1:
+            output_dir = os.path.dirname(os.path.abspath(output_json))
+            os.makedirs(output_dir, exist_ok=True)
+            spill_dir = tempfile.mkdtemp(prefix=".ad_facts_", dir=output_dir)
+        previous = read_aggregates(output_json) if incremental else None
+        if incremental and previous is None:
+            print(f"⚠️ No stored aggregates for {output_json}, running a full conversion")
+        after = previous[0]["last_date"].to_dict() if previous is not None else None
         
-        # Save to JSON
-        os.makedirs(os.path.dirname(output_json), exist_ok=True)
-        with open(output_json, 'w') as f:
-            json.dump(rag_data, f, indent=2)
+        if len(input_csvs) > 1:
+            accumulator = accumulate_csvs(input_csvs, chunksize, max_workers, after, spill_dir)
+        else:
+            accumulator = ConversionAccumulator(after, spill_dir)
+            read_ads(input_csvs[0], accumulator, chunksize)
+        daily = accumulator.daily
+        targeting = accumulator.targeting_lists()
         
-        print(f"✅ Converted {len(campaigns)} real campaigns to {output_json}")
-        print(f"📊 Total records: {len(df)} ads across {len(campaigns)} campaigns")
-        print(f"💰 Total spend: ${df['spent'].sum():.2f}")
-        print(f"👀 Total impressions: {df['impressions'].sum():,}")
-        print(f"🎯 Total conversions: {df['total_conversion'].sum()}")
+        generation = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        stored_members: Dict[str, Any] = {}
+        if previous is None:
+            totals = campaign_totals(daily)
+            records = iter_campaigns(daily, targeting)
+            facts_path, fact_paths = ad_facts_path(output_json), []
+        else:
+            print(f"⚡ Appending {len(daily)} new campaign-days "
+                  f"({accumulator.rows - accumulator.skipped} new ad records, {accumulator.skipped} already converted)")
+            totals = merge_totals(previous[0], campaign_totals(daily))
+            targeting = merge_targeting(previous[1], targeting)
+            records = iter_appended_campaigns(output_json, daily, totals, targeting, stored_members)
+            facts_path = ad_facts_partition_path(output_json, generation)
+            fact_paths = [os.path.join(os.path.dirname(os.path.abspath(output_json)), name)
+                          for name in previous[2]["ad_fact_files"]]
+            if not fact_paths:
+                print(f"⚠️ No ad-level facts stored for earlier days; {facts_path} covers only the new rows")
+        staged = {path: path + STAGED_SUFFIX for path in (facts_path, output_json, aggregates_path(output_json))}
         
-        return True
+        # Ad facts of this run go to a file of their own; an incremental run without new rows adds none
+        fact_rows = accumulator.save_facts(staged[facts_path])
+        print(f"✅ Wrote ad-level audience facts ({fact_rows} ad-days, "
+              f"{os.path.getsize(staged[facts_path]) / 1e6:.1f} MB)")
+        if fact_rows or previous is None:
+            fact_paths.append(facts_path)
+        else:
+            os.remove(staged.pop(facts_path))
         
+        state = {"conversion_generation": generation, "ad_fact_files": [os.path.basename(path) for path in fact_paths]}
+        count = write_outputs(records, {**build_global_insights(totals), **state}, staged[output_json], parquet_dir)
+        if previous is not None:
+            stored_generation = stored_members.get("global_insights", {}).get("conversion_generation")
+            if stored_generation != previous[2]["conversion_generation"]:
+                raise ValueError(f"{output_json} (generation {stored_generation}) does not match its stored aggregates "
+                                 f"(generation {previous[2]['conversion_generation']}); an earlier conversion was "
+                                 f"interrupted, run a full conversion")
+        write_aggregates(totals, targeting, staged[aggregates_path(output_json)], state)
+        if parquet_dir:
+            write_parquet_facts([staged.get(path, path) for path in fact_paths], parquet_dir)
+        commit_outputs(staged, output_json, state["ad_fact_files"])
+        print(f"✅ Converted {count} real campaigns to {output_json}")
+        
+        elapsed = time.perf_counter() - started
+        print(f"📊 Total records: {accumulator.rows} ads across {count} campaigns "
+              f"({accumulator.rows / max(elapsed, 1e-9):,.0f} rows/s)")
+        print(f"💰 Total spend: ${totals['spend'].sum():.2f}")
+        print(f"👀 Total impressions: {totals['impressions'].sum():,}")
+        print(f"🎯 Total conversions: {totals['conversions'].sum()}")
+        
+        return True
+    
     except Exception as e:
         print(f"❌ Error converting real data: {e}")
         import traceback
         traceback.print_exc()
         return False
+    
+    finally:
+        if spill_dir:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+        for staged_path in staged.values():
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
 
 def main():
     """Convert real Facebook Ads data"""
-    input_csv = "data/real/data.csv"
+    parser = argparse.ArgumentParser(description="Convert real Facebook Ads CSV data to RAG format")
+    parser.add_argument("--parquet", nargs="?", const="data/real/parquet", default=None, metavar="DIR",
+                        help="Also write a partitioned Parquet dataset (default: data/real/parquet)")
+    parser.add_argument("--chunksize", type=int, default=None, metavar="ROWS",
+                        help="Stream the CSV in chunks of ROWS rows with bounded memory")
+    parser.add_argument("--input", nargs="+", default=["data/real/data.csv"], metavar="CSV",
+                        help="CSV exports or glob patterns to convert into one output (default: data/real/data.csv)")
+    parser.add_argument("--workers", type=int, default=None, metavar="N",
+                        help="Worker processes for multiple CSV exports (default: one per CPU)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Append only days newer than each campaign's latest day in the existing output")
+    args = parser.parse_args()
+    
     output_json = "data/real/campaigns.json"
     
-    if not os.path.exists(input_csv):
-        print(f"❌ Real data file not found: {input_csv}")
+    input_csvs = []
+    for pattern in args.input:
+        if glob.has_magic(pattern):
+            input_csvs.extend(sorted(glob.glob(pattern)))
+        elif os.path.exists(pattern):
+            input_csvs.append(pattern)
+        else:
+            print(f"❌ Real data file not found: {pattern}")
+            return
+    if not input_csvs:
+        print(f"❌ No CSV exports match: {' '.join(args.input)}")
         return
     
-    success = convert_real_csv_to_rag_format(input_csv, output_json)
+    success = convert_real_csv_to_rag_format(input_csvs, output_json, args.parquet, args.chunksize, args.workers,
+                                             args.incremental)
     
     if success:
         print("\n🎉 Real data conversion complete!")
         print(f"📁 Real campaigns available at: {output_json}")
         print("🔧 Set DATA_SOURCE=real to use this authentic Facebook Ads data")
+        if args.parquet:
+            print(f"🔧 Or set DATA_SOURCE=parquet to read the columnar dataset at {args.parquet}")
         print("🚀 Your RAG system now has real-world Facebook campaign insights!")
     else:
         print("❌ Conversion failed")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,116 @@
+"""
+Multi-account loading for CampaignDataLoader
+Parses one campaigns.json per ad account in a process pool and merges them into one namespace
+"""
+
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+from campaign_store import CampaignMetricsStore
+from parquet_store import is_parquet_dataset
+
+# Global insight sections rendered by the chunker; merged across accounts with prefixed keys
+MERGED_INSIGHT_SECTIONS = ("market_trends", "best_practices", "anomalies_detected")
+
+def resolve_data_files(data_path: str) -> List[str]:
+    """Expand a directory or glob pattern into a sorted list of JSON files (none for a Parquet dataset)"""
+    if os.path.isdir(data_path) and not is_parquet_dataset(data_path):
+        pattern = os.path.join(data_path, "*.json")
+        files = sorted(glob.glob(pattern)) or sorted(glob.glob(os.path.join(data_path, "*", "campaigns.json")))
+        return files
+    if glob.has_magic(data_path):
+        return sorted(glob.glob(data_path))
+    return []
+
+
+def account_name(path: str) -> str:
+    """Account name for a data file: its stem, or its directory for <account>/campaigns.json"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if stem == "campaigns":
+        return os.path.basename(os.path.dirname(os.path.abspath(path)))
+    return stem
+
+
+def _read_account_file(path: str, keep_daily: bool = True
+                       ) -> Tuple[str, Optional[Dict], Optional[CampaignMetricsStore], float, Optional[str]]:
+    """
+    Parse one account file and build its metrics store (runs in a worker process)
+    
+    Building the columnar store here keeps that work parallel; without keep_daily the
+    daily_performance dicts are dropped so only headers and arrays go back to the parent.
+    """
+    started = time.perf_counter()
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        return path, None, None, time.perf_counter() - started, str(e)
+    
+    if not isinstance(data, dict) or not isinstance(data.get("campaigns"), list):
+        return path, None, None, time.perf_counter() - started, None
+    store = CampaignMetricsStore.from_campaigns(data["campaigns"])
+    if not keep_daily:
+        for campaign in data["campaigns"]:
+            campaign.pop("daily_performance", None)
+    return path, data, store, time.perf_counter() - started, None
+
+
+def load_accounts(paths: List[str], max_workers: Optional[int] = None, keep_daily: bool = True
+                  ) -> Tuple[Dict, CampaignMetricsStore, List[Dict[str, Any]]]:
+    """
+    Load several account files and merge them
+    
+    Campaign ids are prefixed with the account name ("account:id") and each
+    campaign gets an "account" field. Returns the merged campaigns data, a
+    metrics store over all accounts and per-file load stats. Without keep_daily
+    the campaigns carry no daily_performance (for loaders that read it from the
+    store).
+    """
+    if len(paths) > 1:
+        workers = min(max_workers or os.cpu_count() or 1, len(paths))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_read_account_file, paths, [keep_daily] * len(paths)))
+    else:
+        results = [_read_account_file(path, keep_daily) for path in paths]
+    
+    campaigns = []
+    stores, prefixes = [], []
+    global_insights: Dict[str, Any] = {"accounts": {}}
+    file_stats = []
+    
+    for path, data, store, seconds, error in results:
+        account = account_name(path)
+        stats = {"path": path, "account": account, "seconds": seconds, "campaigns": 0}
+        if error:
+            print(f"❌ Could not load {path}: {error}")
+            stats["error"] = error
+            file_stats.append(stats)
+            continue
+        if data is None:
+            print(f"⚠️ Skipping {path}: no campaigns list")
+            stats["skipped"] = True
+            file_stats.append(stats)
+            continue
+        
+        for campaign in data["campaigns"]:
+            campaign["id"] = f"{account}:{campaign['id']}"
+            campaign["account"] = account
+            campaigns.append(campaign)
+        stores.append(store)
+        prefixes.append(f"{account}:")
+        stats["campaigns"] = len(data["campaigns"])
+        file_stats.append(stats)
+        
+        insights = data.get("global_insights", {})
+        global_insights["accounts"][account] = insights
+        for section in MERGED_INSIGHT_SECTIONS:
+            if isinstance(insights.get(section), dict):
+                merged = global_insights.setdefault(section, {})
+                for key, value in insights[section].items():
+                    merged[f"{account}_{key}"] = value
+    
+    return {"campaigns": campaigns, "global_insights": global_insights}, CampaignMetricsStore.concat(stores, prefixes), file_stats
@@ -0,0 +1,102 @@
+"""
+Ad-level CSV aggregation shared by the real-data converter and the ingestion worker
+Turns rows shaped like data/real/data.csv into per campaign-day sums and daily performance metrics
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any
+
+AVG_ORDER_VALUE = 50  # Assume $50 per conversion for ROAS
+REACH_RATIO = 0.7  # Estimated reach as a share of impressions
+FALLBACK_DATE = "2017-08-17"
+CAMPAIGN_ID_PREFIX = "real_camp_"
+
+# Text columns read as strings so every chunk of a streamed file gets the same types
+CSV_DTYPES = {column: str for column in ("reporting_start", "reporting_end", "campaign_id", "fb_campaign_id", "age", "gender")}
+
+# Per (campaign, day) sums of ad rows: output column -> CSV column
+DAILY_SUMS = {
+    "impressions": "impressions",
+    "clicks": "clicks",
+    "spend": "spent",
+    "conversions": "total_conversion",
+    "approved_conversions": "approved_conversion"
+}
+
+def read_ads_csv(path: str, **kwargs):
+    """pd.read_csv of an ad export with CSV_DTYPES (kwargs such as chunksize are passed through)"""
+    return pd.read_csv(path, dtype=CSV_DTYPES, **kwargs)
+
+
+def prepare_ads(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse reporting dates (DD/MM/YYYY) and normalize campaign ids, once per distinct value"""
+    codes, reporting_dates = pd.factorize(df["reporting_start"])
+    parsed = pd.to_datetime(pd.Series(reporting_dates, dtype=object), format="%d/%m/%Y", errors="coerce")
+    # Missing reporting dates have code -1, which picks the trailing fallback
+    date_keys = np.append(parsed.dt.strftime("%Y-%m-%d").fillna(FALLBACK_DATE).to_numpy(dtype=object), FALLBACK_DATE)
+    return df.assign(campaign_id=df["campaign_id"].astype(str), date=date_keys[codes])
+
+
+def aggregate_daily(ads: pd.DataFrame) -> pd.DataFrame:
+    """Sum ad rows per (campaign_id, date) in one multi-key groupby"""
+    return ads.groupby(["campaign_id", "date"], sort=True).agg(
+        **{name: (column, "sum") for name, column in DAILY_SUMS.items()},
+        ads=("ad_id", "size")
+    ).reset_index()
+
+
+def derived_metrics(impressions: np.ndarray, clicks: np.ndarray, spend: np.ndarray,
+                    conversions: np.ndarray) -> Dict[str, np.ndarray]:
+    """CTR, CPM, CPC, ROAS and conversion rate for arrays of totals (0 where undefined)"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "ctr": np.where(impressions > 0, clicks / impressions * 100, 0),
+            "cpm": np.where(impressions > 0, spend / impressions * 1000, 0),
+            "cpc": np.where(clicks > 0, spend / clicks, 0),
+            "roas": np.where(spend > 0, conversions * AVG_ORDER_VALUE / spend, 0),
+            "conversion_rate": np.where(clicks > 0, conversions / clicks * 100, 0)
+        }
+
+
+def daily_performance_rows(daily: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Daily performance dicts for every (campaign, day) row of the aggregate"""
+    impressions = daily["impressions"].to_numpy(dtype=np.float64)
+    clicks = daily["clicks"].to_numpy(dtype=np.float64)
+    spend = daily["spend"].to_numpy(dtype=np.float64)
+    conversions = daily["conversions"].to_numpy(dtype=np.float64)
+    rates = derived_metrics(impressions, clicks, spend, conversions)
+    
+    with np.errstate(invalid="ignore", divide="ignore"):
+        columns = {
+            "impressions": impressions.astype(np.int64),
+            "clicks": clicks.astype(np.int64),
+            "spend": np.round(spend, 2),
+            "conversions": conversions.astype(np.int64),
+            "ctr": np.round(rates["ctr"], 2),
+            "cpm": np.round(rates["cpm"], 2),
+            "cpc": np.round(rates["cpc"], 2),
+            "roas": np.round(rates["roas"], 2),
+            "frequency": np.round(impressions / (impressions * REACH_RATIO), 2),  # Estimate
+            "reach": (impressions * REACH_RATIO).astype(np.int64)  # Estimate reach
+        }
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(column.tolist() for column in columns.values()))]
+
+
+def campaign_day_rows(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    One {"campaign_id", "date", <metric>: value} row per campaign-day of ad rows
+    
+    Metrics are those the converter writes to daily_performance, so ingested
+    days match converted ones; undefined values (NaN) are left out.
+    """
+    if df.empty:
+        return []
+    daily = aggregate_daily(prepare_ads(df))
+    rows = []
+    for campaign_id, date, metrics in zip(daily["campaign_id"], daily["date"], daily_performance_rows(daily)):
+        row = {"campaign_id": f"{CAMPAIGN_ID_PREFIX}{campaign_id}", "date": date}
+        row.update({name: value for name, value in metrics.items() if value == value})
+        rows.append(row)
+    return rows
@@ -0,0 +1,279 @@
+"""
+Statistical anomaly detection over daily performance
+Robust z-score, EWMA and level-shift (changepoint) tests run vectorized across all campaigns
+and metrics of the columnar metrics store, with an incremental mode for newly appended days
+"""
+
+import warnings
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Any, Optional, Tuple
+
+DETECTION_METRICS = ("cpm", "ctr", "cpc", "roas", "spend", "conversions")
+
+# Scale factor turning a median absolute deviation into a normal-consistent sigma
+_MAD_SCALE = 1.4826
+
+# Rows per block of the rolling median, bounding its window matrix to block x window values
+ROBUST_Z_BLOCK_ROWS = 1 << 15
+
+def _segment_rows(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Concatenated row ranges [start, end) with each row's segment id and position in it"""
+    lengths = ends - starts
+    segment = np.repeat(np.arange(len(lengths)), lengths)
+    first = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if len(lengths) else lengths
+    position = np.arange(lengths.sum()) - first[segment] if len(lengths) else lengths
+    rows = starts[segment] + position
+    return rows, segment, position
+
+
+class AnomalyDetector:
+    """Detects metric anomalies for every campaign in a CampaignMetricsStore"""
+    
+    METHODS = ("robust_z", "ewma", "changepoint")
+    
+    def __init__(self, store, metrics: Optional[List[str]] = None, window: int = 14, min_history: int = 7,
+                 z_threshold: float = 3.5, ewma_span: int = 7, ewma_threshold: float = 3.0,
+                 changepoint_window: int = 7, changepoint_threshold: float = 4.0, min_change_pct: float = 20.0):
+        self.store = store
+        self.metrics = list(metrics or DETECTION_METRICS)
+        self.window = window
+        self.min_history = min_history
+        self.z_threshold = z_threshold
+        self.ewma_span = ewma_span
+        self.ewma_threshold = ewma_threshold
+        self.changepoint_window = changepoint_window
+        self.changepoint_threshold = changepoint_threshold
+        self.min_change_pct = min_change_pct
+        self._records: Dict[str, List[Dict[str, Any]]] = {}
+        self._scanned_through: Dict[str, np.datetime64] = {}
+        self._version = None
+    
+    @property
+    def context_rows(self) -> int:
+        """History rows read before the first evaluated row of an incremental scan"""
+        return max(self.window, 4 * self.ewma_span, self.changepoint_window)
+    
+    def detect(self) -> List[Dict[str, Any]]:
+        """Full scan of every campaign, replacing previous results"""
+        store = self.store
+        version = store.version
+        self._records = {}
+        self._scanned_through = {}
+        offsets = store.offsets.astype(np.int64)
+        nonempty = offsets[1:] > offsets[:-1]
+        starts, ends = offsets[:-1][nonempty], offsets[1:][nonempty]
+        self._scan(starts, starts, ends)
+        self._version = version
+        return self.anomalies()
+    
+    def update(self) -> List[Dict[str, Any]]:
+        """
+        Scan only days appended since the last scan
+        
+        Each campaign is re-evaluated from its first new day (minus the changepoint
+        window, whose post-period may have just completed) using a bounded amount of
+        history as context. Returns the records found in this pass. The scanned
+        version is recorded only once the scan has completed.
+        """
+        store = self.store
+        if self._version is None:
+            self.detect()
+            return self.anomalies()
+        version = store.version
+        if self._version == version:
+            return []
+        
+        offsets = store.offsets.astype(np.int64)
+        dates = store.dates
+        starts, eval_starts, ends = [], [], []
+        for position, campaign_id in enumerate(store.campaign_ids):
+            start, end = offsets[position], offsets[position + 1]
+            if end <= start:
+                continue
+            scanned = self._scanned_through.get(campaign_id)
+            first_new = start if scanned is None else start + int(np.searchsorted(dates[start:end], scanned, side="right"))
+            if first_new >= end:
+                continue
+            eval_start = max(start, first_new - self.changepoint_window)
+            starts.append(max(start, eval_start - self.context_rows))
+            eval_starts.append(eval_start)
+            ends.append(end)
+        
+        if not starts:
+            self._version = version
+            return []
+        records = self._scan(np.array(starts), np.array(eval_starts), np.array(ends))
+        self._version = version
+        return records
+    
+    def mark_changed(self, campaign_id: str, date: str):
+        """Make the next update() re-scan a campaign from date, e.g. after a day was replaced"""
+        scanned = self._scanned_through.get(campaign_id)
+        before = np.datetime64(date, "D") - np.timedelta64(1, "D")
+        if scanned is not None and before < scanned:
+            self._scanned_through[campaign_id] = before
+    
+    def fork(self, store) -> "AnomalyDetector":
+        """Detector over another version of the store that resumes from this one's results"""
+        detector = AnomalyDetector.__new__(AnomalyDetector)
+        detector.__dict__.update(self.__dict__)
+        detector.store = store
+        detector._records = {campaign_id: list(records) for campaign_id, records in self._records.items()}
+        detector._scanned_through = dict(self._scanned_through)
+        return detector
+    
+    def anomalies(self, campaign_id: Optional[str] = None, metric: Optional[str] = None,
+                  since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Detected anomalies ordered by date, optionally filtered"""
+        if campaign_id is not None:
+            records = list(self._records.get(campaign_id, []))
+        else:
+            records = [r for campaign_records in self._records.values() for r in campaign_records]
+        if metric is not None:
+            records = [r for r in records if r["metric"] == metric]
+        if since is not None:
+            records = [r for r in records if r["date"] >= str(since)]
+        return sorted(records, key=lambda r: (r["date"], r["campaign_id"], r["metric"], r["method"]))
+    
+    def _scan(self, starts: np.ndarray, eval_starts: np.ndarray, ends: np.ndarray) -> List[Dict[str, Any]]:
+        """Run every test over row ranges [start, end), reporting rows from eval_start on"""
+        store = self.store
+        rows, segment, position = _segment_rows(starts, ends)
+        lengths = (ends - starts)[segment]
+        evaluated = position >= (eval_starts - starts)[segment]
+        row_campaign = store.row_campaign[rows]
+        dates = store.dates[rows]
+        
+        found = []
+        for metric in self.metrics:
+            if metric not in store.metric_names:
+                continue
+            values = np.asarray(store.column(metric), dtype=np.float64)[rows]
+            for method, hits, baseline, score, observed in (
+                ("robust_z",) + self._robust_z(values, position),
+                ("ewma",) + self._ewma(values, segment, position),
+                ("changepoint",) + self._changepoint(values, segment, position, lengths)
+            ):
+                hits = np.flatnonzero(hits & evaluated)
+                for i in hits:
+                    found.append(self._record(store.campaign_ids[row_campaign[i]], dates[i], metric, method,
+                                              observed[i], baseline[i], score[i]))
+        
+        # Replace earlier results for the re-evaluated part of each campaign
+        for campaign_position, eval_row in zip(store.row_campaign[eval_starts], eval_starts):
+            campaign_id = store.campaign_ids[campaign_position]
+            cutoff = str(store.dates[eval_row])
+            kept = [r for r in self._records.get(campaign_id, []) if r["date"] < cutoff]
+            if kept:
+                self._records[campaign_id] = kept
+            else:
+                self._records.pop(campaign_id, None)
+        for record in found:
+            self._records.setdefault(record["campaign_id"], []).append(record)
+        
+        for campaign_position, end in zip(store.row_campaign[ends - 1], ends):
+            self._scanned_through[store.campaign_ids[campaign_position]] = store.dates[end - 1]
+        return sorted(found, key=lambda r: (r["date"], r["campaign_id"], r["metric"], r["method"]))
+    
+    def _robust_z(self, values: np.ndarray, position: np.ndarray):
+        """
+        Deviation from the trailing median in units of MAD sigma
+        
+        Rows are processed ROBUST_Z_BLOCK_ROWS at a time, so the window matrix and
+        the median copies take memory per block rather than per row of the scan.
+        """
+        w = self.window
+        padded = np.concatenate([np.full(w, np.nan), values])
+        lag = np.arange(w, 0, -1)
+        median = np.empty(len(values))
+        sigma = np.empty(len(values))
+        count = np.empty(len(values), dtype=np.int64)
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            for lo in range(0, len(values), ROBUST_Z_BLOCK_ROWS):
+                hi = min(lo + ROBUST_Z_BLOCK_ROWS, len(values))
+                windows = sliding_window_view(padded[lo:hi + w - 1], w)
+                history = np.where(lag[None, :] <= position[lo:hi, None], windows, np.nan)
+                median[lo:hi] = np.nanmedian(history, axis=1)
+                sigma[lo:hi] = _MAD_SCALE * np.nanmedian(np.abs(history - median[lo:hi, None]), axis=1)
+                count[lo:hi] = np.sum(~np.isnan(history), axis=1)
+        enough = count >= self.min_history
+        
+        with np.errstate(invalid="ignore", divide="ignore"):
+            score = np.where(enough & (sigma > 0), (values - median) / sigma, np.nan)
+        return np.abs(score) >= self.z_threshold, median, score, values
+    
+    def _ewma(self, values: np.ndarray, segment: np.ndarray, position: np.ndarray):
+        """Deviation from the previous day's exponentially weighted mean and std"""
+        ewm = pd.Series(values).groupby(segment, sort=False).ewm(span=self.ewma_span, min_periods=self.min_history)
+        mean = ewm.mean().to_numpy()
+        std = ewm.std().to_numpy()
+        
+        # Compare each day with the estimate made before it
+        previous_mean = np.concatenate([[np.nan], mean[:-1]])
+        previous_std = np.concatenate([[np.nan], std[:-1]])
+        first = position == 0
+        previous_mean[first] = np.nan
+        previous_std[first] = np.nan
+        
+        with np.errstate(invalid="ignore", divide="ignore"):
+            score = np.where(previous_std > 0, (values - previous_mean) / previous_std, np.nan)
+        return np.abs(score) >= self.ewma_threshold, previous_mean, score, values
+    
+    def _changepoint(self, values: np.ndarray, segment: np.ndarray, position: np.ndarray, lengths: np.ndarray):
+        """Welch t-statistic between the windows before and from each day, peak of each run"""
+        w = self.changepoint_window
+        observed = ~np.isnan(values)
+        filled = np.where(observed, values, 0.0)
+        s1 = np.concatenate([[0.0], np.cumsum(filled)])
+        s2 = np.concatenate([[0.0], np.cumsum(filled * filled)])
+        n = np.concatenate([[0], np.cumsum(observed)])
+        
+        index = np.arange(len(values))
+        valid = (position >= w) & (position + w <= lengths)
+        pre_lo, mid, post_hi = np.clip(index - w, 0, None), index, np.clip(index + w, None, len(values))
+        
+        with np.errstate(invalid="ignore", divide="ignore"):
+            n_pre, n_post = n[mid] - n[pre_lo], n[post_hi] - n[mid]
+            mean_pre = (s1[mid] - s1[pre_lo]) / n_pre
+            mean_post = (s1[post_hi] - s1[mid]) / n_post
+            var_pre = ((s2[mid] - s2[pre_lo]) - n_pre * mean_pre ** 2) / (n_pre - 1)
+            var_post = ((s2[post_hi] - s2[mid]) - n_post * mean_post ** 2) / (n_post - 1)
+            spread = np.sqrt(np.clip(var_pre, 0, None) / n_pre + np.clip(var_post, 0, None) / n_post)
+            score = np.where(valid & (n_pre > 1) & (n_post > 1) & (spread > 0),
+                             (mean_post - mean_pre) / spread, np.nan)
+            change_pct = np.abs(mean_post - mean_pre) / np.abs(mean_pre) * 100
+        
+        flagged = (np.abs(score) >= self.changepoint_threshold) & (change_pct >= self.min_change_pct)
+        
+        # Keep only the strongest day of each consecutive run of flagged days
+        run_start = flagged & ~(np.concatenate([[False], flagged[:-1]]) & (position > 0))
+        run_id = np.cumsum(run_start)
+        hits = np.zeros(len(values), dtype=bool)
+        candidates = np.flatnonzero(flagged)
+        if len(candidates):
+            order = np.lexsort((-np.abs(score[candidates]), run_id[candidates]))
+            _, firsts = np.unique(run_id[candidates][order], return_index=True)
+            hits[candidates[order][firsts]] = True
+        return hits, mean_pre, score, mean_post
+    
+    @staticmethod
+    def _record(campaign_id: str, date, metric: str, method: str, value: float, baseline: float,
+                score: float) -> Dict[str, Any]:
+        """Structured anomaly record"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            magnitude = (value - baseline) / abs(baseline) * 100 if baseline else None
+        return {
+            "campaign_id": campaign_id,
+            "date": str(date),
+            "metric": metric,
+            "method": method,
+            "direction": "spike" if value > baseline else "drop",
+            "value": round(float(value), 4),
+            "baseline": round(float(baseline), 4),
+            "magnitude": round(float(magnitude), 2) if magnitude is not None else None,
+            "score": round(float(score), 2)
+        }
@@ -0,0 +1,310 @@
+"""
+Ad-level audience fact table
+One row per ad and reporting day with dictionary-encoded age, gender and interest columns, sorted by
+campaign and date so a campaign's date range is a contiguous slice for fast group-by breakdowns
+"""
+
+import os
+import shutil
+import tempfile
+import zipfile
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Optional, Sequence, Union
+
+AD_FACTS_FILE = "ad_facts.npz"
+
+# Summed per group by breakdown()
+FACT_MEASURES = ("impressions", "clicks", "spend", "conversions", "approved_conversions")
+
+# Dictionary-encoded columns; interest holds up to three codes per row
+DIMENSIONS = ("age", "gender", "interest")
+UNKNOWN = "unknown"
+
+MERGE_BLOCK_ROWS = 1 << 20  # Rows reordered at a time by merge_files
+
+def ad_facts_path(data_path: str) -> str:
+    """Fact table file belonging to a campaigns JSON file (campaigns.ad_facts.npz) or data directory"""
+    if os.path.isdir(data_path):
+        return os.path.join(data_path, AD_FACTS_FILE)
+    return f"{os.path.splitext(data_path)[0]}.{AD_FACTS_FILE}"
+
+
+def ad_facts_partition_path(data_path: str, generation: str) -> str:
+    """Fact table file with the rows appended by one incremental conversion (campaigns.ad_facts.<generation>.npz)"""
+    return f"{os.path.splitext(data_path)[0]}.{os.path.splitext(AD_FACTS_FILE)[0]}.{generation}.npz"
+
+
+class AudienceFactTable:
+    """Columnar ad-day rows: campaign and dimension codes, dates, ad ids and summable measures"""
+    
+    def __init__(self, dictionaries: Dict[str, List[str]], columns: Dict[str, np.ndarray]):
+        # Rows are kept ordered by campaign code (campaign ids sorted), then date
+        order = np.lexsort((columns["date"], columns["campaign"]))
+        self.dictionaries = {name: list(values) for name, values in dictionaries.items()}
+        self.columns = {name: values[order] for name, values in columns.items()}
+        self.campaign_ids = self.dictionaries["campaign"]
+        self._positions = {campaign_id: i for i, campaign_id in enumerate(self.campaign_ids)}
+        self.offsets = np.searchsorted(self.columns["campaign"], np.arange(len(self.campaign_ids) + 1))
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, interest_columns: Sequence[str]) -> "AudienceFactTable":
+        """
+        Encode ad rows with campaign_id, date (YYYY-MM-DD), ad_id, age, gender,
+        interest and measure columns
+        """
+        dictionaries, columns = {}, {}
+        for name, source in (("campaign", "campaign_id"), ("age", "age"), ("gender", "gender")):
+            codes, values = pd.factorize(df[source], sort=True)
+            dictionaries[name] = [str(value) for value in values]
+            columns[name] = codes.astype(np.int32 if name == "campaign" else np.int16)
+        
+        interests = df[list(interest_columns)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+        codes, values = pd.factorize(interests.ravel(), sort=True)
+        dictionaries["interest"] = [str(int(value)) for value in values]
+        columns["interest"] = codes.astype(np.int32).reshape(interests.shape)
+        
+        columns["date"] = df["date"].to_numpy().astype("datetime64[D]")
+        columns["ad_id"] = pd.to_numeric(df["ad_id"], errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+        for name in FACT_MEASURES:
+            columns[name] = pd.to_numeric(df[name], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+        return cls(dictionaries, columns)
+    
+    @classmethod
+    def concat(cls, tables: List["AudienceFactTable"]) -> "AudienceFactTable":
+        """One table from several, re-encoding every dictionary column against the union of values"""
+        if not tables:
+            return cls.empty()
+        
+        dictionaries, columns = {}, {}
+        for name in ("campaign",) + DIMENSIONS:
+            union = sorted(set().union(*(table.dictionaries[name] for table in tables)),
+                           key=(lambda value: int(value)) if name == "interest" else None)
+            lookup = pd.Index(union)
+            remapped = []
+            for table in tables:
+                # Code -1 (missing) indexes the appended -1 and stays missing
+                mapping = np.append(lookup.get_indexer(table.dictionaries[name]), -1)
+                remapped.append(mapping[table.columns[name]].astype(table.columns[name].dtype))
+            dictionaries[name] = union
+            columns[name] = np.concatenate(remapped)
+        for name in ("date", "ad_id") + FACT_MEASURES:
+            columns[name] = np.concatenate([table.columns[name] for table in tables])
+        return cls(dictionaries, columns)
+    
+    @classmethod
+    def merge_files(cls, paths: List[str], path: str) -> int:
+        """
+        Write the concatenation of tables saved by save() to path without loading them together
+        
+        Rows of one input at a time are scattered by campaign into memory-mapped
+        column files, each campaign's rows are then ordered by date a block of
+        campaigns at a time, and the columns are zipped into save()'s .npz layout.
+        The result equals concat() of the loaded tables. Returns the row count.
+        """
+        if not paths:
+            cls.empty().save(path)
+            return 0
+        
+        inputs = [np.load(input_path, allow_pickle=False) for input_path in paths]
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix=".merging_", dir=directory)
+        try:
+            dictionaries, mappings = {}, {}
+            for name in ("campaign",) + DIMENSIONS:
+                values = [archive[f"dictionary_{name}"].tolist() for archive in inputs]
+                union = sorted(set().union(*values), key=(lambda value: int(value)) if name == "interest" else None)
+                lookup = pd.Index(union)
+                dictionaries[name] = union
+                # Code -1 (missing) indexes the appended -1 and stays missing
+                mappings[name] = [np.append(lookup.get_indexer(table_values), -1) for table_values in values]
+            
+            # Rows per campaign across all inputs give each campaign's slice of the output
+            campaign_codes = [mapping[archive["column_campaign"]]
+                              for mapping, archive in zip(mappings["campaign"], inputs)]
+            counts = sum(np.bincount(codes, minlength=len(dictionaries["campaign"])) for codes in campaign_codes)
+            offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+            del campaign_codes
+            if offsets[-1] == 0:
+                cls(dictionaries, cls.empty().columns).save(path)
+                return 0
+            
+            first = inputs[0]
+            names = [key[len("column_"):] for key in first.files if key.startswith("column_")]
+            columns = {}
+            for name in names:
+                sample = first[f"column_{name}"]
+                columns[name] = np.lib.format.open_memmap(
+                    os.path.join(work_dir, f"column_{name}.npy"), mode="w+", dtype=sample.dtype,
+                    shape=(int(offsets[-1]),) + sample.shape[1:]
+                )
+            
+            cursor = offsets[:-1].copy()
+            for i, archive in enumerate(inputs):
+                codes = mappings["campaign"][i][archive["column_campaign"]]
+                order = np.argsort(codes, kind="stable")
+                sorted_codes = codes[order]
+                rank = np.arange(len(codes)) - np.searchsorted(sorted_codes, sorted_codes, side="left")
+                target = np.empty(len(codes), dtype=np.int64)
+                target[order] = cursor[sorted_codes] + rank
+                cursor += np.bincount(codes, minlength=len(cursor))
+                for name in names:
+                    values = archive[f"column_{name}"]
+                    if name in mappings:
+                        values = mappings[name][i][values].astype(values.dtype)
+                    columns[name][target] = values
+            
+            # Within a campaign rows are in input order; a stable sort by date matches concat()
+            start = 0
+            while start < len(counts):
+                stop = max(int(np.searchsorted(offsets, offsets[start] + MERGE_BLOCK_ROWS, side="right")) - 1, start + 1)
+                lo, hi = offsets[start], offsets[stop]
+                order = np.lexsort((columns["date"][lo:hi], columns["campaign"][lo:hi]))
+                if (order != np.arange(len(order))).any():
+                    for values in columns.values():
+                        values[lo:hi] = values[lo:hi][order]
+                start = stop
+            
+            for values in columns.values():
+                values.flush()
+            columns.clear()
+            with zipfile.ZipFile(f"{path}.writing", "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+                for name in names:
+                    archive.write(os.path.join(work_dir, f"column_{name}.npy"), f"column_{name}.npy")
+                for name, values in dictionaries.items():
+                    with archive.open(f"dictionary_{name}.npy", "w", force_zip64=True) as f:
+                        np.lib.format.write_array(f, np.array(values, dtype=str))
+            os.replace(f"{path}.writing", path)
+            return int(offsets[-1])
+        finally:
+            for archive in inputs:
+                archive.close()
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    @classmethod
+    def empty(cls) -> "AudienceFactTable":
+        """Table without rows"""
+        columns = {
+            "campaign": np.empty(0, dtype=np.int32), "age": np.empty(0, dtype=np.int16),
+            "gender": np.empty(0, dtype=np.int16), "interest": np.empty((0, 3), dtype=np.int32),
+            "date": np.empty(0, dtype="datetime64[D]"), "ad_id": np.empty(0, dtype=np.int64),
+            **{name: np.empty(0, dtype=np.float64) for name in FACT_MEASURES}
+        }
+        return cls({name: [] for name in ("campaign",) + DIMENSIONS}, columns)
+    
+    def save(self, path: str):
+        """Write the table as an uncompressed .npz archive, moved into place when complete"""
+        arrays = {f"column_{name}": values for name, values in self.columns.items()}
+        arrays.update({f"dictionary_{name}": np.array(values, dtype=str) for name, values in self.dictionaries.items()})
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{path}.writing", 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(f"{path}.writing", path)
+    
+    @classmethod
+    def load(cls, path: str) -> "AudienceFactTable":
+        """Read a table written by save()"""
+        with np.load(path, allow_pickle=False) as archive:
+            dictionaries = {key[len("dictionary_"):]: archive[key].tolist() for key in archive.files
+                            if key.startswith("dictionary_")}
+            columns = {key[len("column_"):]: archive[key] for key in archive.files if key.startswith("column_")}
+        return cls(dictionaries, columns)
+    
+    def __len__(self) -> int:
+        return len(self.columns["date"])
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays"""
+        return sum(values.nbytes for values in self.columns.values()) + self.offsets.nbytes
+    
+    def rows(self, campaign_ids: Optional[Union[str, List[str]]] = None, start=None, end=None) -> np.ndarray:
+        """Row indices of the given campaigns (all if None) between two dates (inclusive)"""
+        dates = self.columns["date"]
+        lo = None if start is None else np.datetime64(start, "D")
+        hi = None if end is None else np.datetime64(end, "D")
+        
+        if campaign_ids is None:
+            mask = np.ones(len(dates), dtype=bool)
+            if lo is not None:
+                mask &= dates >= lo
+            if hi is not None:
+                mask &= dates <= hi
+            return np.flatnonzero(mask)
+        
+        if isinstance(campaign_ids, str):
+            campaign_ids = [campaign_ids]
+        ranges = []
+        for campaign_id in campaign_ids:
+            position = self._positions.get(campaign_id)
+            if position is None:
+                continue
+            first, last = int(self.offsets[position]), int(self.offsets[position + 1])
+            campaign_dates = dates[first:last]
+            begin = 0 if lo is None else int(np.searchsorted(campaign_dates, lo, side="left"))
+            stop = len(campaign_dates) if hi is None else int(np.searchsorted(campaign_dates, hi, side="right"))
+            ranges.append(np.arange(first + begin, first + max(begin, stop)))
+        return np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+    
+    def breakdown(self, by: Union[str, Sequence[str]] = ("age", "gender"),
+                  campaign_ids: Optional[Union[str, List[str]]] = None, start=None, end=None) -> pd.DataFrame:
+        """
+        Measures summed per combination of the by dimensions, with CTR, CPM, CPC and conversion rate
+        
+        Groups are ordered by dimension value; missing values are grouped as
+        "unknown". An ad targeting several interests counts towards each of them,
+        so interest groups overlap and their sums exceed the selection's total.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        unknown = [name for name in by if name not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown breakdown dimension(s) {', '.join(unknown)}; use {', '.join(DIMENSIONS)}")
+        
+        rows = self.rows(campaign_ids, start, end)
+        codes = {}
+        if "interest" in by:
+            interests = self.columns["interest"][rows]
+            targeted = interests >= 0
+            rows = np.repeat(rows, targeted.sum(axis=1))
+            codes["interest"] = interests[targeted]
+        for name in by:
+            if name != "interest":
+                codes[name] = self.columns[name][rows]
+        
+        # One mixed-radix key per row; slot 0 of each dimension is "unknown"
+        key = np.zeros(len(rows), dtype=np.int64)
+        for name in by:
+            key = key * (len(self.dictionaries[name]) + 1) + codes[name].astype(np.int64) + 1
+        groups, inverse = np.unique(key, return_inverse=True)
+        
+        result = {}
+        remaining = groups
+        for name in reversed(by):
+            remaining, slot = np.divmod(remaining, len(self.dictionaries[name]) + 1)
+            labels = np.array([UNKNOWN] + self.dictionaries[name], dtype=object)
+            result[name] = labels[slot]
+        frame = pd.DataFrame({name: result[name] for name in by})
+        frame["ads"] = np.bincount(inverse, minlength=len(groups))
+        for name in FACT_MEASURES:
+            frame[name] = np.bincount(inverse, weights=self.columns[name][rows], minlength=len(groups))
+        
+        impressions, clicks = frame["impressions"].to_numpy(), frame["clicks"].to_numpy()
+        spend, conversions = frame["spend"].to_numpy(), frame["conversions"].to_numpy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frame["ctr"] = np.where(impressions > 0, clicks / impressions * 100, np.nan)
+            frame["cpm"] = np.where(impressions > 0, spend / impressions * 1000, np.nan)
+            frame["cpc"] = np.where(clicks > 0, spend / clicks, np.nan)
+            frame["conversion_rate"] = np.where(clicks > 0, conversions / clicks * 100, np.nan)
+        return frame
+    
+    def stats(self) -> Dict[str, Any]:
+        """Row, campaign and dictionary sizes"""
+        return {
+            "rows": len(self),
+            "campaigns": len(self.campaign_ids),
+            "dictionary_sizes": {name: len(self.dictionaries[name]) for name in DIMENSIONS},
+            "bytes": self.nbytes
+        }
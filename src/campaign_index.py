@@ -0,0 +1,87 @@
+"""
+Secondary indexes for campaign lookups
+Hash and inverted indexes built once at load time instead of scanning every campaign per call
+"""
+
+from typing import Dict, List, Any, Optional
+
+class CampaignIndex:
+    """Lookup indexes by id, industry, status and audience"""
+    
+    def __init__(self):
+        self.campaigns: List[Dict] = []
+        self.by_id: Dict[str, Dict] = {}
+        self.by_industry: Dict[str, List[int]] = {}
+        self.by_status: Dict[str, List[int]] = {}
+        self.by_audience: Dict[str, List[int]] = {}
+    
+    @classmethod
+    def build(cls, campaigns: List[Dict]) -> "CampaignIndex":
+        """Build indexes for a list of campaigns"""
+        index = cls()
+        for campaign in campaigns:
+            index.add(campaign)
+        return index
+    
+    def copy(self, replacements: Optional[Dict[int, Dict]] = None) -> "CampaignIndex":
+        """
+        Independent copy of the indexes
+        
+        Args:
+            replacements: id() of an indexed campaign -> the object that takes its place
+        """
+        replacements = replacements or {}
+        index = CampaignIndex()
+        index.campaigns = [replacements.get(id(campaign), campaign) for campaign in self.campaigns]
+        index.by_id = {key: replacements.get(id(campaign), campaign) for key, campaign in self.by_id.items()}
+        index.by_industry = {key: list(positions) for key, positions in self.by_industry.items()}
+        index.by_status = {key: list(positions) for key, positions in self.by_status.items()}
+        index.by_audience = {key: list(positions) for key, positions in self.by_audience.items()}
+        return index
+    
+    def add(self, campaign: Dict) -> int:
+        """Index one campaign; returns its position"""
+        position = len(self.campaigns)
+        self.campaigns.append(campaign)
+        self.by_id.setdefault(campaign["id"], campaign)
+        self.by_industry.setdefault(self._key(campaign.get("industry")), []).append(position)
+        self.by_status.setdefault(self._key(campaign.get("status")), []).append(position)
+        self.by_audience.setdefault(self._key(campaign.get("audience")), []).append(position)
+        return position
+    
+    @staticmethod
+    def _key(value: Any) -> str:
+        """Normalize a categorical value for lookup"""
+        return (value or "").lower()
+    
+    def get(self, campaign_id: str) -> Dict:
+        """Get a campaign by id, or {} if unknown"""
+        return self.by_id.get(campaign_id, {})
+    
+    def by_industry_name(self, industry: str) -> List[Dict]:
+        """Campaigns whose industry matches (case-insensitive)"""
+        return self._resolve(self.by_industry.get(industry.lower(), []))
+    
+    def by_status_name(self, status: str) -> List[Dict]:
+        """Campaigns whose status matches (case-insensitive)"""
+        return self._resolve(self.by_status.get(status.lower(), []))
+    
+    def count_status(self, status: str) -> int:
+        """Number of campaigns with a status"""
+        return len(self.by_status.get(status.lower(), []))
+    
+    def by_audience_text(self, audience_type: str) -> List[Dict]:
+        """Campaigns whose audience contains the given text (case-insensitive)"""
+        query = audience_type.lower()
+        
+        # Audience values are low-cardinality, so scan distinct values rather than campaigns
+        matched = []
+        for value, value_positions in self.by_audience.items():
+            if query in value:
+                matched.extend(value_positions)
+        return self._resolve(sorted(matched))
+    
+    def _resolve(self, positions: List[int]) -> List[Dict]:
+        """Map positions back to campaigns in load order"""
+        campaigns = self.campaigns
+        return [campaigns[p] for p in positions]
@@ -0,0 +1,231 @@
+"""
+Compact campaign records
+__slots__ records with dictionary-encoded categoricals and tuple-backed budget/targeting,
+exposed through a read-only dict-compatible interface
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Dict, List, Any, Tuple, Iterator
+
+class _AbsentType:
+    """Marker for fields missing from the source campaign (pickles as a singleton)"""
+    
+    __slots__ = ()
+    
+    def __reduce__(self):
+        return "_ABSENT"
+
+_ABSENT = _AbsentType()
+
+# Categorical header fields stored as codes into a shared value pool
+CATEGORICAL_FIELDS = ("objective", "status", "industry", "audience")
+
+# Key order of a converted campaign dict
+FIELD_ORDER = ("id", "name", "objective", "status", "industry", "audience", "created_date",
+               "budget", "targeting", "daily_performance", "insights")
+
+class CategoryPool:
+    """Dictionary encoding for repeated string values"""
+    
+    def __init__(self):
+        self.values: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+    
+    def encode(self, value: Any) -> int:
+        """Code for a value, adding it to the pool if new"""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            if isinstance(value, str):
+                value = sys.intern(value)
+            self.values.append(value)
+            self._codes[value] = code
+        return code
+    
+    def decode(self, code: int) -> Any:
+        """Value for a code"""
+        return self.values[code]
+
+
+class CampaignRecordPool:
+    """Shared state for compact records: category pools, key shapes and the metrics store"""
+    
+    def __init__(self, metrics_store=None):
+        self.metrics_store = metrics_store
+        self.categories = {field: CategoryPool() for field in CATEGORICAL_FIELDS}
+        self._shapes: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._strings: Dict[str, str] = {}
+    
+    def shape(self, keys: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Shared key tuple so records with the same dict layout reuse one object"""
+        return self._shapes.setdefault(keys, keys)
+    
+    def freeze(self, value: Any) -> Any:
+        """Immutable, interned copy of a JSON value"""
+        if isinstance(value, str):
+            return self._strings.setdefault(value, value)
+        if isinstance(value, list):
+            return tuple(self.freeze(v) for v in value)
+        if isinstance(value, dict):
+            return FrozenMapping(self, value)
+        return value
+    
+    def fork(self, metrics_store) -> "CampaignRecordPool":
+        """Pool sharing the category pools and interned values, bound to another metrics store"""
+        pool = CampaignRecordPool.__new__(CampaignRecordPool)
+        pool.__dict__.update(self.__dict__)
+        pool.metrics_store = metrics_store
+        return pool
+    
+    def __getstate__(self):
+        # The metrics store is reattached by the loader after unpickling
+        state = self.__dict__.copy()
+        state["metrics_store"] = None
+        return state
+
+
+class FrozenMapping:
+    """Tuple-backed replacement for a small dict (budget, targeting)"""
+    
+    __slots__ = ("keys", "values")
+    
+    def __init__(self, pool: CampaignRecordPool, data: Dict[str, Any]):
+        self.keys = pool.shape(tuple(data.keys()))
+        self.values = tuple(pool.freeze(v) for v in data.values())
+    
+    def thaw(self) -> Dict[str, Any]:
+        """Fresh dict (with lists) equal to the original JSON value"""
+        return {k: _thaw(v) for k, v in zip(self.keys, self.values)}
+
+
+def _thaw(value: Any) -> Any:
+    """Mutable copy of a frozen value"""
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    if isinstance(value, FrozenMapping):
+        return value.thaw()
+    return value
+
+
+class CampaignRecord(Mapping):
+    """Read-only, dict-compatible campaign backed by __slots__"""
+    
+    __slots__ = ("id", "name", "created_date", "_codes", "_budget", "_targeting", "_insights", "_extra", "_pool")
+    
+    def __init__(self, campaign: Dict[str, Any], pool: CampaignRecordPool):
+        self._pool = pool
+        self.id = campaign["id"]
+        self.name = campaign.get("name", _ABSENT)
+        self.created_date = pool.freeze(campaign.get("created_date", _ABSENT))
+        self._codes = tuple(
+            pool.categories[field].encode(campaign[field]) if field in campaign else -1
+            for field in CATEGORICAL_FIELDS
+        )
+        self._budget = pool.freeze(campaign["budget"]) if "budget" in campaign else _ABSENT
+        self._targeting = pool.freeze(campaign["targeting"]) if "targeting" in campaign else _ABSENT
+        self._insights = campaign.get("insights", _ABSENT)
+        extra = {k: v for k, v in campaign.items() if k not in FIELD_ORDER}
+        self._extra = extra or None
+    
+    def rebind(self, pool: CampaignRecordPool) -> "CampaignRecord":
+        """Copy of this record reading through another pool (and so another metrics store)"""
+        record = CampaignRecord.__new__(CampaignRecord)
+        for slot in self.__slots__:
+            setattr(record, slot, getattr(self, slot))
+        record._pool = pool
+        return record
+    
+    def _lookup(self, key: str) -> Any:
+        """Value for a key, or _ABSENT"""
+        if key == "id":
+            return self.id
+        if key == "name":
+            return self.name
+        if key in CATEGORICAL_FIELDS:
+            code = self._codes[CATEGORICAL_FIELDS.index(key)]
+            return _ABSENT if code < 0 else self._pool.categories[key].decode(code)
+        if key == "created_date":
+            return self.created_date
+        if key == "budget":
+            return _ABSENT if self._budget is _ABSENT else self._budget.thaw()
+        if key == "targeting":
+            return _ABSENT if self._targeting is _ABSENT else self._targeting.thaw()
+        if key == "daily_performance":
+            return self._daily_performance()
+        if key == "insights":
+            return self._insights
+        if self._extra is not None:
+            return self._extra.get(key, _ABSENT)
+        return _ABSENT
+    
+    def _daily_performance(self) -> Dict[str, Dict[str, Any]]:
+        """Date -> metrics dict rebuilt from the columnar metrics store"""
+        store = self._pool.metrics_store
+        if store is None:
+            return {}
+        rows = store.campaign_slice(self.id)
+        dates = store.dates[rows]
+        return {str(date): store.row_metrics(row) for date, row in zip(dates, range(rows.start, rows.stop))}
+    
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup(key)
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+    
+    def __contains__(self, key) -> bool:
+        if key == "daily_performance":
+            return True
+        if key == "budget":
+            return self._budget is not _ABSENT
+        if key == "targeting":
+            return self._targeting is not _ABSENT
+        return self._lookup(key) is not _ABSENT
+    
+    def __iter__(self) -> Iterator[str]:
+        for key in FIELD_ORDER:
+            if key in self:
+                yield key
+        if self._extra is not None:
+            yield from self._extra
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def __repr__(self) -> str:
+        return f"CampaignRecord(id={self.id!r}, name={self.name!r})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict copy of the campaign"""
+        return {key: self[key] for key in self}
+
+
+def to_records(campaigns: List[Dict[str, Any]], pool: CampaignRecordPool) -> List[CampaignRecord]:
+    """Convert campaign dicts to compact records sharing one pool"""
+    return [CampaignRecord(campaign, pool) for campaign in campaigns]
+
+
+def deep_sizeof(obj: Any, seen: set = None) -> int:
+    """Approximate resident bytes of an object graph, counting shared objects once"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    elif hasattr(obj, "__slots__"):
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                # The shared pool is measured once by the caller
+                if slot == "_pool" or not hasattr(obj, slot):
+                    continue
+                size += deep_sizeof(getattr(obj, slot), seen)
+    return size
@@ -0,0 +1,431 @@
+"""
+Columnar metrics store for campaign daily performance
+Keeps per-metric NumPy arrays so dashboards and aggregations avoid per-row dicts
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Optional
+
+# Metrics produced by the converters, in their canonical column order
+DEFAULT_METRICS = [
+    "impressions", "clicks", "spend", "conversions", "ctr",
+    "cpm", "cpc", "roas", "frequency", "reach"
+]
+
+# Count metrics are exposed as integers when a column has no gaps
+COUNT_METRICS = {"impressions", "clicks", "conversions", "reach"}
+
+# Campaign positions are packed above the day number so one sorted key covers all rows
+_KEY_SHIFT = np.int64(1) << 32
+
+def campaign_metric_names(campaigns: List[Dict]) -> List[str]:
+    """DEFAULT_METRICS followed by any other metrics in the campaigns' daily rows, in first-seen order"""
+    names = dict.fromkeys(DEFAULT_METRICS)
+    for campaign in campaigns:
+        for metrics in campaign.get("daily_performance", {}).values():
+            names.update(dict.fromkeys(metrics))
+    return list(names)
+
+def sum_by_date(dates: np.ndarray, values: np.ndarray):
+    """Distinct sorted dates and the per-date sum of each metric row (NaN counted as 0)"""
+    day_dates, inverse = np.unique(dates, return_inverse=True)
+    sums = [np.bincount(inverse, weights=np.where(np.isnan(row), 0, row), minlength=len(day_dates)) for row in values]
+    return day_dates, np.array(sums, dtype=np.float64).reshape(len(values), len(day_dates))
+
+def _row_keys(row_campaign: np.ndarray, row_date: np.ndarray) -> np.ndarray:
+    """One sortable int64 key per row: campaign position above the day number"""
+    return row_campaign.astype(np.int64) * _KEY_SHIFT + row_date.astype(np.int64)
+
+class CampaignMetricsStore:
+    """Columnar store: sorted date array, per-metric float arrays and per-campaign offsets"""
+    
+    def __init__(self, metric_names: Optional[List[str]] = None):
+        self.metric_names = list(metric_names or DEFAULT_METRICS)
+        self.campaign_ids: List[str] = []
+        self.version = 0
+        self._positions: Dict[str, int] = {}
+        self._metric_index = {name: i for i, name in enumerate(self.metric_names)}
+        
+        # Finalized columns (rows ordered by campaign position, then date)
+        self._row_campaign = np.empty(0, dtype=np.int32)
+        self._row_date = np.empty(0, dtype="datetime64[D]")
+        self._values = np.empty((len(self.metric_names), 0), dtype=np.float64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._totals = np.zeros(len(self.metric_names), dtype=np.float64)
+        self._day_dates = np.empty(0, dtype="datetime64[D]")
+        self._day_totals = np.zeros((len(self.metric_names), 0), dtype=np.float64)
+        self._aggregates = None
+        
+        # Rows appended since the last finalize
+        self._pending_campaign: List[int] = []
+        self._pending_date: List[str] = []
+        self._pending_values: List[List[float]] = []
+    
+    @classmethod
+    def from_campaigns(cls, campaigns: List[Dict]) -> "CampaignMetricsStore":
+        """Build a store from campaign dicts with a daily_performance mapping"""
+        store = cls()
+        for campaign in campaigns:
+            store.add_campaign(campaign["id"], campaign.get("daily_performance", {}))
+        store._finalize()
+        return store
+    
+    @classmethod
+    def from_arrays(cls, metric_names: List[str], campaign_ids: List[str], arrays: Dict[str, np.ndarray]) -> "CampaignMetricsStore":
+        """Rebuild a store from finalized column arrays (e.g. memory-mapped from a snapshot)"""
+        store = cls(metric_names)
+        store.campaign_ids = list(campaign_ids)
+        store._positions = {campaign_id: i for i, campaign_id in enumerate(store.campaign_ids)}
+        store._row_campaign = arrays["row_campaign"]
+        store._row_date = arrays["row_date"]
+        store._values = arrays["values"]
+        store._offsets = arrays["offsets"]
+        store._totals = np.nansum(store._values, axis=1)
+        store._day_dates, store._day_totals = sum_by_date(store._row_date, store._values)
+        return store
+    
+    @classmethod
+    def concat(cls, stores: List["CampaignMetricsStore"], prefixes: Optional[List[str]] = None) -> "CampaignMetricsStore":
+        """
+        Store holding the campaigns of several stores, in order
+        
+        Each store's campaign ids get its prefix (if given) and must then be distinct
+        across the stores; metrics missing from a store are NaN for its rows.
+        """
+        metric_names = list(dict.fromkeys(DEFAULT_METRICS + [name for store in stores for name in store.metric_names]))
+        campaign_ids, row_campaign, row_date, values, counts = [], [], [], [], [np.zeros(1, dtype=np.int64)]
+        for store, prefix in zip(stores, prefixes or [""] * len(stores)):
+            store._finalize()
+            part = np.full((len(metric_names), len(store._row_date)), np.nan)
+            part[[metric_names.index(name) for name in store.metric_names]] = store._values
+            row_campaign.append(store._row_campaign + len(campaign_ids))
+            row_date.append(store._row_date)
+            values.append(part)
+            counts.append(np.diff(store._offsets))
+            campaign_ids.extend(prefix + campaign_id for campaign_id in store.campaign_ids)
+        
+        return cls.from_arrays(metric_names, campaign_ids, {
+            "row_campaign": np.concatenate(row_campaign or [np.empty(0, dtype=np.int32)]).astype(np.int32),
+            "row_date": np.concatenate(row_date or [np.empty(0, dtype="datetime64[D]")]),
+            "values": np.concatenate(values, axis=1) if values else np.empty((len(metric_names), 0)),
+            "offsets": np.cumsum(np.concatenate(counts)).astype(np.int64)
+        })
+    
+    def copy(self) -> "CampaignMetricsStore":
+        """
+        Independent store sharing the finalized column arrays
+        
+        Appends never write into existing arrays (finalize builds new ones), so a copy
+        costs one entry per campaign and leaves this store unchanged by later appends.
+        """
+        self._finalize()
+        store = CampaignMetricsStore(self.metric_names)
+        store.campaign_ids = list(self.campaign_ids)
+        store.version = self.version
+        store._positions = dict(self._positions)
+        store._row_campaign = self._row_campaign
+        store._row_date = self._row_date
+        store._values = self._values
+        store._offsets = self._offsets
+        store._totals = self._totals
+        store._day_dates = self._day_dates
+        store._day_totals = self._day_totals
+        return store
+    
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Finalized column arrays for serialization"""
+        self._finalize()
+        return {
+            "row_campaign": self._row_campaign,
+            "row_date": self._row_date,
+            "values": self._values,
+            "offsets": self._offsets
+        }
+    
+    def add_campaign(self, campaign_id: str, daily_performance: Optional[Dict[str, Dict]] = None) -> int:
+        """Register a campaign and queue its daily rows; returns the campaign position"""
+        position = self._positions.get(campaign_id)
+        if position is None:
+            position = len(self.campaign_ids)
+            self._positions[campaign_id] = position
+            self.campaign_ids.append(campaign_id)
+        
+        for date, metrics in (daily_performance or {}).items():
+            self._queue_row(position, date, metrics)
+        
+        self.version += 1
+        return position
+    
+    def _queue_row(self, position: int, date: str, metrics: Dict[str, Any]):
+        """Queue one campaign-day row, growing the metric set if needed"""
+        metric_index = self._metric_index
+        for key in metrics:
+            if key not in metric_index:
+                self._add_metric(key)
+        
+        self._pending_campaign.append(position)
+        self._pending_date.append(date)
+        self._pending_values.append([metrics.get(name, np.nan) for name in self.metric_names])
+    
+    def _add_metric(self, name: str):
+        """Add a metric column discovered in the data"""
+        self._metric_index[name] = len(self.metric_names)
+        self.metric_names.append(name)
+        self._values = np.vstack([self._values, np.full((1, self._values.shape[1]), np.nan)])
+        self._totals = np.append(self._totals, 0.0)
+        self._day_totals = np.vstack([self._day_totals, np.zeros((1, self._day_totals.shape[1]))])
+        for row in self._pending_values:
+            row.append(np.nan)
+    
+    def _finalize(self):
+        """
+        Merge pending rows into the sorted columns and update offsets
+        
+        Only the pending rows are sorted; they are placed by binary search on the
+        (campaign, date) key and inserted in one pass over the columns, so an append
+        costs a linear copy of the columns (which older versions keep sharing)
+        rather than a re-sort of the whole history.
+        """
+        if not self._pending_campaign and len(self._offsets) == len(self.campaign_ids) + 1:
+            return
+        
+        n_metrics = len(self.metric_names)
+        pending_campaign = np.array(self._pending_campaign, dtype=np.int32)
+        pending_date = np.array(self._pending_date, dtype="datetime64[D]")
+        pending_values = np.array(self._pending_values, dtype=np.float64).reshape(-1, n_metrics).T
+        
+        self._pending_campaign = []
+        self._pending_date = []
+        self._pending_values = []
+        
+        # Order pending rows by campaign, then date; a later row for the same campaign-day replaces the earlier one
+        order = np.lexsort((np.arange(len(pending_date)), pending_date, pending_campaign))
+        pending_keys = _row_keys(pending_campaign[order], pending_date[order])
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = pending_keys[:-1] != pending_keys[1:]
+        order, pending_keys = order[last], pending_keys[last]
+        pending_campaign, pending_date, pending_values = pending_campaign[order], pending_date[order], pending_values[:, order]
+        
+        # Pending rows matching a stored campaign-day replace it; the others are inserted in key order
+        keys = _row_keys(self._row_campaign, self._row_date)
+        positions = np.searchsorted(keys, pending_keys)
+        replaces = positions < len(keys)
+        replaces[replaces] = keys[positions[replaces]] == pending_keys[replaces]
+        inserts = ~replaces
+        insert_positions = positions[inserts]
+        
+        row_campaign = np.insert(self._row_campaign, insert_positions, pending_campaign[inserts])
+        row_date = np.insert(self._row_date, insert_positions, pending_date[inserts])
+        values = np.insert(self._values, insert_positions, pending_values[:, inserts], axis=1)
+        
+        # All-time and per-day totals are folded in from the added and replaced rows only
+        added_dates, added_values = pending_date, pending_values
+        if replaces.any():
+            replaced_positions = positions[replaces]
+            replaced_values = self._values[:, replaced_positions]
+            added_dates = np.concatenate([added_dates, pending_date[replaces]])
+            added_values = np.concatenate([added_values, -replaced_values], axis=1)
+            # Rows inserted before a replaced row shift it right
+            replaced_positions = replaced_positions + np.searchsorted(insert_positions, replaced_positions, side="right")
+            values[:, replaced_positions] = pending_values[:, replaces]
+        
+        self._totals = self._totals + np.nansum(added_values, axis=1)
+        added_dates, added_totals = sum_by_date(added_dates, added_values)
+        self._day_dates, self._day_totals = sum_by_date(
+            np.concatenate([self._day_dates, added_dates]),
+            np.concatenate([self._day_totals, added_totals], axis=1)
+        )
+        
+        counts = np.zeros(len(self.campaign_ids), dtype=np.int64)
+        counts[:len(self._offsets) - 1] = np.diff(self._offsets)
+        counts += np.bincount(pending_campaign[inserts], minlength=len(self.campaign_ids))
+        self._row_campaign = row_campaign
+        self._row_date = row_date
+        self._values = values
+        self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    
+    # Read accessors
+    def __len__(self) -> int:
+        self._finalize()
+        return len(self._row_date)
+    
+    def has_campaign(self, campaign_id: str) -> bool:
+        """Check if a campaign is registered"""
+        return campaign_id in self._positions
+    
+    def position(self, campaign_id: str) -> int:
+        """Get the position of a campaign, or -1 if unknown"""
+        return self._positions.get(campaign_id, -1)
+    
+    @property
+    def dates(self) -> np.ndarray:
+        """Row dates as datetime64[D], sorted within each campaign"""
+        self._finalize()
+        return self._row_date
+    
+    @property
+    def row_campaign(self) -> np.ndarray:
+        """Campaign position of each row"""
+        self._finalize()
+        return self._row_campaign
+    
+    @property
+    def offsets(self) -> np.ndarray:
+        """Row offsets per campaign position (length = campaigns + 1)"""
+        self._finalize()
+        return self._offsets
+    
+    def column(self, metric: str) -> np.ndarray:
+        """Read-only view of one metric across all rows"""
+        self._finalize()
+        index = self._metric_index.get(metric)
+        if index is None:
+            return np.full(len(self._row_date), np.nan)
+        view = self._values[index]
+        view.flags.writeable = False
+        return view
+    
+    def campaign_slice(self, campaign_id: str) -> slice:
+        """Row slice covering one campaign's history"""
+        self._finalize()
+        position = self._positions.get(campaign_id)
+        if position is None:
+            return slice(0, 0)
+        return slice(int(self._offsets[position]), int(self._offsets[position + 1]))
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the finalized column arrays"""
+        self._finalize()
+        return self._row_campaign.nbytes + self._row_date.nbytes + self._values.nbytes + self._offsets.nbytes
+    
+    @property
+    def totals(self) -> np.ndarray:
+        """All-time sum of every metric, in metric_names order"""
+        self._finalize()
+        return self._totals
+    
+    @property
+    def daily_totals(self):
+        """Distinct row dates (sorted) and the metric sums of each, shaped (metrics, dates)"""
+        self._finalize()
+        return self._day_dates, self._day_totals
+    
+    @property
+    def aggregates(self) -> "PerformanceAggregates":
+        """Materialized performance aggregates for this store"""
+        if self._aggregates is None:
+            self._aggregates = PerformanceAggregates(self)
+        return self._aggregates
+    
+    def range_slice(self, campaign_id: str, start=None, end=None) -> slice:
+        """Row slice of one campaign between two dates (inclusive), found by binary search"""
+        rows = self.campaign_slice(campaign_id)
+        dates = self._row_date[rows]
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(end, "D"), side="right"))
+        return slice(rows.start + lo, rows.start + max(lo, hi))
+    
+    def latest_rows(self) -> np.ndarray:
+        """Row index of the latest day for every campaign (-1 when a campaign has no rows)"""
+        offsets = self.offsets
+        ends = offsets[1:] - 1
+        return np.where(offsets[1:] > offsets[:-1], ends, -1)
+    
+    def row_metrics(self, row: int) -> Dict[str, Any]:
+        """Metrics for a single row as a dict"""
+        self._finalize()
+        metrics = {}
+        for i, name in enumerate(self.metric_names):
+            value = self._values[i, row]
+            if np.isnan(value):
+                continue
+            metrics[name] = int(value) if name in COUNT_METRICS else float(value)
+        return metrics
+    
+    def metric_frame(self, rows, metrics: Optional[List[str]] = None, drop_empty: bool = False,
+                     downcast: bool = False) -> pd.DataFrame:
+        """
+        DataFrame of dates and metric columns for a slice or index array of rows
+        
+        With downcast, metrics are float32 and gap-free count metrics int32.
+        """
+        self._finalize()
+        names = metrics or self.metric_names
+        float_type, int_type = (np.float32, np.int32) if downcast else (np.float64, np.int64)
+        data = {"date": self._row_date[rows].astype("datetime64[ns]")}
+        for name in names:
+            column = self.column(name)[rows]
+            if drop_empty and np.isnan(column).all():
+                continue
+            if name in COUNT_METRICS and not np.isnan(column).any():
+                column = column.astype(int_type)
+            elif downcast:
+                column = column.astype(float_type)
+            data[name] = column
+        return pd.DataFrame(data)
+
+
+class PerformanceAggregates:
+    """Totals per time window, refreshed once per store version so reads are O(1)"""
+    
+    WINDOWS = {"latest": None, "7d": 7, "30d": 30, "all": None}
+    
+    def __init__(self, store: CampaignMetricsStore):
+        self.store = store
+        self._version = None
+        self._windows: Dict[str, Dict[str, Any]] = {}
+        self.latest_rows = np.empty(0, dtype=np.int64)
+        self.as_of_date = None
+    
+    def refresh(self):
+        """
+        Recompute window totals if the store changed since the last read
+        
+        Day windows are summed from the store's per-day totals, which appends update
+        incrementally, so a refresh costs O(days + campaigns) rather than O(rows).
+        """
+        store = self.store
+        if self._version == store.version and self._windows:
+            return
+        
+        totals = store.totals
+        day_dates, day_totals = store.daily_totals
+        latest_rows = store.latest_rows()
+        self.latest_rows = latest_rows
+        present = latest_rows[latest_rows >= 0]
+        self.as_of_date = str(day_dates[-1]) if len(day_dates) else None
+        
+        self._windows = {
+            "all": self._pack(totals, day_dates),
+            "latest": self._pack(np.nansum(store._values[:, present], axis=1), store._row_date[present])
+        }
+        for window, days in self.WINDOWS.items():
+            if days is None:
+                continue
+            if len(day_dates):
+                in_window = day_dates > day_dates[-1] - np.timedelta64(days, "D")
+            else:
+                in_window = np.zeros(0, dtype=bool)
+            self._windows[window] = self._pack(day_totals[:, in_window].sum(axis=1), day_dates[in_window])
+        
+        self._version = store.version
+    
+    def _pack(self, sums: np.ndarray, dates: np.ndarray) -> Dict[str, Any]:
+        """Metric totals plus the date range they cover"""
+        totals = {}
+        for name, value in zip(self.store.metric_names, sums):
+            totals[name] = int(value) if name in COUNT_METRICS else float(value)
+        return {
+            "totals": totals,
+            "start_date": str(dates.min()) if len(dates) else None,
+            "end_date": self.as_of_date
+        }
+    
+    def window(self, window: str = "latest") -> Dict[str, Any]:
+        """Totals and date range for a window: latest, 7d, 30d or all"""
+        if window not in self.WINDOWS:
+            raise ValueError(f"Unknown window '{window}'. Use one of: {', '.join(self.WINDOWS)}")
+        self.refresh()
+        return self._windows[window]
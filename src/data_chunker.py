@@ -3,33 +3,79 @@ Data chunking utilities for RAG system
 Converts campaign data into meaningful text chunks for vector embeddings
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
+from contextlib import nullcontext
 from datetime import datetime
+from itertools import islice
 import json
+import pandas as pd
+
+def batched(items: Iterable, batch_size: int) -> Iterator[List]:
+    """Consecutive lists of up to batch_size items"""
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
 
 class CampaignDataChunker:
     """Convert campaign data into text chunks for RAG system"""
     
-    def __init__(self, campaigns_data: Dict):
-        self.campaigns_data = campaigns_data
+    def __init__(self, campaigns_data: Dict, loader=None):
+        self._campaigns_data = campaigns_data
+        self.loader = loader  # Optional CampaignDataLoader for columnar lookups
         self.chunks = []
     
+    @property
+    def campaigns_data(self) -> Dict:
+        """The loader's campaign data as of this call (so ingested days are seen), else the dict given"""
+        if self.loader is not None:
+            return self.loader.campaigns_data
+        return self._campaigns_data
+    
+    def _pin(self):
+        """Read one loader version for the duration of a with-block"""
+        return self.loader.pin() if self.loader is not None else nullcontext()
+    
     def create_all_chunks(self) -> List[Dict[str, Any]]:
         """Create all types of chunks from campaign data"""
-        self.chunks = []
-        
-        # Create different types of chunks
-        self.create_campaign_overview_chunks()
-        self.create_daily_performance_chunks()
-        self.create_insights_chunks()
-        self.create_comparison_chunks()
-        self.create_global_insights_chunks()
+        self.chunks = list(self.iter_chunks())
         
         print(f"✅ Created {len(self.chunks)} text chunks for RAG")
         return self.chunks
     
+    def iter_chunks(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield all types of chunks lazily, in the same order as create_all_chunks
+        
+        Nothing is kept in self.chunks, so a consumer that embeds and indexes
+        chunks as they arrive holds only what it buffers itself. Campaign bodies
+        are read one campaign at a time, which keeps lazy loaders lazy. With a
+        loader, the whole pass reads the version that was current when it started.
+        """
+        with self._pin():
+            yield from self._overview_chunks()
+            yield from self._daily_performance_chunks()
+            yield from self._insights_chunks()
+            yield from self._comparison_chunks()
+            yield from self._trend_chunks()
+            yield from self._anomaly_chunks()
+            yield from self._global_insights_chunks()
+    
+    def iter_chunk_batches(self, batch_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        """iter_chunks() grouped into lists of up to batch_size chunks"""
+        return batched(self.iter_chunks(), batch_size)
+    
     def create_campaign_overview_chunks(self):
         """Create overview chunks for each campaign"""
+        self.chunks.extend(self._overview_chunks())
+    
+    def _overview_chunks(self) -> Iterator[Dict[str, Any]]:
+        """Overview chunk of each campaign"""
         campaigns = self.campaigns_data.get("campaigns", [])
         
         for campaign in campaigns:
@@ -49,39 +95,106 @@ class CampaignDataChunker:
                     "objective": campaign.get("objective")
                 }
             }
-            self.chunks.append(chunk)
+            yield chunk
     
     def create_daily_performance_chunks(self):
         """Create performance chunks for each day"""
+        self.chunks.extend(self._daily_performance_chunks())
+    
+    def _daily_performance_chunks(self) -> Iterator[Dict[str, Any]]:
+        """Performance chunk of each campaign-day"""
         campaigns = self.campaigns_data.get("campaigns", [])
         
         for campaign in campaigns:
             daily_perf = campaign.get("daily_performance", {})
             
             for date, metrics in daily_perf.items():
-                perf_text = self._format_daily_performance(campaign, date, metrics)
-                
-                chunk = {
-                    "id": f"daily_{campaign['id']}_{date}",
-                    "content": perf_text,
-                    "metadata": {
-                        "campaign_id": campaign["id"],
-                        "campaign_name": campaign["name"],
-                        "chunk_type": "daily_performance",
-                        "date": date,
-                        "industry": campaign.get("industry"),
-                        "audience": campaign.get("audience"),
-                        "metrics": list(metrics.keys()),
-                        "spend": metrics.get("spend"),
-                        "roas": metrics.get("roas"),
-                        "cpm": metrics.get("cpm"),
-                        "ctr": metrics.get("ctr")
-                    }
-                }
+                yield self._daily_performance_chunk(campaign, date, metrics)
+    
+    def _daily_performance_chunk(self, campaign: Dict, date: str, metrics: Dict) -> Dict[str, Any]:
+        """Build the chunk for one campaign-day"""
+        return {
+            "id": f"daily_{campaign['id']}_{date}",
+            "content": self._format_daily_performance(campaign, date, metrics),
+            "metadata": {
+                "campaign_id": campaign["id"],
+                "campaign_name": campaign["name"],
+                "chunk_type": "daily_performance",
+                "date": date,
+                "industry": campaign.get("industry"),
+                "audience": campaign.get("audience"),
+                "metrics": list(metrics.keys()),
+                "spend": metrics.get("spend"),
+                "roas": metrics.get("roas"),
+                "cpm": metrics.get("cpm"),
+                "ctr": metrics.get("ctr")
+            }
+        }
+    
+    def create_incremental_chunks(self, campaign_days: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Create chunks for newly ingested (campaign_id, date) pairs only
+        
+        Returns daily_performance chunks for those days plus refreshed trend,
+        anomaly and industry comparison chunks for the campaigns they touch, and
+        replaces same-id chunks in self.chunks.
+        """
+        with self._pin():
+            if self.loader is not None:
+                lookup = self.loader.get_campaign_by_id
+            else:
+                by_id = {c["id"]: c for c in self.campaigns_data.get("campaigns", [])}
+                lookup = lambda campaign_id: by_id.get(campaign_id, {})
+            
+            new_chunks = []
+            touched = {}
+            for campaign_id, date in campaign_days:
+                campaign = touched.get(campaign_id) or lookup(campaign_id)
+                metrics = campaign.get("daily_performance", {}).get(date) if campaign else None
+                if not metrics:
+                    continue
+                touched[campaign_id] = campaign
+                new_chunks.append(self._daily_performance_chunk(campaign, date, metrics))
+            
+            if self.loader is not None and touched:
+                trends = self.loader.get_latest_trends(list(touched))
+                for campaign_id, campaign in touched.items():
+                    if trends.get(campaign_id):
+                        new_chunks.append(self._trend_chunk(campaign, trends[campaign_id]))
+                    records = self.loader.get_anomalies(campaign_id=campaign_id)
+                    if records:
+                        new_chunks.append(self._anomaly_chunk(campaign, records))
+            
+            industries = {campaign.get("industry", "Unknown") for campaign in touched.values()}
+            for industry in industries:
+                industry_campaigns = self._industry_campaigns(industry)
+                if len(industry_campaigns) > 1:
+                    new_chunks.append(self._comparison_chunk(industry, industry_campaigns))
+        
+        positions = {chunk["id"]: i for i, chunk in enumerate(self.chunks)}
+        for chunk in new_chunks:
+            if chunk["id"] in positions:
+                self.chunks[positions[chunk["id"]]] = chunk
+            else:
+                positions[chunk["id"]] = len(self.chunks)
                 self.chunks.append(chunk)
+        
+        return new_chunks
+    
+    def _industry_campaigns(self, industry: str) -> List[Dict]:
+        """Campaigns of one industry, looked up in the loader's industry index when there is one"""
+        if self.loader is not None and industry != "Unknown":
+            candidates = self.loader.get_campaigns_by_industry(industry)
+        else:
+            candidates = self.campaigns_data.get("campaigns", [])
+        return [c for c in candidates if c.get("industry", "Unknown") == industry]
     
     def create_insights_chunks(self):
         """Create chunks for campaign insights and recommendations"""
+        self.chunks.extend(self._insights_chunks())
+    
+    def _insights_chunks(self) -> Iterator[Dict[str, Any]]:
+        """Insights chunk of each campaign that has insights"""
         campaigns = self.campaigns_data.get("campaigns", [])
         
         for campaign in campaigns:
@@ -103,10 +216,14 @@ class CampaignDataChunker:
                     "insights_keys": list(insights.keys())
                 }
             }
-            self.chunks.append(chunk)
+            yield chunk
     
     def create_comparison_chunks(self):
         """Create chunks that compare campaigns"""
+        self.chunks.extend(self._comparison_chunks())
+    
+    def _comparison_chunks(self) -> Iterator[Dict[str, Any]]:
+        """Comparison chunk of each industry with more than one campaign"""
         campaigns = self.campaigns_data.get("campaigns", [])
         
         # Group campaigns by industry for comparison
@@ -120,23 +237,97 @@ class CampaignDataChunker:
         # Create comparison chunks for each industry
         for industry, industry_campaigns in by_industry.items():
             if len(industry_campaigns) > 1:
-                comparison_text = self._format_industry_comparison(industry, industry_campaigns)
-                
-                chunk = {
-                    "id": f"comparison_{industry.lower().replace(' ', '_')}",
-                    "content": comparison_text,
-                    "metadata": {
-                        "chunk_type": "industry_comparison",
-                        "industry": industry,
-                        "campaign_count": len(industry_campaigns),
-                        "campaign_ids": [c["id"] for c in industry_campaigns],
-                        "campaign_names": [c["name"] for c in industry_campaigns]
-                    }
-                }
-                self.chunks.append(chunk)
+                yield self._comparison_chunk(industry, industry_campaigns)
+    
+    def _comparison_chunk(self, industry: str, industry_campaigns: List[Dict]) -> Dict[str, Any]:
+        """Build the comparison chunk for one industry"""
+        return {
+            "id": f"comparison_{industry.lower().replace(' ', '_')}",
+            "content": self._format_industry_comparison(industry, industry_campaigns),
+            "metadata": {
+                "chunk_type": "industry_comparison",
+                "industry": industry,
+                "campaign_count": len(industry_campaigns),
+                "campaign_ids": [c["id"] for c in industry_campaigns],
+                "campaign_names": [c["name"] for c in industry_campaigns]
+            }
+        }
+    
+    def create_trend_chunks(self):
+        """Create rolling-trend chunks for each campaign (requires a loader)"""
+        self.chunks.extend(self._trend_chunks())
+    
+    def _trend_chunks(self) -> Iterator[Dict[str, Any]]:
+        """Rolling-trend chunk of each campaign with trend data"""
+        if self.loader is None:
+            return
+        
+        trends = self.loader.get_latest_trends()
+        campaigns = self.campaigns_data.get("campaigns", [])
+        
+        for campaign in campaigns:
+            trend = trends.get(campaign["id"])
+            if not trend:
+                continue
+            yield self._trend_chunk(campaign, trend)
+    
+    def _trend_chunk(self, campaign: Dict, trend: Dict) -> Dict[str, Any]:
+        """Build the rolling-trend chunk for one campaign"""
+        return {
+            "id": f"trends_{campaign['id']}",
+            "content": self._format_campaign_trends(campaign, trend),
+            "metadata": {
+                "campaign_id": campaign["id"],
+                "campaign_name": campaign["name"],
+                "chunk_type": "campaign_trends",
+                "date": trend["date"],
+                "industry": campaign.get("industry"),
+                "audience": campaign.get("audience")
+            }
+        }
+    
+    def create_anomaly_chunks(self, max_per_campaign: int = 10):
+        """Create chunks of statistically detected anomalies per campaign (requires a loader)"""
+        self.chunks.extend(self._anomaly_chunks(max_per_campaign))
+    
+    def _anomaly_chunks(self, max_per_campaign: int = 10) -> Iterator[Dict[str, Any]]:
+        """Detected-anomalies chunk of each campaign with anomalies"""
+        if self.loader is None:
+            return
+        
+        by_campaign = {}
+        for record in self.loader.get_anomalies():
+            by_campaign.setdefault(record["campaign_id"], []).append(record)
+        
+        for campaign in self.campaigns_data.get("campaigns", []):
+            records = by_campaign.get(campaign["id"])
+            if not records:
+                continue
+            yield self._anomaly_chunk(campaign, records, max_per_campaign)
+    
+    def _anomaly_chunk(self, campaign: Dict, records: List[Dict], max_per_campaign: int = 10) -> Dict[str, Any]:
+        """Build the detected-anomalies chunk for one campaign"""
+        return {
+            "id": f"anomalies_{campaign['id']}",
+            "content": self._format_detected_anomalies(campaign, records, max_per_campaign),
+            "metadata": {
+                "campaign_id": campaign["id"],
+                "campaign_name": campaign["name"],
+                "chunk_type": "detected_anomalies",
+                "industry": campaign.get("industry"),
+                "audience": campaign.get("audience"),
+                "anomaly_count": len(records),
+                "metrics": sorted({r["metric"] for r in records}),
+                "latest_date": max(r["date"] for r in records)
+            }
+        }
     
     def create_global_insights_chunks(self):
         """Create chunks for global market insights"""
+        self.chunks.extend(self._global_insights_chunks())
+    
+    def _global_insights_chunks(self) -> Iterator[Dict[str, Any]]:
+        """Market trends, best practices and anomalies chunks from global insights"""
         global_insights = self.campaigns_data.get("global_insights", {})
         
         if not global_insights:
@@ -153,7 +344,7 @@ class CampaignDataChunker:
                     "data_type": "global_insights"
                 }
             }
-            self.chunks.append(chunk)
+            yield chunk
         
         # Best practices chunk
         if "best_practices" in global_insights:
@@ -166,7 +357,7 @@ class CampaignDataChunker:
                     "data_type": "global_insights"
                 }
             }
-            self.chunks.append(chunk)
+            yield chunk
         
         # Anomalies chunk
         if "anomalies_detected" in global_insights:
@@ -179,7 +370,7 @@ class CampaignDataChunker:
                     "data_type": "global_insights"
                 }
             }
-            self.chunks.append(chunk)
+            yield chunk
     
     # Formatting methods
     def _format_campaign_overview(self, campaign: Dict) -> str:
@@ -251,10 +442,8 @@ class CampaignDataChunker:
             status = campaign["status"]
             
             # Get latest performance
-            daily_perf = campaign.get("daily_performance", {})
-            if daily_perf:
-                latest_date = max(daily_perf.keys())
-                latest_perf = daily_perf[latest_date]
+            latest_perf = self._get_latest_performance(campaign)
+            if latest_perf:
                 roas = latest_perf.get("roas", 0)
                 cpm = latest_perf.get("cpm", 0)
                 
@@ -262,6 +451,61 @@ class CampaignDataChunker:
         
         return text
     
+    def _format_campaign_trends(self, campaign: Dict, trend: Dict) -> str:
+        """Format rolling averages and period-over-period changes as natural text"""
+        text = f"Performance trends for '{campaign['name']}' as of {trend['date']}: "
+        
+        for metric in ("roas", "cpm", "ctr", "cpc"):
+            ma7 = trend.get(f"{metric}_ma7")
+            ma30 = trend.get(f"{metric}_ma30")
+            if ma7 is None or pd.isna(ma7):
+                continue
+            
+            text += f"{metric.upper()} 7-day average is {ma7:.2f}"
+            if ma30 is not None and not pd.isna(ma30):
+                text += f" vs 30-day average {ma30:.2f}"
+            
+            changes = []
+            for suffix, label in (("dod_pct", "day-over-day"), ("wow_pct", "week-over-week"), ("mom_pct", "month-over-month")):
+                change = trend.get(f"{metric}_{suffix}")
+                if change is not None and not pd.isna(change):
+                    changes.append(f"{change:+.1f}% {label}")
+            if changes:
+                text += f" ({', '.join(changes)})"
+            text += ". "
+        
+        return text
+    
+    def _format_detected_anomalies(self, campaign: Dict, records: List[Dict], limit: int) -> str:
+        """Format the strongest detected anomalies of a campaign as natural text"""
+        # Merge detections of the same metric and day by different methods
+        events = {}
+        for record in records:
+            key = (record["date"], record["metric"])
+            event = events.setdefault(key, dict(record, methods=[]))
+            event["methods"].append(record["method"])
+        
+        strongest = sorted(events.values(), key=lambda e: abs(e["magnitude"] or 0), reverse=True)[:limit]
+        text = f"Detected anomalies for '{campaign['name']}': "
+        for event in sorted(strongest, key=lambda e: e["date"]):
+            text += (f"{event['metric'].upper()} {event['direction']} on {event['date']}: "
+                     f"{event['value']:.2f} vs baseline {event['baseline']:.2f}")
+            if event["magnitude"] is not None:
+                text += f" ({event['magnitude']:+.1f}%)"
+            text += f" [{', '.join(event['methods'])}]. "
+        
+        return text
+    
+    def _get_latest_performance(self, campaign: Dict) -> Dict:
+        """Get latest day metrics, via the loader's columnar store when available"""
+        if self.loader is not None:
+            return self.loader.get_latest_performance(campaign["id"])
+        
+        daily_perf = campaign.get("daily_performance", {})
+        if not daily_perf:
+            return {}
+        return daily_perf[max(daily_perf.keys())]
+    
     def _format_market_trends(self, trends: Dict) -> str:
         """Format market trends as natural text"""
         text = "Market trends and analysis: "
@@ -311,7 +555,7 @@ if __name__ == "__main__":
     
     # Load data and create chunks
     loader = CampaignDataLoader()
-    chunker = CampaignDataChunker(loader.campaigns_data)
+    chunker = CampaignDataChunker(loader.campaigns_data, loader=loader)
     chunks = chunker.create_all_chunks()
     
     print(f"\n📝 Chunk Types:")
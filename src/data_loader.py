@@ -2,30 +2,124 @@
 Data loading utilities for Meta Ads RAG Demo
 """
 
+import functools
 import json
+import pickle
+import sqlite3
+import threading
+import time
+import numpy as np
 import pandas as pd
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union
 import os
 
+from campaign_store import CampaignMetricsStore, COUNT_METRICS
+from campaign_index import CampaignIndex
+from json_stream import iter_campaigns_json, iter_campaigns_json_spans, read_json_span
+from lazy_campaigns import LAZY_FIELDS, CampaignBodyCache, LazyCampaign
+from snapshot_cache import SnapshotCache, source_fingerprint
+from search_index import CampaignSearchIndex
+from account_loader import resolve_data_files, load_accounts
+from campaign_records import CampaignRecord, CampaignRecordPool, to_records, deep_sizeof
+from metric_windows import RollingMetricsEngine
+from anomaly_detector import AnomalyDetector
+from sqlite_store import SQLiteCampaignStore, SUM_METRICS
+from parquet_store import ParquetCampaignStore, is_parquet_dataset
+from loader_versions import LoaderState, VersionRegistry
+from audience_facts import AudienceFactTable, ad_facts_path
+
+def _state_field(name: str) -> property:
+    """Loader attribute stored on the version the calling thread reads from"""
+    def get(self):
+        return getattr(self._state(), name)
+    
+    def set(self, value):
+        setattr(self._state(), name, value)
+    
+    return property(get, set)
+
+
+def _pinned(method):
+    """Run a read accessor against a single version so a concurrent publish cannot mix two"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.pin():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class CampaignDataLoader:
     """Load and process campaign data for RAG system"""
     
-    def __init__(self, data_source: str = "auto", data_path: str = None):
+    # Per-version state; see pin()
+    campaigns_data = _state_field("campaigns_data")
+    index = _state_field("index")
+    search_index = _state_field("search_index")
+    metrics_store = _state_field("metrics_store")
+    record_pool = _state_field("record_pool")
+    campaign_bodies = _state_field("campaign_bodies")
+    sql_store = _state_field("sql_store")
+    parquet_store = _state_field("parquet_store")
+    _parquet_insights = _state_field("parquet_insights")
+    _body_offsets = _state_field("body_offsets")
+    _analytics_version = _state_field("analytics_version")
+    _performance_df_cache = _state_field("performance_df_cache")
+    _rolling_engine = _state_field("rolling_engine")
+    _anomaly_detector = _state_field("anomaly_detector")
+    _audience_facts = _state_field("audience_facts")
+    
+    def __init__(self, data_source: str = "auto", data_path: str = None, streaming: bool = False,
+                 use_snapshot: bool = False, snapshot_dir: Optional[str] = None,
+                 lazy: bool = False, lazy_cache_size: int = 128, load_workers: Optional[int] = None,
+                 compact: bool = False, sqlite_pool_size: int = 4, metrics: Optional[List[str]] = None,
+                 date_range: Optional[Tuple[Optional[str], Optional[str]]] = None):
         """
         Initialize data loader with data source selection
         
         Args:
-            data_source: "demo", "real", or "auto" (checks environment)
-            data_path: Custom path to data file (overrides data_source)
+            data_source: "demo", "real", "sqlite", "parquet", or "auto" (checks environment)
+            data_path: Custom path to data file (overrides data_source); a directory or glob
+                loads one file per ad account in parallel and merges them
+            streaming: Parse campaigns one at a time instead of loading the whole document
+            use_snapshot: Reuse a binary snapshot of the parsed data when the source file is unchanged
+            snapshot_dir: Directory for snapshots (defaults to a per-user cache directory)
+            lazy: Keep only campaign headers resident; decode daily_performance and insights on demand
+            lazy_cache_size: Number of decoded campaign bodies kept in the LRU in lazy mode
+            load_workers: Worker processes for multi-account loading (defaults to CPU count)
+            compact: Store campaigns as __slots__ records with dictionary-encoded categoricals;
+                daily_performance is served from the metrics store
+            sqlite_pool_size: Pooled connections per loader for the SQLite backend
+            metrics: Parquet only - metric columns to read (all if None)
+            date_range: Parquet only - inclusive (start, end) dates to read; month partitions
+                outside the range are skipped
         """
+        self.sqlite = (data_source == "sqlite" or (data_source == "auto" and os.getenv("DATA_SOURCE") == "sqlite")
+                       or str(data_path or "").endswith((".db", ".sqlite")))
         if data_path:
             self.data_path = data_path
         else:
             self.data_path = self._get_data_path(data_source)
         
         self.data_source = data_source
-        self.campaigns_data = None
+        self.parquet = (data_source == "parquet" or (data_source == "auto" and os.getenv("DATA_SOURCE") == "parquet")
+                        or is_parquet_dataset(self.data_path))
+        self.metrics = metrics
+        self.date_range = date_range or (None, None)
+        self.data_files = resolve_data_files(self.data_path)
+        self.load_workers = load_workers
+        self.streaming = streaming
+        self.use_snapshot = use_snapshot
+        self.snapshot_cache = SnapshotCache(snapshot_dir) if use_snapshot else None
+        self.lazy = lazy
+        self.compact = compact and not lazy and not self.sqlite and not self.parquet
+        self.lazy_cache_size = lazy_cache_size
+        self.sqlite_pool_size = sqlite_pool_size
+        self.load_stats = {}
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self.versions = VersionRegistry(self._new_state(), on_reclaim=self._reclaim_state)
         self.load_data()
     
     def _get_data_path(self, data_source: str) -> str:
@@ -34,13 +128,186 @@ class CampaignDataLoader:
             # Check environment variable, default to demo
             data_source = os.getenv("DATA_SOURCE", "demo")
         
-        if data_source == "real":
+        if data_source == "sqlite":
+            return "data/campaigns.db"
+        elif data_source == "parquet":
+            return "data/real/parquet"
+        elif data_source == "real":
             return "data/real/campaigns.json"
         else:  # demo or fallback
             return "data/demo/campaigns.json"
     
     def load_data(self):
-        """Load campaign data from JSON file"""
+        """
+        Load campaign data from JSON file, or from a snapshot when the file is unchanged
+        
+        The data is loaded into a new version and published in one swap; readers keep
+        answering from the previous version until then.
+        """
+        with self._write_lock:
+            state = self._new_state()
+            with self._using(state):
+                self._load_version()
+            self.versions.publish(state)
+    
+    def _load_version(self):
+        """Load into the version being built"""
+        started = time.perf_counter()
+        fingerprint = None
+        
+        if self.sqlite:
+            self._load_sqlite()
+            self._finish_load()
+            self._record_load_stats("sqlite", started)
+            return
+        if self.parquet:
+            self._load_parquet()
+            self._finish_load()
+            self._record_load_stats("parquet", started)
+            return
+        
+        if self.use_snapshot and not self.lazy and os.path.isfile(self.data_path):
+            fingerprint = source_fingerprint(self.data_path)
+            if self._restore_snapshot(fingerprint):
+                self._finish_load()
+                self._record_load_stats("snapshot", started)
+                return
+        
+        if self.data_files:
+            self._load_accounts()
+        elif self.lazy:
+            self._load_lazy()
+        elif self.streaming:
+            for _ in self._stream_campaigns():
+                pass
+        else:
+            self._load_json()
+        self._finish_load()
+        self._record_load_stats("json", started)
+        
+        if fingerprint and self.get_all_campaigns():
+            self._save_snapshot(fingerprint)
+    
+    def pin(self):
+        """
+        Read from one version for the duration of a with-block
+        
+        Reloads and ingests publish new versions without touching pinned ones, so
+        every read inside the block (in this thread) sees the same data. Versions
+        are reclaimed once they are neither current nor pinned. Accessors pin for
+        their own duration; pin explicitly to keep several calls consistent:
+            
+            with loader.pin():
+                summary = loader.get_performance_summary()
+                df = loader.get_all_performance_df()
+        
+        With the SQLite backend the database itself is shared, so reads served from
+        it (and caches rebuilt from it) see rows committed by any process.
+        """
+        active = getattr(self._local, "state", None)
+        if active is not None:
+            return self._using(active)
+        return self._pin_current()
+    
+    @contextmanager
+    def _pin_current(self) -> Iterator[LoaderState]:
+        """Pin the current version and read from it in this thread"""
+        with self.versions.pin() as state:
+            with self._using(state):
+                yield state
+    
+    @contextmanager
+    def _using(self, state: LoaderState) -> Iterator[LoaderState]:
+        """Route this thread's reads and writes of per-version attributes to state"""
+        previous = getattr(self._local, "state", None)
+        self._local.state = state
+        try:
+            yield state
+        finally:
+            self._local.state = previous
+    
+    def _state(self) -> LoaderState:
+        """Version pinned or being built by this thread, else the current one"""
+        return getattr(self._local, "state", None) or self.versions.current
+    
+    def _new_state(self) -> LoaderState:
+        """Empty version for a (re)load; the search index is copied so it syncs incrementally"""
+        previous = getattr(self, "versions", None)
+        state = LoaderState(
+            campaigns_data={"campaigns": [], "global_insights": {}},
+            index=CampaignIndex(),
+            search_index=previous.current.search_index.copy() if previous else CampaignSearchIndex(),
+            parquet_insights={},
+            body_offsets={}
+        )
+        if self.lazy or self.sqlite or self.parquet:
+            state.campaign_bodies = self._body_cache(state)
+        return state
+    
+    def _body_cache(self, state: LoaderState) -> CampaignBodyCache:
+        """Lazy body cache that decodes bodies from the given version"""
+        def fetch(campaign_id: str) -> Dict[str, Any]:
+            with self._using(state):
+                return self._read_campaign_body(campaign_id)
+        
+        def version():
+            # Other processes can append to the database; bodies decoded before that are stale
+            return state.sql_store.version if state.sql_store is not None else None
+        
+        return CampaignBodyCache(fetch, self.lazy_cache_size, version if self.sqlite else None)
+    
+    def _reclaim_state(self, state: LoaderState):
+        """Release what a retired version does not share with a live one"""
+        live = self.versions.live_states()
+        if state.campaign_bodies is not None and all(s.campaign_bodies is not state.campaign_bodies for s in live):
+            state.campaign_bodies.clear()
+        if state.sql_store is not None and all(s.sql_store is not state.sql_store for s in live):
+            state.sql_store.close()
+    
+    def _finish_load(self):
+        """Warm aggregates and bring the search index in line with the loaded campaigns"""
+        if self.compact:
+            self._compact_campaigns()
+        if self.metrics_store is not None:
+            self.metrics_store.aggregates.refresh()
+        self.load_stats["search_index_changes"] = self.search_index.sync(self.get_all_campaigns())
+    
+    def _compact_campaigns(self):
+        """Replace campaign dicts with compact records backed by the metrics store"""
+        campaigns = self.get_all_campaigns()
+        if campaigns and isinstance(campaigns[0], CampaignRecord):
+            # Records restored from a snapshot keep their pool; reattach the store
+            self.record_pool = campaigns[0]._pool
+            self.record_pool.metrics_store = self.metrics_store
+            return
+        
+        self.record_pool = CampaignRecordPool(self.metrics_store)
+        self.campaigns_data["campaigns"] = to_records(campaigns, self.record_pool)
+        self.index = CampaignIndex.build(self.get_all_campaigns())
+    
+    @_pinned
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """Measure resident memory of campaigns, shared pools and the metrics store"""
+        campaigns = self.get_all_campaigns()
+        seen = set()
+        campaign_bytes = deep_sizeof(campaigns, seen)
+        pool_bytes = deep_sizeof(self.record_pool.categories, seen) if self.record_pool else 0
+        store_bytes = self.metrics_store.nbytes if self.metrics_store is not None else 0
+        total = campaign_bytes + pool_bytes + store_bytes
+        
+        return {
+            "representation": ("sqlite" if self.sqlite else "parquet" if self.parquet else
+                               "compact" if self.compact else "lazy" if self.lazy else "dict"),
+            "total_campaigns": len(campaigns),
+            "campaign_bytes": campaign_bytes,
+            "pool_bytes": pool_bytes,
+            "metrics_store_bytes": store_bytes,
+            "total_bytes": total,
+            "bytes_per_campaign": total / len(campaigns) if campaigns else 0
+        }
+    
+    def _load_json(self):
+        """Parse the whole JSON document and build the store and indexes"""
         try:
             with open(self.data_path, 'r') as f:
                 self.campaigns_data = json.load(f)
@@ -51,6 +318,395 @@ class CampaignDataLoader:
         except json.JSONDecodeError as e:
             print(f"❌ Invalid JSON in data file: {e}")
             self.campaigns_data = {"campaigns": [], "global_insights": {}}
+        
+        self._build_metrics_store()
+        self.index = CampaignIndex.build(self.get_all_campaigns())
+    
+    def _load_accounts(self):
+        """Load one file per ad account in parallel and merge them into one namespace"""
+        self.campaigns_data, self.metrics_store, file_stats = load_accounts(
+            self.data_files, self.load_workers, keep_daily=not self.compact
+        )
+        self.load_stats["files"] = file_stats
+        accounts = sum(1 for stats in file_stats if "error" not in stats and not stats.get("skipped"))
+        print(f"✅ Loaded {len(self.campaigns_data['campaigns'])} campaigns from {accounts} accounts")
+        
+        self.index = CampaignIndex.build(self.get_all_campaigns())
+    
+    def _load_lazy(self):
+        """Scan the JSON file once, keeping headers, metrics columns and byte offsets of each campaign"""
+        self.campaigns_data = {"campaigns": [], "global_insights": {}}
+        self.metrics_store = CampaignMetricsStore()
+        self.index = CampaignIndex()
+        self.campaign_bodies.clear()
+        self._body_offsets = {}
+        campaigns = self.campaigns_data["campaigns"]
+        
+        try:
+            for key, value, start, end in iter_campaigns_json_spans(self.data_path):
+                if key != "campaigns":
+                    self.campaigns_data[key] = value
+                    continue
+                
+                header = {k: v for k, v in value.items() if k not in LAZY_FIELDS}
+                campaign = LazyCampaign(header, self.campaign_bodies)
+                campaigns.append(campaign)
+                self._body_offsets[campaign["id"]] = (start, end)
+                self.metrics_store.add_campaign(campaign["id"], value.get("daily_performance", {}))
+                self.index.add(campaign)
+            print(f"✅ Indexed {len(campaigns)} campaigns (lazy mode)")
+        except FileNotFoundError:
+            print(f"❌ Data file not found: {self.data_path}")
+        except json.JSONDecodeError as e:
+            print(f"❌ Invalid JSON in data file: {e}")
+            self.campaigns_data = {"campaigns": [], "global_insights": {}}
+            self.metrics_store = CampaignMetricsStore()
+            self.index = CampaignIndex()
+            self._body_offsets = {}
+    
+    def _load_sqlite(self):
+        """Open the SQLite database, keeping only campaign headers resident"""
+        self.campaigns_data = {"campaigns": [], "global_insights": {}}
+        self.metrics_store = None
+        self.index = CampaignIndex()
+        self.campaign_bodies.clear()
+        
+        try:
+            self.sql_store = SQLiteCampaignStore(self.data_path, self.sqlite_pool_size)
+            self.campaigns_data = {
+                "campaigns": [LazyCampaign(header, self.campaign_bodies) for header in self.sql_store.headers()],
+                "global_insights": self.sql_store.global_insights()
+            }
+            self.index = CampaignIndex.build(self.get_all_campaigns())
+            print(f"✅ Opened {len(self.get_all_campaigns())} campaigns (SQLite)")
+            return
+        except FileNotFoundError as e:
+            print(f"❌ SQLite store not found: {e.filename} "
+                  f"(build it with: python src/sqlite_store.py <campaigns.json> {e.filename})")
+        except json.JSONDecodeError as e:
+            print(f"❌ Invalid JSON in SQLite store: {e}")
+        except sqlite3.DatabaseError as e:
+            print(f"❌ Could not open SQLite store {self.data_path}: {e}")
+        
+        # Without a usable database the loader serves empty data, like the other sources
+        if self.sql_store is not None:
+            self.sql_store.close()
+        self.sql_store = None
+        self.metrics_store = CampaignMetricsStore()
+        self.campaigns_data = {"campaigns": [], "global_insights": {}}
+        self.index = CampaignIndex()
+    
+    def _load_parquet(self):
+        """Read the campaigns dimension table and the projected, memory-mapped daily fact table"""
+        self.campaigns_data = {"campaigns": [], "global_insights": {}}
+        self.metrics_store = CampaignMetricsStore(self.metrics)
+        self.index = CampaignIndex()
+        self.campaign_bodies.clear()
+        
+        try:
+            self.parquet_store = ParquetCampaignStore(self.data_path)
+            dimension = self.parquet_store.read_campaigns()
+            headers = [json.loads(header) for header in dimension["header_json"]]
+            self._parquet_insights = dict(zip(dimension["id"], dimension["insights_json"]))
+            self.campaigns_data = {
+                "campaigns": [LazyCampaign(header, self.campaign_bodies) for header in headers],
+                "global_insights": self.parquet_store.global_insights()
+            }
+            self.metrics_store = self.parquet_store.to_metrics_store(
+                [header["id"] for header in headers], self.metrics, *self.date_range
+            )
+            self.index = CampaignIndex.build(self.get_all_campaigns())
+            print(f"✅ Loaded {len(headers)} campaigns (Parquet, {len(self.metrics_store)} daily rows)")
+        except ImportError as e:
+            print(f"❌ {e}")
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not read Parquet dataset {self.data_path}: {e}")
+            self.parquet_store = None
+            self._parquet_insights = {}
+    
+    def _cache_lock(self) -> threading.RLock:
+        """Lock guarding the lazily built caches of the version this thread reads"""
+        return self._state().cache_lock
+    
+    def _analytics_store(self) -> CampaignMetricsStore:
+        """In-memory metrics store; with the SQLite backend it is loaded once per database version"""
+        with self._cache_lock():
+            if self.sql_store is not None:
+                store = self.metrics_store
+                version = self.sql_store.version
+                if store is None or self._analytics_version != version:
+                    self.metrics_store = store = self.sql_store.to_metrics_store()
+                    self._analytics_version = version
+                return store
+            if self.metrics_store is None:
+                self.metrics_store = CampaignMetricsStore()
+            return self.metrics_store
+    
+    def _read_campaign_body(self, campaign_id: str) -> Dict[str, Any]:
+        """Decode the lazy fields of one campaign from its byte range in the data file (or SQLite)"""
+        if self.sql_store is not None:
+            return self.sql_store.campaign_body(campaign_id)
+        if self.parquet_store is not None:
+            return self._parquet_campaign_body(campaign_id)
+        
+        span = self._body_offsets.get(campaign_id)
+        if span is None:
+            return {}
+        
+        campaign = read_json_span(self.data_path, *span)
+        if campaign.get("id") != campaign_id:
+            print(f"⚠️ Data file changed since it was indexed; reload to read {campaign_id}")
+            return {}
+        return {k: campaign[k] for k in LAZY_FIELDS if k in campaign}
+    
+    def _parquet_campaign_body(self, campaign_id: str) -> Dict[str, Any]:
+        """daily_performance rebuilt from the metrics store plus the campaign's stored insights"""
+        store = self.metrics_store
+        rows = store.campaign_slice(campaign_id)
+        body = {
+            "daily_performance": {
+                str(store.dates[row]): store.row_metrics(row) for row in range(rows.start, rows.stop)
+            }
+        }
+        insights = self._parquet_insights.get(campaign_id)
+        if insights is not None:
+            body["insights"] = json.loads(insights)
+        return body
+    
+    def _restore_snapshot(self, fingerprint: Dict) -> bool:
+        """Restore parsed data from a matching snapshot"""
+        snapshot = self.snapshot_cache.load(self.data_path, fingerprint, self._snapshot_representation())
+        if snapshot is None:
+            return False
+        
+        self.campaigns_data = snapshot["campaigns_data"]
+        self.index = snapshot["index"]
+        self.metrics_store = CampaignMetricsStore.from_arrays(
+            snapshot["metric_names"], snapshot["campaign_ids"], snapshot["arrays"]
+        )
+        self.load_stats["cold_start_seconds"] = snapshot["meta"].get("cold_start_seconds")
+        print(f"⚡ Restored {len(self.get_all_campaigns())} campaigns from snapshot")
+        return True
+    
+    def _snapshot_representation(self) -> str:
+        """Campaign representation snapshots are written and restored in"""
+        return "compact" if self.compact else "dict"
+    
+    def _save_snapshot(self, fingerprint: Dict):
+        """Write a snapshot for the next cold start"""
+        try:
+            path = self.snapshot_cache.save(
+                self.data_path, fingerprint, self.campaigns_data,
+                self.metrics_store, self.index, self.load_stats["load_seconds"],
+                self._snapshot_representation()
+            )
+            self.load_stats["snapshot_path"] = path
+        except (OSError, pickle.PicklingError) as e:
+            print(f"⚠️ Could not write snapshot: {e}")
+    
+    def _record_load_stats(self, source: str, started: float):
+        """Record how the data was loaded and how long it took"""
+        elapsed = time.perf_counter() - started
+        self.load_stats["source"] = source
+        self.load_stats["load_seconds"] = elapsed
+        if source == "json":
+            self.load_stats["cold_start_seconds"] = elapsed
+            self.load_stats.pop("warm_start_seconds", None)
+        else:
+            self.load_stats["warm_start_seconds"] = elapsed
+    
+    @_pinned
+    def get_load_stats(self) -> Dict[str, Any]:
+        """Get load source and cold- versus warm-start timings"""
+        stats = {
+            "data_path": self.data_path,
+            "data_files": len(self.data_files) or 1,
+            "snapshot_enabled": self.use_snapshot,
+            "lazy": self.lazy,
+            "total_campaigns": len(self.get_all_campaigns())
+        }
+        if self.campaign_bodies is not None:
+            stats["lazy_cache"] = self.campaign_bodies.stats()
+        stats["versions"] = self.versions.stats()
+        stats.update(self.load_stats)
+        if stats.get("cold_start_seconds") and stats.get("warm_start_seconds"):
+            stats["speedup"] = stats["cold_start_seconds"] / stats["warm_start_seconds"]
+        return stats
+    
+    def iter_load(self, batch_size: int = 500) -> Iterator[int]:
+        """
+        Stream campaigns into a new version, yielding the running count after each batch
+        
+        Each campaign goes straight into the metrics store and indexes as it is
+        parsed. Between batches the calling thread's accessors serve the campaigns
+        loaded so far; other threads read the previous version until the load is
+        published at the end.
+        """
+        started = time.perf_counter()
+        with self._write_lock:
+            state = self._new_state()
+            with self._using(state):
+                yield from self._stream_campaigns(batch_size)
+                self._finish_load()
+                self._record_load_stats("json", started)
+            self.versions.publish(state)
+    
+    def _stream_campaigns(self, batch_size: int = 500) -> Iterator[int]:
+        """Parse campaigns one at a time into the version being built"""
+        self.campaigns_data = {"campaigns": [], "global_insights": {}}
+        self.metrics_store = CampaignMetricsStore()
+        self.index = CampaignIndex()
+        campaigns = self.campaigns_data["campaigns"]
+        
+        try:
+            for key, value in iter_campaigns_json(self.data_path):
+                if key != "campaigns":
+                    self.campaigns_data[key] = value
+                    continue
+                
+                campaigns.append(value)
+                self.metrics_store.add_campaign(value["id"], value.get("daily_performance", {}))
+                self.index.add(value)
+                if len(campaigns) % batch_size == 0:
+                    yield len(campaigns)
+            print(f"✅ Loaded {len(campaigns)} campaigns")
+        except FileNotFoundError:
+            print(f"❌ Data file not found: {self.data_path}")
+        except json.JSONDecodeError as e:
+            print(f"❌ Invalid JSON in data file: {e}")
+            self.campaigns_data = {"campaigns": [], "global_insights": {}}
+            self.metrics_store = CampaignMetricsStore()
+            self.index = CampaignIndex()
+        
+        yield len(self.get_all_campaigns())
+    
+    def _build_metrics_store(self):
+        """Build the columnar metrics store from loaded campaigns"""
+        self.metrics_store = CampaignMetricsStore.from_campaigns(self.get_all_campaigns())
+    
+    def ingest_daily(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Append daily performance rows without reloading
+        
+        Each row is {"campaign_id", "date", <metric>: value, ...}; a row for an
+        existing campaign-day replaces it. Window aggregates, the touched campaigns'
+        dicts and the SQLite database (with that backend) are updated from the new
+        rows alone. The metrics store places the new rows by binary search instead
+        of re-sorting the history, but still copies its columns once (older versions
+        keep the previous arrays), and campaign records are rebound to the new
+        version, so an ingest also costs one linear pass over rows and campaigns.
+        
+        The batch is applied to a copy of the current version and published in one
+        swap, so readers never see part of a batch. Returns the (campaign_id, date)
+        pairs ingested and unknown campaign ids.
+        """
+        with self._write_lock:
+            state = self.versions.current.fork()
+            with self._using(state):
+                daily_rows, unknown = self._apply_ingest(rows)
+            if daily_rows:
+                self.versions.publish(state)
+        
+        ingested = [(campaign_id, date) for campaign_id, days in daily_rows.items() for date in sorted(days)]
+        self.load_stats["ingested_rows"] = self.load_stats.get("ingested_rows", 0) + len(ingested)
+        return {"ingested": ingested, "unknown_campaigns": sorted(unknown, key=str)}
+    
+    def _apply_ingest(self, rows: List[Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Dict[str, Any]]], set]:
+        """Apply daily rows to the version being built; returns the rows by campaign and date, and unknown ids"""
+        daily_rows: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        unknown = set()
+        for row in rows:
+            campaign_id = row.get("campaign_id")
+            if not self.index.get(campaign_id):
+                unknown.add(campaign_id)
+                continue
+            date = str(pd.Timestamp(row["date"]).date())
+            metrics = {k: v for k, v in row.items() if k not in ("campaign_id", "date") and v is not None}
+            daily_rows.setdefault(campaign_id, {})[date] = metrics
+        
+        if unknown:
+            print(f"⚠️ Skipped rows for {len(unknown)} unknown campaigns")
+        if not daily_rows:
+            return daily_rows, unknown
+        
+        if self.sql_store is not None:
+            self.sql_store.append_daily(daily_rows)
+        
+        previous_store = store = self.metrics_store
+        if store is not None:
+            self.metrics_store = store = store.copy()
+        self._copy_campaigns(daily_rows)
+        for campaign_id, days in daily_rows.items():
+            if store is not None:
+                store.add_campaign(campaign_id, days)
+            self._apply_daily(self.index.get(campaign_id), days)
+        
+        self._performance_df_cache = None
+        self._rolling_engine = None
+        # Readers of the version being replaced may be scanning with its detector
+        with self.versions.current.cache_lock:
+            detector = self._anomaly_detector
+            if detector is not None and store is not None and detector.store is previous_store:
+                detector = detector.fork(store)
+            else:
+                detector = None
+        self._anomaly_detector = detector
+        if detector is not None:
+            for campaign_id, days in daily_rows.items():
+                detector.mark_changed(campaign_id, min(days))
+        
+        if store is not None:
+            store.aggregates.refresh()
+            if self.sql_store is not None and self.sql_store.last_append_versions[0] == self._analytics_version:
+                # The in-memory copy already holds the new rows; no need to reload it (unless
+                # another process wrote to the database since it was loaded)
+                self._analytics_version = self.sql_store.last_append_versions[1]
+        return daily_rows, unknown
+    
+    def _copy_campaigns(self, campaign_ids):
+        """
+        Give the version being built its own campaign objects before days are applied
+        
+        Compact records and lazy campaigns read through the version's metrics store or
+        body cache, so all of them are rebound; plain dicts are copied only when touched.
+        Both can occur in one version: a lazy loader reading several account files
+        keeps their campaigns as plain dicts.
+        """
+        campaigns = self.get_all_campaigns()
+        replacements = {}
+        if self.record_pool is not None:
+            self.record_pool = pool = self.record_pool.fork(self.metrics_store)
+            replacements = {id(c): c.rebind(pool) for c in campaigns if isinstance(c, CampaignRecord)}
+        elif self.campaign_bodies is not None:
+            self.campaign_bodies = bodies = self._body_cache(self._state())
+            replacements = {id(c): c.rebind(bodies) for c in campaigns if isinstance(c, LazyCampaign)}
+        
+        for campaign_id in campaign_ids:
+            campaign = self.index.get(campaign_id)
+            if type(campaign) is not dict or id(campaign) in replacements:
+                continue
+            copy = dict(campaign)
+            copy["daily_performance"] = dict(campaign.get("daily_performance", {}))
+            replacements[id(campaign)] = copy
+        
+        self.campaigns_data = dict(self.campaigns_data, campaigns=[replacements.get(id(c), c) for c in campaigns])
+        self.index = self.index.copy(replacements)
+    
+    def _apply_daily(self, campaign: Dict, days: Dict[str, Dict[str, Any]]):
+        """Reflect ingested days in a campaign's daily_performance"""
+        if isinstance(campaign, CampaignRecord):
+            return  # served from the metrics store
+        if isinstance(campaign, LazyCampaign):
+            if self.sql_store is not None or self.parquet_store is not None:
+                # Bodies are rebuilt from the database / metrics store on next access
+                self.campaign_bodies.discard(campaign["id"])
+                return
+            # Bodies decoded from the JSON file would miss the new days; keep this one resident
+            dict.__setitem__(campaign, "daily_performance", dict(campaign.get("daily_performance", {})))
+        
+        daily_perf = campaign.setdefault("daily_performance", {})
+        for date in sorted(days):
+            daily_perf[date] = days[date]
     
     def get_all_campaigns(self) -> List[Dict]:
         """Get all campaign data"""
@@ -58,126 +714,362 @@ class CampaignDataLoader:
     
     def get_campaign_by_id(self, campaign_id: str) -> Dict:
         """Get specific campaign by ID"""
-        campaigns = self.get_all_campaigns()
-        for campaign in campaigns:
-            if campaign["id"] == campaign_id:
-                return campaign
-        return {}
+        return self.index.get(campaign_id)
     
     def get_campaigns_by_industry(self, industry: str) -> List[Dict]:
         """Get campaigns filtered by industry"""
-        campaigns = self.get_all_campaigns()
-        return [c for c in campaigns if c.get("industry", "").lower() == industry.lower()]
+        return self.index.by_industry_name(industry)
     
     def get_campaigns_by_audience(self, audience_type: str) -> List[Dict]:
         """Get campaigns filtered by audience type"""
-        campaigns = self.get_all_campaigns()
-        return [c for c in campaigns if audience_type.lower() in c.get("audience", "").lower()]
+        return self.index.by_audience_text(audience_type)
     
-    def get_performance_summary(self) -> Dict:
-        """Get overall performance summary"""
-        campaigns = self.get_all_campaigns()
+    def get_campaigns_by_status(self, status: str) -> List[Dict]:
+        """Get campaigns filtered by status"""
+        return self.index.by_status_name(status)
+    
+    @_pinned
+    def get_performance_summary(self, window: str = "latest") -> Dict:
+        """
+        Get overall performance summary
         
-        total_spend = 0
-        total_conversions = 0
-        total_impressions = 0
-        active_campaigns = 0
+        Args:
+            window: "latest" (each campaign's most recent day), "7d", "30d" or "all"
+        """
+        if self.sql_store is not None:
+            aggregates = self.sql_store.window_totals(window)
+        else:
+            aggregates = self.metrics_store.aggregates.window(window)
+        totals = aggregates["totals"]
         
-        for campaign in campaigns:
-            if campaign.get("status") == "ACTIVE":
-                active_campaigns += 1
-            
-            # Sum up latest performance metrics
-            daily_perf = campaign.get("daily_performance", {})
-            if daily_perf:
-                latest_date = max(daily_perf.keys())
-                latest_perf = daily_perf[latest_date]
-                
-                total_spend += latest_perf.get("spend", 0)
-                total_conversions += latest_perf.get("conversions", 0) 
-                total_impressions += latest_perf.get("impressions", 0)
+        total_spend = totals.get("spend", 0)
+        total_conversions = totals.get("conversions", 0)
         
         return {
-            "total_campaigns": len(campaigns),
-            "active_campaigns": active_campaigns,
+            "total_campaigns": len(self.get_all_campaigns()),
+            "active_campaigns": self.index.count_status("ACTIVE"),
             "total_spend": total_spend,
             "total_conversions": total_conversions,
-            "total_impressions": total_impressions,
-            "average_roas": total_conversions * 50 / total_spend if total_spend > 0 else 0  # Assuming $50 avg order value
+            "total_impressions": totals.get("impressions", 0),
+            "average_roas": total_conversions * 50 / total_spend if total_spend > 0 else 0,  # Assuming $50 avg order value
+            "window": window,
+            "start_date": aggregates["start_date"],
+            "end_date": aggregates["end_date"]
         }
     
+    @_pinned
+    def get_latest_performance(self, campaign_id: str) -> Dict:
+        """Get metrics for a campaign's most recent day"""
+        if self.sql_store is not None:
+            return self.sql_store.latest_performance(campaign_id)
+        store = self.metrics_store
+        rows = store.campaign_slice(campaign_id)
+        if rows.stop <= rows.start:
+            return {}
+        return store.row_metrics(rows.stop - 1)
+    
+    @_pinned
+    def get_performance_range(self, campaign_ids: Optional[List[str]] = None, start=None, end=None,
+                              metrics: Optional[List[str]] = None, as_frame: bool = True,
+                              time_filter: Optional[Dict] = None) -> Union[pd.DataFrame, Dict[str, Dict[str, np.ndarray]]]:
+        """
+        Get metrics for campaigns between two dates without materializing full histories
+        
+        Args:
+            campaign_ids: Campaigns to read (all campaigns if None)
+            start, end: Inclusive date bounds as 'YYYY-MM-DD' strings or dates (open if None)
+            metrics: Metric columns to return (all if None)
+            as_frame: Return a DataFrame; otherwise a dict of campaign_id -> {"date", metric: array view}
+            time_filter: A QueryIntent time_filter used when start and end are not given
+        """
+        if time_filter and start is None and end is None:
+            start, end = self.resolve_time_filter(time_filter)
+        if self.sql_store is not None:
+            return self._sql_performance_range(campaign_ids, start, end, metrics, as_frame)
+        
+        store = self.metrics_store
+        if campaign_ids is None:
+            campaign_ids = store.campaign_ids
+        elif isinstance(campaign_ids, str):
+            campaign_ids = [campaign_ids]
+        metrics = metrics or store.metric_names
+        slices = [(cid, store.range_slice(cid, start, end)) for cid in campaign_ids if store.has_campaign(cid)]
+        
+        if not as_frame:
+            result = {}
+            for campaign_id, rows in slices:
+                result[campaign_id] = {"date": store.dates[rows]}
+                for metric in metrics:
+                    result[campaign_id][metric] = store.column(metric)[rows]
+            return result
+        
+        slices = [(cid, rows) for cid, rows in slices if rows.stop > rows.start]
+        if not slices:
+            return pd.DataFrame()
+        
+        rows = np.concatenate([np.arange(r.start, r.stop) for _, r in slices])
+        df = store.metric_frame(rows, metrics)
+        df.insert(1, "campaign_id", np.repeat([cid for cid, _ in slices], [r.stop - r.start for _, r in slices]))
+        return df
+    
+    def _sql_performance_range(self, campaign_ids, start, end, metrics, as_frame):
+        """get_performance_range for the SQLite backend"""
+        if isinstance(campaign_ids, str):
+            campaign_ids = [campaign_ids]
+        df = self.sql_store.performance_frame(campaign_ids, start, end, metrics)
+        if as_frame:
+            return df if len(df) else pd.DataFrame()
+        
+        metrics = [m for m in (metrics or self.sql_store.metric_names) if m in df]
+        groups = {campaign_id: rows for campaign_id, rows in df.groupby("campaign_id", sort=False)}
+        result = {}
+        for campaign_id in (campaign_ids if campaign_ids is not None else [c["id"] for c in self.get_all_campaigns()]):
+            if not self.index.get(campaign_id):
+                continue
+            rows = groups.get(campaign_id, df.iloc[0:0])
+            result[campaign_id] = {"date": rows["date"].to_numpy().astype("datetime64[D]")}
+            for metric in metrics:
+                result[campaign_id][metric] = rows[metric].to_numpy(dtype=np.float64)
+        return result
+    
+    @_pinned
+    def rank_campaigns(self, metric: str = "roas", start=None, end=None, limit: Optional[int] = 10,
+                       ascending: bool = False, time_filter: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        """
+        Rank campaigns by a metric over a date range
+        
+        Counts and spend are summed, rate metrics averaged. With the SQLite
+        backend the aggregation runs as a single SQL query.
+        """
+        if time_filter and start is None and end is None:
+            start, end = self.resolve_time_filter(time_filter)
+        if self.sql_store is not None:
+            return self.sql_store.rank_campaigns(metric, start, end, limit, ascending)
+        
+        df = self.get_performance_range(start=start, end=end, metrics=[metric])
+        if df.empty:
+            return []
+        grouped = df.dropna(subset=[metric]).groupby("campaign_id", sort=False)[metric]
+        values = grouped.sum() if metric in SUM_METRICS else grouped.mean()
+        ranked = values.sort_values(ascending=ascending, kind="stable")
+        if limit is not None:
+            ranked = ranked.head(limit)
+        days = grouped.size()
+        return [
+            {"campaign_id": campaign_id, "campaign_name": self.index.get(campaign_id).get("name"),
+             "metric": metric, "value": float(value), "days": int(days[campaign_id])}
+            for campaign_id, value in ranked.items()
+        ]
+    
+    @_pinned
+    def resolve_time_filter(self, time_filter: Dict) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Turn a QueryIntent time_filter into (start, end) dates
+        
+        Windows of N days end at the latest date in the data; filters
+        without a day count (custom periods) leave the range open.
+        """
+        if self.sql_store is not None:
+            end_date = self.sql_store.latest_date()
+        else:
+            end_date = self.metrics_store.aggregates.window("all")["end_date"]
+        days = time_filter.get("days")
+        if not days or end_date is None:
+            return None, None
+        start_date = np.datetime64(end_date, "D") - np.timedelta64(int(days) - 1, "D")
+        return str(start_date), end_date
+    
+    @_pinned
     def get_campaign_performance_df(self, campaign_id: str) -> pd.DataFrame:
         """Get campaign performance as pandas DataFrame"""
         campaign = self.get_campaign_by_id(campaign_id)
         if not campaign:
             return pd.DataFrame()
         
-        daily_perf = campaign.get("daily_performance", {})
-        if not daily_perf:
-            return pd.DataFrame()
+        if self.sql_store is not None:
+            df = self.sql_store.performance_frame([campaign_id]).drop(columns="campaign_id")
+            if df.empty:
+                return pd.DataFrame()
+            df = df.dropna(axis=1, how="all")
+            df.insert(1, "campaign_name", campaign["name"])
+            return df
         
-        # Convert to DataFrame
-        df_data = []
-        for date, metrics in daily_perf.items():
-            row = {"date": date, "campaign_name": campaign["name"]}
-            row.update(metrics)
-            df_data.append(row)
+        rows = self.metrics_store.campaign_slice(campaign_id)
+        if rows.stop <= rows.start:
+            return pd.DataFrame()
         
-        df = pd.DataFrame(df_data)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
+        df = self.metrics_store.metric_frame(rows, drop_empty=True)
+        df.insert(1, "campaign_name", campaign["name"])
         
         return df
     
+    @_pinned
     def get_all_performance_df(self) -> pd.DataFrame:
-        """Get all campaigns performance as single DataFrame"""
-        all_data = []
-        
-        for campaign in self.get_all_campaigns():
-            daily_perf = campaign.get("daily_performance", {})
-            for date, metrics in daily_perf.items():
-                row = {
-                    "date": date,
-                    "campaign_id": campaign["id"],
-                    "campaign_name": campaign["name"],
-                    "industry": campaign.get("industry"),
-                    "audience": campaign.get("audience"),
-                    "status": campaign.get("status")
-                }
-                row.update(metrics)
-                all_data.append(row)
-        
-        if not all_data:
+        """
+        Get all campaigns performance as single DataFrame
+        
+        Built straight from the metrics store with categorical header columns and
+        float32/int32 metrics, and cached until the data changes.
+        """
+        store = self.sql_store if self.sql_store is not None else self.metrics_store
+        with self._cache_lock():
+            cached = self._performance_df_cache
+            if cached is None or cached[0] is not store or cached[1] != store.version:
+                cached = (store, store.version, self._build_all_performance_df())
+                self._performance_df_cache = cached
+        return cached[2].copy(deep=False)
+    
+    def _build_all_performance_df(self) -> pd.DataFrame:
+        """Build the portfolio frame ordered by campaign id, then date"""
+        if self.sql_store is not None:
+            return self._build_sql_performance_df()
+        
+        store = self.metrics_store
+        if len(store) == 0:
             return pd.DataFrame()
         
-        df = pd.DataFrame(all_data)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values(['campaign_id', 'date'])
+        # Campaign ids as sorted categories; rows are already date-sorted within each campaign
+        id_codes, id_categories = pd.factorize(pd.Series(store.campaign_ids, dtype=object), sort=True)
+        rows = np.argsort(id_codes[store.row_campaign], kind="stable")
+        row_campaign = store.row_campaign[rows]
+        
+        df = store.metric_frame(rows, drop_empty=True, downcast=True)
+        df.insert(1, "campaign_id", pd.Categorical.from_codes(id_codes[row_campaign], id_categories))
+        
+        headers = [self.index.get(campaign_id) for campaign_id in store.campaign_ids]
+        header_columns = {"campaign_name": "name", "industry": "industry", "audience": "audience", "status": "status"}
+        for position, (column, key) in enumerate(header_columns.items(), start=2):
+            codes, categories = pd.factorize(pd.Series([h.get(key) for h in headers], dtype=object), sort=True)
+            df.insert(position, column, pd.Categorical.from_codes(codes[row_campaign], categories))
         
         return df
     
+    def _get_rolling_engine(self) -> RollingMetricsEngine:
+        """Rolling metrics engine bound to the current metrics store (call with the cache lock held)"""
+        store = self._analytics_store()
+        if self._rolling_engine is None or self._rolling_engine.store is not store:
+            self._rolling_engine = RollingMetricsEngine(store)
+        return self._rolling_engine
+    
+    @_pinned
+    def get_rolling_metrics(self, campaign_ids: Optional[Union[str, List[str]]] = None) -> pd.DataFrame:
+        """
+        Get 7/30-day moving averages and DoD/WoW/MoM % changes per campaign-day
+        
+        Computed for all campaigns in one pass and cached until the data changes.
+        """
+        with self._cache_lock():
+            frame = self._get_rolling_engine().compute()
+        if campaign_ids is None:
+            return frame.copy(deep=False)
+        if isinstance(campaign_ids, str):
+            campaign_ids = [campaign_ids]
+        return frame[frame["campaign_id"].isin(campaign_ids)].reset_index(drop=True)
+    
+    @_pinned
+    def get_latest_trends(self, campaign_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Get the most recent rolling statistics for each campaign (or only the given campaigns)"""
+        with self._cache_lock():
+            return self._get_rolling_engine().latest(campaign_ids)
+    
+    @_pinned
+    def get_anomalies(self, campaign_id: Optional[str] = None, metric: Optional[str] = None,
+                      since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get statistically detected anomalies (robust z-score, EWMA, changepoint)
+        
+        The first call scans every campaign; later calls only scan days appended
+        since the previous call.
+        """
+        with self._cache_lock():
+            store = self._analytics_store()
+            detector = self._anomaly_detector
+            if detector is None or detector.store is not store:
+                detector = self._anomaly_detector = AnomalyDetector(store)
+            detector.update()
+            return detector.anomalies(campaign_id=campaign_id, metric=metric, since=since)
+    
+    @_pinned
+    def get_audience_breakdown(self, campaign_id: Optional[Union[str, List[str]]] = None,
+                               by: Union[str, List[str]] = ("age", "gender"), start=None, end=None,
+                               time_filter: Optional[Dict] = None) -> pd.DataFrame:
+        """
+        Break delivery down by audience dimensions (age, gender, interest) from ad-level rows
+        
+        Args:
+            campaign_id: Campaign id or ids to include (all campaigns if None)
+            by: Dimension or dimensions to group by
+            start, end: Inclusive date bounds (open if None)
+            time_filter: A QueryIntent time_filter used when start and end are not given
+        
+        Answered from the ad-level fact table convert_real_data.py writes next to
+        the data; empty when the data has none.
+        """
+        facts = self._get_audience_facts()
+        if facts is None:
+            return pd.DataFrame()
+        if time_filter and start is None and end is None:
+            start, end = self.resolve_time_filter(time_filter)
+        return facts.breakdown(by, campaign_id, start, end)
+    
+    def _get_audience_facts(self) -> Optional[AudienceFactTable]:
+        """
+        Ad-level fact table for the data path, read once per loaded version
+        
+        A converted JSON file lists its fact files in global_insights (one per
+        incremental run); other sources have a single file at ad_facts_path.
+        """
+        with self._cache_lock():
+            if self._audience_facts is None:
+                listed = self.get_global_insights().get("ad_fact_files") if os.path.isfile(self.data_path) \
+                    and not self.sqlite else None
+                if listed is None:
+                    paths = [ad_facts_path(self.data_path)]
+                    if not os.path.isfile(paths[0]):
+                        return None
+                else:
+                    directory = os.path.dirname(os.path.abspath(self.data_path))
+                    paths = [os.path.join(directory, name) for name in listed]
+                try:
+                    tables = [AudienceFactTable.load(path) for path in paths]
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"❌ Could not read ad-level facts {', '.join(paths)}: {e}")
+                    return None
+                self._audience_facts = AudienceFactTable.concat(tables) if len(tables) != 1 else tables[0]
+            return self._audience_facts
+    
+    def _build_sql_performance_df(self) -> pd.DataFrame:
+        """Portfolio frame read from SQLite with the same layout and dtypes as the in-memory build"""
+        df = self.sql_store.performance_frame(with_headers=True)
+        if df.empty:
+            return pd.DataFrame()
+        
+        df = df.sort_values(["campaign_id", "date"], kind="stable").reset_index(drop=True)
+        for column in ("campaign_id", "campaign_name", "industry", "audience", "status"):
+            df[column] = pd.Categorical(df[column])
+        for name in self.sql_store.metric_names:
+            column = df[name]
+            if column.isna().all():
+                df = df.drop(columns=name)
+            elif name in COUNT_METRICS and not column.isna().any():
+                df[name] = column.astype(np.int32)
+            else:
+                df[name] = column.astype(np.float32)
+        return df
+    
     def get_global_insights(self) -> Dict:
         """Get global insights and market trends"""
         return self.campaigns_data.get("global_insights", {})
     
+    @_pinned
     def search_campaigns(self, query: str) -> List[Dict]:
-        """Simple text search across campaigns"""
-        query = query.lower()
-        results = []
-        
-        for campaign in self.get_all_campaigns():
-            # Search in campaign name, industry, audience
-            searchable_text = " ".join([
-                campaign.get("name", ""),
-                campaign.get("industry", ""),
-                campaign.get("audience", ""),
-                str(campaign.get("targeting", {}))
-            ]).lower()
-            
-            if query in searchable_text:
-                results.append(campaign)
+        """
+        Token search across campaign name, industry, audience, interests and placements
         
-        return results
+        Query tokens match as prefixes; results are ranked by how many tokens matched,
+        and a query without tokens returns every campaign.
+        """
+        return [self.index.get(campaign_id) for campaign_id in self.search_index.search(query)]
 
 # Utility functions for common queries
 def format_currency(amount: float) -> str:
@@ -0,0 +1,343 @@
+"""
+Background ingestion of daily CSV exports
+Watches a directory for files shaped like data/real/data.csv, parses them in a worker pool and
+feeds a bounded queue into CampaignDataLoader.ingest_daily (or the RAG processor's ingest)
+"""
+
+import glob
+import os
+import queue
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from ad_aggregation import campaign_day_rows, read_ads_csv
+
+def parse_daily_csv(path: str) -> List[Dict[str, Any]]:
+    """Read one daily export and return its campaign-day rows (runs in a worker)"""
+    return campaign_day_rows(read_ads_csv(path))
+
+
+class IngestionWorker:
+    """Directory watcher -> parser pool -> bounded queue -> ingest callback"""
+    
+    def __init__(self, ingest: Callable[[List[Dict[str, Any]]], Any], watch_dir: str, pattern: str = "*.csv",
+                 poll_interval: float = 5.0, parse_workers: int = 2, use_processes: bool = False,
+                 queue_size: int = 8, batch_rows: int = 5000, apply_interval: float = 0.05,
+                 archive_dir: Optional[str] = None, error_dir: Optional[str] = None):
+        """
+        Initialize the worker (call start() to run it in the background)
+        
+        Args:
+            ingest: Called with each batch of rows, e.g. loader.ingest_daily or processor.ingest_daily
+            watch_dir: Directory polled for new or modified export files
+            pattern: Glob pattern of export files inside watch_dir
+            poll_interval: Seconds between directory scans
+            parse_workers: Size of the parser pool; also caps files parsed concurrently
+            use_processes: Parse in a process pool instead of threads
+            queue_size: Maximum parsed batches waiting to be applied; parsers block when full
+            batch_rows: Maximum rows per applied batch, bounding each ingest call
+            apply_interval: Pause after each applied batch so query serving keeps getting time
+            archive_dir: Move files here once every batch was ingested (they are remembered in memory otherwise)
+            error_dir: Move files that failed to parse or ingest here (they stay in place otherwise, and
+                are retried once they change)
+        
+        A file is only archived or marked handled after all of its batches were
+        ingested, so one dropped by stop(drain=False), failed in the ingest
+        callback or lost to a crash before its batches were applied is parsed again.
+        """
+        self.ingest = ingest
+        self.watch_dir = watch_dir
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.parse_workers = parse_workers
+        self.use_processes = use_processes
+        self.batch_rows = batch_rows
+        self.apply_interval = apply_interval
+        self.archive_dir = archive_dir
+        self.error_dir = error_dir
+        self.queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        
+        self._stop = threading.Event()
+        self._draining = True
+        self._threads: List[threading.Thread] = []
+        self._seen: Dict[str, Tuple[int, int]] = {}
+        self._last_sizes: Dict[str, int] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}  # path -> batches not yet applied, failures so far
+        self._lock = threading.Lock()
+        self._metrics = {
+            "files_seen": 0,
+            "files_parsed": 0,
+            "files_failed": 0,
+            "rows_parsed": 0,
+            "rows_ingested": 0,
+            "batches_ingested": 0,
+            "ingest_errors": 0,
+            "blocked_seconds": 0.0,
+            "ingest_seconds": 0.0,
+            "last_lag_seconds": None,
+            "max_lag_seconds": 0.0,
+            "last_error": None
+        }
+    
+    def _count(self, **deltas):
+        """Update counters under the lock"""
+        with self._lock:
+            for key, delta in deltas.items():
+                self._metrics[key] += delta
+    
+    def scan(self) -> List[str]:
+        """
+        Files that are new or changed since they were handled
+        
+        A file is only returned once its size is unchanged across two scans, so
+        exports still being written are not picked up half-way.
+        """
+        ready = []
+        for path in sorted(glob.glob(os.path.join(self.watch_dir, self.pattern))):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self._seen.get(path) == signature:
+                continue
+            if self._last_sizes.get(path) != stat.st_size:
+                self._last_sizes[path] = stat.st_size
+                continue
+            ready.append(path)
+        return ready
+    
+    def _mark_handled(self, path: str, move_to: Optional[str] = None):
+        """Remember a handled file, or move it to move_to (archive or error directory)"""
+        self._last_sizes.pop(path, None)
+        try:
+            stat = os.stat(path)
+            self._seen[path] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            return
+        if move_to:
+            os.makedirs(move_to, exist_ok=True)
+            shutil.move(path, os.path.join(move_to, os.path.basename(path)))
+            self._seen.pop(path, None)
+    
+    def _finish_file(self, path: str, ingested: bool):
+        """Archive a file whose batches were all ingested; leave a failed one in place or move it to error_dir"""
+        try:
+            self._mark_handled(path, self.archive_dir if ingested else self.error_dir)
+        except OSError as e:
+            print(f"⚠️ Could not move {path}: {e}")
+    
+    def _batch_done(self, path: str, ingested: bool):
+        """Count an applied batch and finish its file after the last one"""
+        with self._lock:
+            pending = self._pending.get(path)
+            if pending is None:
+                return
+            pending["remaining"] -= 1
+            pending["failed"] |= not ingested
+            if pending["remaining"]:
+                return
+            del self._pending[path]
+        self._finish_file(path, not pending["failed"])
+    
+    def _enqueue(self, path: str, rows: List[Dict[str, Any]], detected_at: float):
+        """Split parsed rows into batches and block while the queue is full"""
+        batches = range(0, len(rows), self.batch_rows)
+        if not batches:
+            self._finish_file(path, True)
+            return
+        with self._lock:
+            self._pending[path] = {"remaining": len(batches), "failed": False}
+        
+        for start in batches:
+            item = {
+                "path": path,
+                "rows": rows[start:start + self.batch_rows],
+                "detected_at": detected_at,
+                "enqueued_at": time.time()
+            }
+            blocked_from = time.perf_counter()
+            while True:
+                try:
+                    self.queue.put(item, timeout=0.5)
+                    break
+                except queue.Full:
+                    if self._stop.is_set() and not self._draining:
+                        return
+            self._count(blocked_seconds=time.perf_counter() - blocked_from)
+    
+    def _record_parse_failure(self, path: str, error: Exception):
+        """Count a file that could not be parsed; it is retried only if it changes"""
+        print(f"❌ Could not parse {path}: {error}")
+        with self._lock:
+            self._metrics["files_failed"] += 1
+            self._metrics["last_error"] = f"{os.path.basename(path)}: {error}"
+        self._finish_file(path, False)
+    
+    def _collect(self, future, path: str, detected_at: float):
+        """Enqueue a finished parse, recording failures"""
+        try:
+            rows = future.result()
+        except Exception as e:
+            self._record_parse_failure(path, e)
+            return
+        
+        self._count(files_parsed=1, rows_parsed=len(rows))
+        self._enqueue(path, rows, detected_at)
+    
+    def _watch_loop(self):
+        """Scan, parse at most parse_workers files at a time and hand results to the queue"""
+        executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=self.parse_workers) as executor:
+            inflight: Dict[Any, Tuple[str, float]] = {}
+            while not self._stop.is_set() or inflight:
+                if not self._stop.is_set():
+                    with self._lock:
+                        # Files parsed but not yet fully ingested are not picked up again
+                        busy = {path for path, _ in inflight.values()} | set(self._pending)
+                    for path in self.scan():
+                        if len(inflight) >= self.parse_workers:
+                            break
+                        if path in busy:
+                            continue
+                        self._count(files_seen=1)
+                        inflight[executor.submit(parse_daily_csv, path)] = (path, time.time())
+                
+                if inflight:
+                    done, _ = wait(list(inflight), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path, detected_at = inflight.pop(future)
+                        self._collect(future, path, detected_at)
+                else:
+                    self._stop.wait(self.poll_interval)
+    
+    def _apply(self, item: Dict[str, Any]) -> bool:
+        """Run the ingest callback for one batch and record lag; False if it failed"""
+        started = time.perf_counter()
+        try:
+            self.ingest(item["rows"])
+        except Exception as e:
+            print(f"❌ Ingest failed for {item['path']}: {e}")
+            with self._lock:
+                self._metrics["ingest_errors"] += 1
+                self._metrics["last_error"] = f"{os.path.basename(item['path'])}: {e}"
+            return False
+        
+        lag = time.time() - item["detected_at"]
+        with self._lock:
+            self._metrics["rows_ingested"] += len(item["rows"])
+            self._metrics["batches_ingested"] += 1
+            self._metrics["ingest_seconds"] += time.perf_counter() - started
+            self._metrics["last_lag_seconds"] = lag
+            self._metrics["max_lag_seconds"] = max(self._metrics["max_lag_seconds"], lag)
+        return True
+    
+    def _apply_loop(self):
+        """Apply queued batches one at a time, pausing between them"""
+        while True:
+            try:
+                item = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._stop.is_set() and not self._watcher_alive():
+                    return
+                continue
+            try:
+                self._batch_done(item["path"], self._apply(item))
+            finally:
+                self.queue.task_done()
+            if self.apply_interval:
+                time.sleep(self.apply_interval)
+    
+    def _watcher_alive(self) -> bool:
+        """True while the watcher may still enqueue batches"""
+        return any(t.name == "ingestion-watcher" and t.is_alive() for t in self._threads)
+    
+    def start(self):
+        """Start the watcher and apply threads"""
+        if self._threads:
+            return
+        self._stop.clear()
+        self._draining = True
+        self._threads = [
+            threading.Thread(target=self._watch_loop, name="ingestion-watcher", daemon=True),
+            threading.Thread(target=self._apply_loop, name="ingestion-apply", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+        print(f"👀 Watching {os.path.join(self.watch_dir, self.pattern)} for daily exports")
+    
+    def stop(self, drain: bool = True, timeout: Optional[float] = None):
+        """Stop watching; with drain, files already being parsed and queued batches are applied first"""
+        self._draining = drain
+        self._stop.set()
+        if not drain:
+            while True:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                except queue.Empty:
+                    break
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        with self._lock:
+            # Files with dropped batches stay in place, unhandled, and are parsed again on the next start
+            for path in self._pending:
+                self._last_sizes.pop(path, None)
+            self._pending.clear()
+    
+    def run_once(self) -> Dict[str, Any]:
+        """Synchronously parse and ingest every ready file (for cron-style use)"""
+        ready = self.scan()
+        # Files seen for the first time need a second scan to confirm they are complete
+        ready = sorted(set(ready) | set(self.scan()))
+        for path in ready:
+            self._count(files_seen=1)
+            detected_at = time.time()
+            try:
+                rows = parse_daily_csv(path)
+            except Exception as e:
+                self._record_parse_failure(path, e)
+                continue
+            self._count(files_parsed=1, rows_parsed=len(rows))
+            ingested = True
+            for start in range(0, len(rows), self.batch_rows):
+                ingested &= self._apply({"path": path, "rows": rows[start:start + self.batch_rows],
+                                         "detected_at": detected_at, "enqueued_at": detected_at})
+            self._finish_file(path, ingested)
+        return self.stats()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, lag and throughput metrics for sizing the worker"""
+        with self.queue.mutex:
+            oldest = self.queue.queue[0]["enqueued_at"] if self.queue.queue else None
+        with self._lock:
+            stats = dict(self._metrics)
+        
+        stats.update({
+            "running": bool(self._threads),
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "queue_lag_seconds": time.time() - oldest if oldest is not None else 0.0,
+            "rows_per_second": stats["rows_ingested"] / stats["ingest_seconds"] if stats["ingest_seconds"] else 0.0
+        })
+        return stats
+
+
+if __name__ == "__main__":
+    import sys
+    from data_loader import CampaignDataLoader
+    
+    watch_dir = sys.argv[1] if len(sys.argv) > 1 else "data/incoming"
+    loader = CampaignDataLoader(data_source="real")
+    worker = IngestionWorker(loader.ingest_daily, watch_dir, poll_interval=2.0)
+    worker.start()
+    try:
+        while True:
+            time.sleep(10)
+            print(f"📊 {worker.stats()}")
+    except KeyboardInterrupt:
+        worker.stop()
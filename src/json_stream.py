@@ -0,0 +1,193 @@
+"""
+Streaming JSON reader and writer for campaign exports
+Parses or writes the top-level campaigns array one element at a time so large files load and
+convert in bounded memory
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+_WHITESPACE = " \t\n\r"
+
+class _BufferedJSONReader:
+    """Incremental reader that decodes JSON values from a file in fixed-size reads"""
+    
+    def __init__(self, handle, read_size: int):
+        self.handle = handle
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.consumed_bytes = 0  # UTF-8 size of text already dropped from the buffer
+        self._ascii = True
+    
+    def _fill(self) -> bool:
+        """Read more text, dropping the consumed prefix; returns False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.handle.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.consumed_bytes = self.byte_offset(self.pos)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self._ascii = self.buffer.isascii()
+        return True
+    
+    def byte_offset(self, pos: int) -> int:
+        """Absolute byte offset in the file of a buffer position"""
+        if self._ascii:
+            return self.consumed_bytes + pos
+        return self.consumed_bytes + len(self.buffer[:pos].encode("utf-8"))
+    
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of file)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+    
+    def expect(self, char: str):
+        """Consume one structural character"""
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expected '{char}'", self.buffer, self.pos)
+        self.pos += 1
+    
+    def value(self) -> Any:
+        """Decode the next complete JSON value"""
+        return self.value_with_span()[0]
+    
+    def value_with_span(self) -> Tuple[Any, int, int]:
+        """Decode the next complete JSON value with its start and end byte offsets"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may continue in the next read
+                if end < len(self.buffer) or self.eof:
+                    start_byte = self.byte_offset(self.pos)
+                    end_byte = self.byte_offset(end)
+                    self.pos = end
+                    return value, start_byte, end_byte
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def iter_campaigns_json(path: str, read_size: int = 1 << 20) -> Iterator[Tuple[str, Any]]:
+    """
+    Stream a campaigns.json document
+    
+    Yields ("campaigns", campaign) for each element of the top-level campaigns
+    array, then (key, value) for every other top-level member such as global_insights.
+    """
+    for key, value, _, _ in iter_campaigns_json_spans(path, read_size):
+        yield key, value
+
+
+def iter_campaigns_json_spans(path: str, read_size: int = 1 << 20) -> Iterator[Tuple[str, Any, int, int]]:
+    """Like iter_campaigns_json, but also yields each value's start and end byte offsets"""
+    with open(path, 'r', encoding="utf-8", newline="") as f:
+        reader = _BufferedJSONReader(f, read_size)
+        reader.expect("{")
+        
+        while reader.peek() != "}":
+            key = reader.value()
+            reader.expect(":")
+            
+            if key == "campaigns" and reader.peek() == "[":
+                reader.expect("[")
+                while reader.peek() != "]":
+                    yield ("campaigns",) + reader.value_with_span()
+                    if reader.peek() == ",":
+                        reader.expect(",")
+                reader.expect("]")
+            else:
+                yield (key,) + reader.value_with_span()
+            
+            if reader.peek() == ",":
+                reader.expect(",")
+        
+        reader.expect("}")
+
+
+def read_json_span(path: str, start: int, end: int) -> Any:
+    """Decode a single JSON value stored at a byte range of a file"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return json.loads(f.read(end - start))
+
+
+class CampaignsJSONWriter:
+    """
+    Incremental writer for campaigns.json documents
+    
+    Campaigns are encoded and appended to the top-level campaigns array one at a
+    time; the other top-level members (e.g. global_insights) are written by close().
+    With indent=2 the file is identical to json.dump(data, f, indent=2). The document
+    is written next to the target and moved into place on close, so readers never
+    see a partial file.
+    """
+    
+    def __init__(self, path: str, indent: Optional[int] = 2):
+        self.path = path
+        self.indent = indent
+        self.count = 0
+        self._separator = "," if indent is not None else ", "
+        self._temp_path = f"{path}.writing"
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self._temp_path, 'w', encoding="utf-8")
+        self._file.write("{" + self._newline(1) + '"campaigns": [')
+    
+    def _newline(self, depth: int) -> str:
+        """Line break and indentation for a nesting depth ('' when compact)"""
+        if self.indent is None:
+            return ""
+        return "\n" + " " * (self.indent * depth)
+    
+    def _encode(self, value: Any, depth: int) -> str:
+        """Encode a value nested at depth"""
+        text = json.dumps(value, indent=self.indent)
+        if self.indent is None:
+            return text
+        return text.replace("\n", self._newline(depth))
+    
+    def write(self, campaign: Dict[str, Any]):
+        """Append one campaign to the campaigns array"""
+        separator = self._separator if self.count else ""
+        self._file.write(separator + self._newline(2) + self._encode(campaign, 2))
+        self.count += 1
+    
+    def close(self, **members) -> int:
+        """Write the remaining top-level members, finish the document and move it into place"""
+        closing = self._newline(1) + "]" if self.count else "]"
+        self._file.write(closing)
+        for key, value in members.items():
+            self._file.write(self._separator + self._newline(1) + json.dumps(key) + ": " + self._encode(value, 1))
+        self._file.write(self._newline(0) + "}")
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+        return self.count
+    
+    def abort(self):
+        """Discard the partial document"""
+        self._file.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+    
+    def __enter__(self) -> "CampaignsJSONWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if not self._file.closed:
+            self.abort()
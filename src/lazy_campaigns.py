@@ -0,0 +1,113 @@
+"""
+Lazy campaign materialization
+Campaign headers stay resident; daily_performance and insights are decoded on demand through a bounded LRU
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional
+
+# Heavy per-campaign fields that are decoded only when touched
+LAZY_FIELDS = ("daily_performance", "insights")
+
+_MISSING = object()
+
+class CampaignBodyCache:
+    """Bounded LRU of decoded campaign bodies"""
+    
+    def __init__(self, fetch: Callable[[str], Dict[str, Any]], max_size: int = 128,
+                 version: Optional[Callable[[], Any]] = None):
+        self.fetch = fetch
+        self.max_size = max_size
+        self.version = version  # Optional source version; decoded bodies are dropped when it changes
+        self.hits = 0
+        self.misses = 0
+        self._bodies: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._source_version = None
+        self._lock = threading.Lock()
+    
+    def get(self, campaign_id: str) -> Dict[str, Any]:
+        """Get the lazy fields of a campaign, decoding them on a miss"""
+        source_version = self.version() if self.version is not None else None
+        with self._lock:
+            if source_version != self._source_version:
+                self._bodies.clear()
+                self._source_version = source_version
+            body = self._bodies.get(campaign_id)
+            if body is not None:
+                self._bodies.move_to_end(campaign_id)
+                self.hits += 1
+                return body
+            self.misses += 1
+        
+        body = self.fetch(campaign_id)
+        
+        with self._lock:
+            self._bodies[campaign_id] = body
+            self._bodies.move_to_end(campaign_id)
+            while len(self._bodies) > self.max_size:
+                self._bodies.popitem(last=False)
+        return body
+    
+    def discard(self, campaign_id: str):
+        """Drop one decoded body so the next access re-reads it"""
+        with self._lock:
+            self._bodies.pop(campaign_id, None)
+    
+    def clear(self):
+        """Drop all decoded bodies"""
+        with self._lock:
+            self._bodies.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        """Cache size and hit/miss counters"""
+        return {
+            "cached": len(self._bodies),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+class LazyCampaign(dict):
+    """Campaign dict holding only header fields; lazy fields resolve through the body cache"""
+    
+    __slots__ = ("_bodies",)
+    
+    def __init__(self, header: Dict[str, Any], bodies: CampaignBodyCache):
+        super().__init__(header)
+        self._bodies = bodies
+    
+    def _body(self) -> Dict[str, Any]:
+        return self._bodies.get(dict.__getitem__(self, "id"))
+    
+    def __missing__(self, key):
+        if key in LAZY_FIELDS:
+            value = self._body().get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        raise KeyError(key)
+    
+    def get(self, key, default: Optional[Any] = None):
+        if key in LAZY_FIELDS and not dict.__contains__(self, key):
+            return self._body().get(key, default)
+        return super().get(key, default)
+    
+    def __contains__(self, key) -> bool:
+        if key in LAZY_FIELDS and not dict.__contains__(self, key):
+            return key in self._body()
+        return super().__contains__(key)
+    
+    def rebind(self, bodies: CampaignBodyCache) -> "LazyCampaign":
+        """Copy of the resident fields resolving lazy fields through another body cache"""
+        return LazyCampaign(dict.copy(self), bodies)
+    
+    def materialize(self) -> Dict[str, Any]:
+        """Plain dict with header and lazy fields"""
+        campaign = dict(self)
+        campaign.update(self._body())
+        return campaign
+    
+    def __reduce__(self):
+        # Pickle as a plain, fully materialized dict
+        return (dict, (self.materialize(),))
@@ -0,0 +1,113 @@
+"""
+Versioned loader state
+Readers pin one published version of the loaded data while writers build the next version off to the
+side and publish it with an atomic pointer swap; versions nobody pins any more are reclaimed
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Callable, Iterator, Optional
+
+class LoaderState:
+    """Everything CampaignDataLoader serves reads from, as one swappable unit"""
+    
+    FIELDS = (
+        "campaigns_data", "index", "search_index", "metrics_store", "record_pool", "campaign_bodies",
+        "sql_store", "parquet_store", "parquet_insights", "body_offsets",
+        "analytics_version", "performance_df_cache", "rolling_engine", "anomaly_detector", "audience_facts"
+    )
+    
+    __slots__ = FIELDS + ("version", "cache_lock")
+    
+    def __init__(self, **fields):
+        self.version = 0
+        # Guards the caches built lazily on read (analytics store, frames, rolling engine, detector)
+        self.cache_lock = threading.RLock()
+        for name in self.FIELDS:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"Unknown loader state fields: {', '.join(fields)}")
+    
+    def fork(self) -> "LoaderState":
+        """Unpublished copy sharing every field (with its own cache lock); the writer replaces the ones it changes"""
+        return LoaderState(**{name: getattr(self, name) for name in self.FIELDS})
+
+
+class VersionRegistry:
+    """
+    Current-version pointer with pin counts
+    
+    publish() swaps the pointer under a lock, so a reader sees either the old or
+    the new version in full. A replaced version stays alive while pinned and is
+    handed to on_reclaim once its last pin is released.
+    """
+    
+    def __init__(self, initial: LoaderState, on_reclaim: Optional[Callable[[LoaderState], None]] = None):
+        self.on_reclaim = on_reclaim
+        self.published = 0
+        self.reclaimed = 0
+        self._current = initial
+        self._pins: Dict[int, int] = {}
+        self._retired: Dict[int, LoaderState] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def current(self) -> LoaderState:
+        """Latest published version"""
+        return self._current
+    
+    def publish(self, state: LoaderState) -> int:
+        """Make state the current version; returns its version number"""
+        with self._lock:
+            previous = self._current
+            self.published += 1
+            state.version = previous.version + 1
+            self._current = state
+            if self._pins.get(previous.version):
+                self._retired[previous.version] = previous
+                previous = None
+        if previous is not None:
+            self._reclaim(previous)
+        return state.version
+    
+    @contextmanager
+    def pin(self) -> Iterator[LoaderState]:
+        """Hold the current version for the duration of the block"""
+        with self._lock:
+            state = self._current
+            self._pins[state.version] = self._pins.get(state.version, 0) + 1
+        try:
+            yield state
+        finally:
+            with self._lock:
+                remaining = self._pins[state.version] - 1
+                if remaining:
+                    self._pins[state.version] = remaining
+                    retired = None
+                else:
+                    del self._pins[state.version]
+                    retired = self._retired.pop(state.version, None)
+            if retired is not None:
+                self._reclaim(retired)
+    
+    def live_states(self) -> List[LoaderState]:
+        """The current version plus replaced versions that are still pinned"""
+        with self._lock:
+            return [self._current] + list(self._retired.values())
+    
+    def _reclaim(self, state: LoaderState):
+        """Release a version that is neither current nor pinned"""
+        self.reclaimed += 1
+        if self.on_reclaim is not None:
+            self.on_reclaim(state)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Current version, pinned and retired versions and lifetime counters"""
+        with self._lock:
+            return {
+                "current_version": self._current.version,
+                "pinned_versions": dict(self._pins),
+                "retired_versions": sorted(self._retired),
+                "published": self.published,
+                "reclaimed": self.reclaimed
+            }
@@ -0,0 +1,126 @@
+"""
+Rolling-window metric engine
+Moving averages and day-over-day / week-over-week / month-over-month deltas for every
+campaign in one vectorized pass over the columnar metrics store
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Optional
+
+TREND_METRICS = ("cpm", "ctr", "cpc", "roas")
+
+# Campaign positions are packed above the day number so one sorted key covers all campaigns
+_KEY_SHIFT = np.int64(1) << 32
+
+# Days of history the latest row's statistics depend on (30-day MoM compares two 30-day windows)
+LOOKBACK_DAYS = 60
+
+class RollingMetricsEngine:
+    """Calendar-window statistics over a CampaignMetricsStore, cached per store version"""
+    
+    def __init__(self, store, metrics: Optional[List[str]] = None):
+        self.store = store
+        self.metrics = list(metrics or TREND_METRICS)
+        self._version = None
+        self._frame: Optional[pd.DataFrame] = None
+    
+    def _window_means(self, keys: np.ndarray, cumsum: np.ndarray, counts: np.ndarray,
+                      end_keys: np.ndarray, days: int) -> np.ndarray:
+        """Mean of observed values in the calendar window (end - days, end] for each end key"""
+        hi = np.searchsorted(keys, end_keys, side="right")
+        lo = np.searchsorted(keys, end_keys - (days - 1), side="left")
+        n = counts[hi] - counts[lo]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(n > 0, (cumsum[hi] - cumsum[lo]) / n, np.nan)
+    
+    @staticmethod
+    def _pct_change(current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+        """Percentage change, NaN where the previous value is missing or zero"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(previous != 0, (current - previous) / np.abs(previous) * 100, np.nan)
+    
+    def compute(self) -> pd.DataFrame:
+        """Per campaign-day values, 7/30-day moving averages and DoD/WoW/MoM % changes"""
+        store = self.store
+        if self._frame is not None and self._version == store.version:
+            return self._frame
+        
+        self._frame = self._rolling_frame(slice(None))
+        self._version = store.version
+        return self._frame
+    
+    def _rolling_frame(self, rows) -> pd.DataFrame:
+        """Rolling statistics of the store rows selected by rows (a slice or sorted row indices)"""
+        store = self.store
+        dates = store.dates[rows]
+        row_campaign = store.row_campaign[rows]
+        days = dates.astype(np.int64)
+        keys = row_campaign.astype(np.int64) * _KEY_SHIFT + days
+        
+        data: Dict[str, Any] = {
+            "date": dates.astype("datetime64[ns]"),
+            "campaign_id": np.array(store.campaign_ids, dtype=object)[row_campaign]
+        }
+        
+        # Row holding the previous calendar day, where that day exists
+        prev_idx = np.minimum(np.searchsorted(keys, keys - 1), max(len(keys) - 1, 0))
+        has_prev = keys[prev_idx] == keys - 1 if len(keys) else np.zeros(0, dtype=bool)
+        
+        for metric in self.metrics:
+            values = np.asarray(store.column(metric)[rows], dtype=np.float64)
+            observed = ~np.isnan(values)
+            cumsum = np.concatenate([[0.0], np.cumsum(np.where(observed, values, 0.0))])
+            counts = np.concatenate([[0], np.cumsum(observed)])
+            
+            ma7 = self._window_means(keys, cumsum, counts, keys, 7)
+            ma7_prev = self._window_means(keys, cumsum, counts, keys - 7, 7)
+            ma30 = self._window_means(keys, cumsum, counts, keys, 30)
+            ma30_prev = self._window_means(keys, cumsum, counts, keys - 30, 30)
+            previous_day = np.where(has_prev, values[prev_idx], np.nan) if len(values) else values
+            
+            data[metric] = values
+            data[f"{metric}_ma7"] = ma7
+            data[f"{metric}_ma30"] = ma30
+            data[f"{metric}_dod_pct"] = self._pct_change(values, previous_day)
+            data[f"{metric}_wow_pct"] = self._pct_change(ma7, ma7_prev)
+            data[f"{metric}_mom_pct"] = self._pct_change(ma30, ma30_prev)
+        
+        return pd.DataFrame(data)
+    
+    def latest(self, campaign_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Most recent row of rolling statistics for each campaign (or for the given campaigns)
+        
+        Without a cached frame, statistics for given campaigns are computed from the
+        last LOOKBACK_DAYS of their rows only, which is all their latest row depends on.
+        """
+        store = self.store
+        if campaign_ids is None or (self._frame is not None and self._version == store.version):
+            frame = self.compute()
+            latest_rows = store.latest_rows()
+        else:
+            spans = []
+            for campaign_id in campaign_ids:
+                rows = store.campaign_slice(campaign_id)
+                if rows.stop > rows.start:
+                    start = store.dates[rows.stop - 1] - np.timedelta64(LOOKBACK_DAYS - 1, "D")
+                    span = store.range_slice(campaign_id, start=start)
+                    spans.append(np.arange(span.start, span.stop))
+            rows = np.unique(np.concatenate(spans)) if spans else np.empty(0, dtype=np.int64)
+            frame = self._rolling_frame(rows)
+            # Rows of each campaign are contiguous, so the frame's last row per campaign is its latest
+            row_campaign = store.row_campaign[rows]
+            last = np.flatnonzero(np.append(row_campaign[1:] != row_campaign[:-1], True)) if len(rows) else rows
+            latest_rows = np.full(len(store.campaign_ids), -1, dtype=np.int64)
+            latest_rows[row_campaign[last]] = last
+        
+        wanted = None if campaign_ids is None else set(campaign_ids)
+        result = {}
+        for campaign_id, row in zip(store.campaign_ids, latest_rows):
+            if row < 0 or (wanted is not None and campaign_id not in wanted):
+                continue
+            record = frame.iloc[int(row)].to_dict()
+            record["date"] = str(pd.Timestamp(record["date"]).date())
+            result[campaign_id] = record
+        return result
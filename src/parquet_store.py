@@ -0,0 +1,261 @@
+"""
+Parquet/Arrow storage layout for campaign data
+A campaigns dimension table plus a daily fact table partitioned by month, read through
+memory-mapped Arrow datasets with column and date-range pushdown
+"""
+
+import json
+import os
+import shutil
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from campaign_store import CampaignMetricsStore, DEFAULT_METRICS, COUNT_METRICS, campaign_metric_names
+
+CAMPAIGNS_FILE = "campaigns.parquet"
+DAILY_DIR = "daily"
+GLOBAL_INSIGHTS_FILE = "global_insights.json"
+
+# Header columns stored as typed (filterable) columns in the dimension table
+HEADER_COLUMNS = ("name", "objective", "status", "industry", "audience", "created_date")
+CAMPAIGN_BLOCK = 500  # Campaigns per row group written by ParquetDatasetWriter
+
+def _pyarrow():
+    """Import pyarrow on first use so the JSON backends work without it"""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.fs
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The parquet data source requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def is_parquet_dataset(path: str) -> bool:
+    """True if path is a directory written by write_parquet_dataset"""
+    return os.path.isfile(os.path.join(path, CAMPAIGNS_FILE))
+
+
+def write_parquet_dataset(campaigns_data: Dict, output_dir: str) -> str:
+    """
+    Write campaigns data as a partitioned Parquet dataset
+    
+    Layout: campaigns.parquet (one row per campaign), daily/month=YYYY-MM/*.parquet
+    (one row per campaign-day) and global_insights.json. The dataset is written
+    to a staging directory and swapped into place.
+    """
+    campaigns = campaigns_data.get("campaigns", [])
+    with ParquetDatasetWriter(output_dir, campaign_metric_names(campaigns)) as writer:
+        for campaign in campaigns:
+            writer.write(campaign)
+        writer.close(campaigns_data.get("global_insights", {}))
+    return output_dir
+
+
+class ParquetDatasetWriter:
+    """
+    Incremental writer for a partitioned Parquet campaigns dataset
+    
+    Campaigns are buffered and written CAMPAIGN_BLOCK at a time, as one row group
+    of the dimension table and of each month's fact file, so memory is bounded by
+    a block rather than the dataset. Files go to a staging directory that close()
+    swaps into place (see write_parquet_dataset for the layout).
+    """
+    
+    def __init__(self, output_dir: str, metric_names: Optional[List[str]] = None):
+        pa = _pyarrow()
+        self.output_dir = output_dir
+        self.metric_names = list(metric_names or DEFAULT_METRICS)
+        self.count = 0
+        self._known_metrics = set(self.metric_names)
+        self._block: List[Dict[str, Any]] = []
+        self._staging = f"{output_dir.rstrip(os.sep)}.writing"
+        shutil.rmtree(self._staging, ignore_errors=True)
+        os.makedirs(os.path.join(self._staging, DAILY_DIR))
+        
+        self._dimension_schema = pa.schema([
+            ("id", pa.string()), ("position", pa.int32()), *[(key, pa.string()) for key in HEADER_COLUMNS],
+            ("header_json", pa.string()), ("insights_json", pa.string())
+        ])
+        self._fact_schema = pa.schema([
+            ("campaign_id", pa.string()), ("date", pa.date32()),
+            *[(name, pa.int64() if name in COUNT_METRICS else pa.float64()) for name in self.metric_names]
+        ])
+        self._dimension = pa.parquet.ParquetWriter(os.path.join(self._staging, CAMPAIGNS_FILE), self._dimension_schema)
+        self._months: Dict[str, Any] = {}  # Month -> writer of its fact file
+        self._closed = False
+    
+    def write(self, campaign: Dict[str, Any]):
+        """Add one campaign, writing out the buffered block when it is full"""
+        self._block.append(campaign)
+        self.count += 1
+        if len(self._block) >= CAMPAIGN_BLOCK:
+            self._flush()
+    
+    def _flush(self):
+        """Write the buffered campaigns and their daily rows"""
+        pa = _pyarrow()
+        block, self._block = self._block, []
+        if not block:
+            return
+        
+        first = self.count - len(block)
+        self._dimension.write_table(pa.table({
+            "id": [c["id"] for c in block],
+            "position": range(first, self.count),
+            **{key: [c.get(key) for c in block] for key in HEADER_COLUMNS},
+            "header_json": [
+                json.dumps({k: v for k, v in c.items() if k not in ("daily_performance", "insights")}) for c in block
+            ],
+            "insights_json": [json.dumps(c["insights"]) if "insights" in c else None for c in block]
+        }, schema=self._dimension_schema))
+        
+        campaign_ids, dates, columns = [], [], {name: [] for name in self.metric_names}
+        unknown = set()
+        for campaign in block:
+            for date, metrics in sorted(campaign.get("daily_performance", {}).items()):
+                campaign_ids.append(campaign["id"])
+                dates.append(date)
+                for name in self.metric_names:
+                    columns[name].append(metrics.get(name))
+                if not self._known_metrics.issuperset(metrics):
+                    unknown.update(set(metrics) - self._known_metrics)
+        if unknown:
+            raise ValueError(f"Metrics {', '.join(sorted(unknown))} are not in the dataset's metric names")
+        if not dates:
+            return
+        
+        day_values = np.array(dates, dtype="datetime64[D]")
+        fact = pa.table({"campaign_id": campaign_ids, "date": day_values, **columns}, schema=self._fact_schema)
+        months = np.datetime_as_string(day_values.astype("datetime64[M]"))
+        for month in np.unique(months):
+            writer = self._months.get(month)
+            if writer is None:
+                directory = os.path.join(self._staging, DAILY_DIR, f"month={month}")
+                os.makedirs(directory)
+                writer = pa.parquet.ParquetWriter(os.path.join(directory, "part-0.parquet"), self._fact_schema)
+                self._months[month] = writer
+            writer.write_table(fact.filter(pa.array(months == month)))
+    
+    def close(self, global_insights: Optional[Dict[str, Any]] = None) -> int:
+        """Write the remaining campaigns and global insights and move the dataset into place"""
+        self._flush()
+        self._close_files()
+        with open(os.path.join(self._staging, GLOBAL_INSIGHTS_FILE), 'w') as f:
+            json.dump(global_insights or {}, f, indent=2)
+        
+        if os.path.exists(self.output_dir):
+            shutil.rmtree(self.output_dir)
+        os.replace(self._staging, self.output_dir)
+        return self.count
+    
+    def _close_files(self):
+        """Finish the dimension and fact files"""
+        self._closed = True
+        self._dimension.close()
+        for writer in self._months.values():
+            writer.close()
+    
+    def abort(self):
+        """Discard the partial dataset"""
+        self._close_files()
+        shutil.rmtree(self._staging, ignore_errors=True)
+    
+    def __enter__(self) -> "ParquetDatasetWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if not self._closed:
+            self.abort()
+
+
+class ParquetCampaignStore:
+    """Reader for a partitioned Parquet campaigns dataset"""
+    
+    def __init__(self, root: str):
+        pa = _pyarrow()
+        self.root = root
+        self._filesystem = pa.fs.LocalFileSystem(use_mmap=True)
+        self._daily = pa.dataset.dataset(
+            os.path.join(root, DAILY_DIR), format="parquet", partitioning="hive", filesystem=self._filesystem
+        )
+        self.metric_names = [name for name in self._daily.schema.names if name not in ("campaign_id", "date", "month")]
+    
+    def months(self) -> List[str]:
+        """Month partitions present in the fact table"""
+        return sorted({
+            os.path.basename(os.path.dirname(path)).split("=", 1)[-1] for path in self._daily.files
+        })
+    
+    def read_campaigns(self) -> pd.DataFrame:
+        """The campaigns dimension table, in load order"""
+        pa = _pyarrow()
+        table = pa.parquet.read_table(os.path.join(self.root, CAMPAIGNS_FILE), memory_map=True)
+        return table.to_pandas().sort_values("position", kind="stable").reset_index(drop=True)
+    
+    def global_insights(self) -> Dict[str, Any]:
+        """Global insights stored with the dataset"""
+        try:
+            with open(os.path.join(self.root, GLOBAL_INSIGHTS_FILE), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+    
+    def read_daily(self, metrics: Optional[List[str]] = None, campaign_ids: Optional[List[str]] = None,
+                   start=None, end=None) -> pd.DataFrame:
+        """
+        Read fact rows with column and predicate pushdown
+        
+        Only the requested metric columns are decoded, and month partitions
+        outside [start, end] are skipped without being opened.
+        """
+        pa = _pyarrow()
+        field = pa.dataset.field
+        metrics = [name for name in (metrics or self.metric_names) if name in self.metric_names]
+        
+        conditions = []
+        if start is not None:
+            start = pd.Timestamp(start)
+            conditions += [field("month") >= start.strftime("%Y-%m"), field("date") >= pa.scalar(start.date())]
+        if end is not None:
+            end = pd.Timestamp(end)
+            conditions += [field("month") <= end.strftime("%Y-%m"), field("date") <= pa.scalar(end.date())]
+        if campaign_ids is not None:
+            conditions.append(field("campaign_id").isin(list(campaign_ids)))
+        
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        
+        table = self._daily.to_table(columns=["campaign_id", "date"] + metrics, filter=expression)
+        df = table.to_pandas()
+        df["campaign_id"] = df["campaign_id"].astype(object)
+        df["date"] = df["date"].astype("datetime64[ns]")
+        return df
+    
+    def to_metrics_store(self, campaign_ids: List[str], metrics: Optional[List[str]] = None,
+                         start=None, end=None) -> CampaignMetricsStore:
+        """Columnar metrics store over the projected metrics and date range"""
+        df = self.read_daily(metrics, start=start, end=end)
+        metric_names = [name for name in (metrics or self.metric_names) if name in self.metric_names]
+        positions = {campaign_id: i for i, campaign_id in enumerate(campaign_ids)}
+        df = df[df["campaign_id"].isin(positions)]
+        
+        row_campaign = df["campaign_id"].map(positions).to_numpy(dtype=np.int32)
+        row_date = df["date"].to_numpy().astype("datetime64[D]")
+        order = np.lexsort((row_date, row_campaign))
+        row_campaign, row_date = row_campaign[order], row_date[order]
+        
+        values = np.empty((len(metric_names), len(order)), dtype=np.float64)
+        for i, name in enumerate(metric_names):
+            values[i] = df[name].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        
+        return CampaignMetricsStore.from_arrays(metric_names, campaign_ids, {
+            "row_campaign": row_campaign,
+            "row_date": row_date,
+            "values": values,
+            "offsets": np.concatenate([[0], np.cumsum(np.bincount(row_campaign, minlength=len(campaign_ids)))])
+        })
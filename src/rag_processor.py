@@ -4,7 +4,7 @@ Integrates campaign data with LangChain document processing for vector embedding
 """
 
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from langchain.schema import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
@@ -22,11 +22,13 @@ class CampaignRAGProcessor:
                  embeddings_model: str = "text-embedding-3-small",
                  chunk_size: int = 1000,
                  chunk_overlap: int = 200,
-                 persist_directory: Optional[str] = None):
+                 persist_directory: Optional[str] = None,
+                 index_batch_size: int = 500):
         
         self.embeddings_model = embeddings_model
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.index_batch_size = index_batch_size  # Chunks per batch when indexing as a pipeline
         self.persist_directory = persist_directory or self._get_temp_persist_dir()
         
         # Initialize components (will be lazy-loaded)
@@ -39,6 +41,7 @@ class CampaignRAGProcessor:
         # Document storage
         self.documents = []
         self.processed_chunks = []
+        self.indexed_chunks = 0
     
     def _get_temp_persist_dir(self) -> str:
         """Get temporary directory for ChromaDB persistence"""
@@ -83,23 +86,137 @@ class CampaignRAGProcessor:
         
         # Create chunker and generate text chunks
         if self.campaign_chunker is None:
-            self.campaign_chunker = CampaignDataChunker(self.campaign_loader.campaigns_data)
+            self.campaign_chunker = CampaignDataChunker(self.campaign_loader.campaigns_data, loader=self.campaign_loader)
         
         chunks = self.campaign_chunker.create_all_chunks()
         
         # Convert to LangChain Documents
-        documents = []
-        for chunk in chunks:
-            doc = Document(
-                page_content=chunk["content"],
-                metadata=chunk["metadata"]
-            )
-            documents.append(doc)
+        documents = [self._chunk_document(chunk) for chunk in chunks]
         
         self.documents = documents
         print(f"✅ Created {len(documents)} LangChain documents")
         return documents
     
+    def _chunk_document(self, chunk: Dict[str, Any]) -> Document:
+        """LangChain Document for a chunk, carrying the chunk's id in its metadata"""
+        return Document(page_content=chunk["content"], metadata={**chunk["metadata"], "chunk_id": chunk["id"]})
+    
+    def _split_with_ids(self, documents: List[Document]) -> List[Document]:
+        """
+        Split documents, giving each piece the stable id <chunk id>_<piece index>
+        
+        The id is kept in the piece's chunk_id metadata and is also the id it is
+        stored under in the vector store, so re-indexing or re-ingesting a chunk
+        replaces its pieces instead of adding copies. The chunk id is kept as
+        parent_chunk_id, to find pieces a shorter re-split no longer produces.
+        """
+        self._init_text_splitter()
+        split_docs = []
+        for position, doc in enumerate(documents):
+            base_id = doc.metadata.get("chunk_id") or f"chunk_{position}"
+            for i, piece in enumerate(self.text_splitter.split_documents([doc])):
+                piece.metadata["chunk_id"] = f"{base_id}_{i}"
+                piece.metadata["parent_chunk_id"] = base_id
+                piece.metadata["source"] = "campaign_data"
+                piece.metadata["chunk_length"] = len(piece.page_content)
+                split_docs.append(piece)
+        return split_docs
+    
+    @staticmethod
+    def _document_ids(documents: List[Document]) -> List[str]:
+        """Vector store ids of split documents"""
+        return [doc.metadata["chunk_id"] for doc in documents]
+    
+    def iter_document_batches(self, batch_size: Optional[int] = None) -> Iterator[List[Document]]:
+        """
+        Split Documents for every chunk, produced batch_size chunks at a time
+        
+        Chunks come lazily from the chunker and are split per batch, so only one
+        batch is held at once. Split documents get the same ids and metadata as
+        split_documents() would give them.
+        """
+        if not self.campaign_loader:
+            self.load_campaign_data()
+        if self.campaign_chunker is None:
+            self.campaign_chunker = CampaignDataChunker(self.campaign_loader.campaigns_data, loader=self.campaign_loader)
+        
+        for chunks in self.campaign_chunker.iter_chunk_batches(batch_size or self.index_batch_size):
+            yield self._split_with_ids([self._chunk_document(chunk) for chunk in chunks])
+    
+    def ingest_daily(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Ingest new daily rows and upsert only their chunks into the vector store
+        
+        Chunking and embedding are proportional to the new rows: the chunker builds
+        chunks for just those days (plus trend, anomaly and industry chunks of the
+        campaigns they touch), and the chunks are upserted by id so re-ingesting a
+        day replaces its previous embedding. The loader's append also makes one
+        linear copy of its metrics columns (see CampaignDataLoader.ingest_daily).
+        """
+        if not self.campaign_loader:
+            self.load_campaign_data()
+        if self.campaign_chunker is None:
+            self.campaign_chunker = CampaignDataChunker(self.campaign_loader.campaigns_data, loader=self.campaign_loader)
+        
+        result = self.campaign_loader.ingest_daily(rows)
+        chunks = self.campaign_chunker.create_incremental_chunks(result["ingested"])
+        
+        documents = [self._chunk_document(chunk) for chunk in chunks]
+        split_docs = self._split_with_ids(documents)
+        
+        self.documents = self._replace_by_id(self.documents, documents)
+        self.processed_chunks = self._replace_by_id(self._without_stale_pieces(self.processed_chunks, split_docs),
+                                                    split_docs)
+        
+        if self.vectorstore is not None and split_docs:
+            self._delete_stale_pieces(split_docs)
+            self.vectorstore.add_documents(filter_complex_metadata(split_docs), ids=self._document_ids(split_docs))
+            self._persist_vectorstore()
+            print(f"📝 Upserted {len(split_docs)} chunks for {len(result['ingested'])} new campaign-days")
+        
+        return {
+            "ingested_rows": len(result["ingested"]),
+            "unknown_campaigns": result["unknown_campaigns"],
+            "chunks": len(chunks),
+            "upserted": len(split_docs) if self.vectorstore is not None else 0
+        }
+    
+    @staticmethod
+    def _without_stale_pieces(documents: List[Document], split_docs: List[Document]) -> List[Document]:
+        """documents minus pieces of the chunks in split_docs that their new split no longer has"""
+        parents = {doc.metadata["parent_chunk_id"] for doc in split_docs}
+        current = {doc.metadata["chunk_id"] for doc in split_docs}
+        return [doc for doc in documents
+                if doc.metadata.get("parent_chunk_id") not in parents or doc.metadata["chunk_id"] in current]
+    
+    def _delete_stale_pieces(self, split_docs: List[Document]):
+        """Delete stored pieces of the chunks in split_docs that their new split no longer has"""
+        parents = sorted({doc.metadata["parent_chunk_id"] for doc in split_docs})
+        current = set(self._document_ids(split_docs))
+        stored = self.vectorstore.get(where={"parent_chunk_id": {"$in": parents}}, include=[])["ids"]
+        stale = [doc_id for doc_id in stored if doc_id not in current]
+        if stale:
+            self.vectorstore.delete(ids=stale)
+    
+    def _persist_vectorstore(self):
+        """Persist the vector store (Chroma versions that write through have no persist())"""
+        if hasattr(self.vectorstore, "persist"):
+            self.vectorstore.persist()
+            print(f"💾 Vectorstore persisted to {self.persist_directory}")
+    
+    @staticmethod
+    def _replace_by_id(documents: List[Document], new_documents: List[Document]) -> List[Document]:
+        """documents with same-chunk_id entries replaced by new_documents and the rest appended"""
+        positions = {doc.metadata.get("chunk_id"): i for i, doc in enumerate(documents)}
+        for doc in new_documents:
+            position = positions.get(doc.metadata["chunk_id"])
+            if position is None:
+                positions[doc.metadata["chunk_id"]] = len(documents)
+                documents.append(doc)
+            else:
+                documents[position] = doc
+        return documents
+    
     def split_documents(self, documents: Optional[List[Document]] = None) -> List[Document]:
         """Split documents into smaller chunks using LangChain splitter"""
         if documents is None:
@@ -108,16 +225,8 @@ class CampaignRAGProcessor:
         if not documents:
             documents = self.create_campaign_documents()
         
-        self._init_text_splitter()
-        
-        # Split documents
-        split_docs = self.text_splitter.split_documents(documents)
-        
-        # Add chunk information to metadata
-        for i, doc in enumerate(split_docs):
-            doc.metadata["chunk_id"] = f"chunk_{i}"
-            doc.metadata["source"] = "campaign_data"
-            doc.metadata["chunk_length"] = len(doc.page_content)
+        # Split documents, adding chunk information to metadata
+        split_docs = self._split_with_ids(documents)
         
         self.processed_chunks = split_docs
         print(f"✅ Split into {len(split_docs)} text chunks")
@@ -129,7 +238,7 @@ class CampaignRAGProcessor:
             documents = self.processed_chunks
         
         if not documents:
-            documents = self.split_documents()
+            return self.index_campaigns()
         
         # Initialize embeddings
         self._init_embeddings()
@@ -148,39 +257,87 @@ class CampaignRAGProcessor:
                 print(f"✅ Loaded existing vectorstore from {self.persist_directory}")
                 
                 # Check if we need to add new documents
-                existing_count = self.vectorstore._collection.count()
-                if existing_count < len(documents):
-                    print(f"📝 Adding {len(documents) - existing_count} new documents")
-                    new_docs = documents[existing_count:]
-                    self.vectorstore.add_documents(new_docs)
+                new_docs = self._missing_documents(documents)
+                if new_docs:
+                    print(f"📝 Adding {len(new_docs)} new documents")
+                    self.vectorstore.add_documents(new_docs, ids=self._document_ids(new_docs))
             else:
                 # Create new vectorstore
                 self.vectorstore = Chroma.from_documents(
                     documents=documents,
                     embedding=self.embeddings,
+                    ids=self._document_ids(documents),
                     persist_directory=self.persist_directory
                 )
                 print(f"✅ Created new vectorstore with {len(documents)} documents")
             
             # Persist the vectorstore
-            self.vectorstore.persist()
-            print(f"💾 Vectorstore persisted to {self.persist_directory}")
+            self._persist_vectorstore()
+        
+        except Exception as e:
+            print(f"❌ Error creating vectorstore: {e}")
+            raise
+        
+        return self.vectorstore
+    
+    def index_campaigns(self, batch_size: Optional[int] = None) -> Chroma:
+        """
+        Build the ChromaDB vectorstore as a pipeline over chunk batches
+        
+        Each batch of chunks is split, embedded and added before the next is
+        generated, so peak memory is one batch rather than every chunk of the
+        portfolio. As in create_vectorstore, documents whose ids are already in
+        a persisted store are not embedded again.
+        """
+        self._init_embeddings()
+        batch_size = batch_size or self.index_batch_size
+        
+        try:
+            self.vectorstore = Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embeddings
+            )
+            if self.vectorstore._collection.count():
+                print(f"✅ Loaded existing vectorstore from {self.persist_directory}")
+            
+            added = 0
+            for split_docs in self.iter_document_batches(batch_size):
+                new_docs = self._missing_documents(split_docs)
+                if new_docs:
+                    self.vectorstore.add_documents(filter_complex_metadata(new_docs), ids=self._document_ids(new_docs))
+                    added += len(new_docs)
+            self.indexed_chunks = self.vectorstore._collection.count()
+            print(f"✅ Indexed {added} new documents in batches of {batch_size} chunks")
             
+            self._persist_vectorstore()
+        
         except Exception as e:
             print(f"❌ Error creating vectorstore: {e}")
             raise
         
         return self.vectorstore
     
+    def _missing_documents(self, documents: List[Document]) -> List[Document]:
+        """Documents whose ids are not yet in the vector store"""
+        existing = set(self.vectorstore.get(ids=self._document_ids(documents), include=[])["ids"])
+        return [doc for doc in documents if doc.metadata["chunk_id"] not in existing]
+    
     def create_mock_vectorstore(self, documents: Optional[List[Document]] = None) -> 'MockVectorStore':
         """Create a mock vectorstore that works without OpenAI API"""
         if documents is None:
             documents = self.processed_chunks
         
         if not documents:
-            documents = self.split_documents()
+            # Fill the store batch by batch instead of building the full document lists first
+            mock_store = MockVectorStore([])
+            for split_docs in self.iter_document_batches():
+                mock_store.add_documents(split_docs, ids=self._document_ids(split_docs))
+            self.indexed_chunks = len(mock_store.documents)
+            self.vectorstore = mock_store
+            print(f"✅ Created mock vectorstore with {len(mock_store.documents)} documents")
+            return mock_store
         
-        mock_store = MockVectorStore(documents)
+        mock_store = MockVectorStore(documents, ids=[doc.metadata.get("chunk_id") for doc in documents])
         self.vectorstore = mock_store
         print(f"✅ Created mock vectorstore with {len(documents)} documents")
         return mock_store
@@ -220,6 +377,7 @@ class CampaignRAGProcessor:
             "total_campaigns": len(self.campaign_loader.get_all_campaigns()) if self.campaign_loader else 0,
             "original_documents": len(self.documents),
             "processed_chunks": len(self.processed_chunks),
+            "indexed_chunks": self.indexed_chunks,
             "vectorstore_ready": self.vectorstore is not None,
             "embeddings_ready": self.embeddings is not None,
             "persist_directory": self.persist_directory
@@ -237,10 +395,46 @@ class CampaignRAGProcessor:
 class MockVectorStore:
     """Mock vector store for demo purposes (no API key required)"""
     
-    def __init__(self, documents: List[Document]):
-        self.documents = documents
+    def __init__(self, documents: List[Document], ids: Optional[List[str]] = None):
+        self.documents = []
+        self._ids: List[Optional[str]] = []
+        self.add_documents(documents, ids)
         print(f"📚 MockVectorStore initialized with {len(documents)} documents")
     
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None) -> List[str]:
+        """Add documents, replacing any existing document with the same id"""
+        ids = ids or [None] * len(documents)
+        positions = {doc_id: i for i, doc_id in enumerate(self._ids) if doc_id is not None}
+        for doc, doc_id in zip(documents, ids):
+            if doc_id is not None and doc_id in positions:
+                self.documents[positions[doc_id]] = doc
+            else:
+                if doc_id is not None:
+                    positions[doc_id] = len(self.documents)
+                self.documents.append(doc)
+                self._ids.append(doc_id)
+        return ids
+    
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            include: Optional[List[str]] = None) -> Dict[str, List]:
+        """Ids and documents matching ids and a Chroma-style metadata filter ({field: value} or {field: {"$in": values}})"""
+        allowed = {field: condition["$in"] if isinstance(condition, dict) else [condition]
+                   for field, condition in (where or {}).items()}
+        matches = []
+        for doc, doc_id in zip(self.documents, self._ids):
+            if ids is not None and doc_id not in ids:
+                continue
+            if all(doc.metadata.get(field) in values for field, values in allowed.items()):
+                matches.append((doc_id, doc))
+        return {"ids": [doc_id for doc_id, _ in matches], "documents": [doc.page_content for _, doc in matches]}
+    
+    def delete(self, ids: List[str]):
+        """Remove documents by id"""
+        ids = set(ids)
+        kept = [(doc, doc_id) for doc, doc_id in zip(self.documents, self._ids) if doc_id not in ids]
+        self.documents = [doc for doc, _ in kept]
+        self._ids = [doc_id for _, doc_id in kept]
+    
     def similarity_search(self, query: str, k: int = 5) -> List[Document]:
         """Simple keyword-based similarity search"""
         query_words = set(query.lower().split())
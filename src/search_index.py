@@ -0,0 +1,146 @@
+"""
+Inverted full-text index for campaign search
+Token postings over name, industry, audience, interests and placements with prefix matching
+"""
+
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Set, Tuple, Any
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens of a string"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class CampaignSearchIndex:
+    """Token -> campaign id postings, kept in sync with the loaded campaigns"""
+    
+    def __init__(self):
+        self.postings: Dict[str, Set[str]] = {}
+        self._documents: Dict[str, Tuple[Tuple[Any, ...], Tuple[str, ...]]] = {}
+        self._order: Dict[str, int] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+    
+    def copy(self) -> "CampaignSearchIndex":
+        """Independent copy, so syncing it leaves this index untouched"""
+        index = CampaignSearchIndex()
+        index.postings = {token: set(ids) for token, ids in self.postings.items()}
+        index._documents = dict(self._documents)
+        index._order = dict(self._order)
+        index._vocabulary = list(self._vocabulary)
+        index._vocabulary_dirty = self._vocabulary_dirty
+        return index
+    
+    @staticmethod
+    def _signature(campaign: Dict) -> Tuple[Any, ...]:
+        """Searchable field values of a campaign, used to detect changes on reload"""
+        targeting = campaign.get("targeting") or {}
+        return (
+            campaign.get("name", ""),
+            campaign.get("industry", ""),
+            campaign.get("audience", ""),
+            tuple(targeting.get("interests", []) or []),
+            tuple(targeting.get("placements", []) or [])
+        )
+    
+    @staticmethod
+    def _tokens(signature: Tuple[Any, ...]) -> Tuple[str, ...]:
+        """Distinct tokens of a campaign's searchable fields"""
+        name, industry, audience, interests, placements = signature
+        text = " ".join([str(name or ""), str(industry or ""), str(audience or "")] +
+                        [str(v) for v in interests] + [str(v) for v in placements])
+        return tuple(sorted(set(tokenize(text))))
+    
+    def sync(self, campaigns: List[Dict]) -> Dict[str, int]:
+        """Update the index to match a campaign list, touching only changed campaigns"""
+        seen = set()
+        added = updated = 0
+        self._order = {}
+        
+        for position, campaign in enumerate(campaigns):
+            campaign_id = campaign["id"]
+            if campaign_id in seen:
+                continue
+            seen.add(campaign_id)
+            self._order[campaign_id] = position
+            
+            signature = self._signature(campaign)
+            existing = self._documents.get(campaign_id)
+            if existing is not None and existing[0] == signature:
+                continue
+            if existing is not None:
+                self._remove(campaign_id)
+                updated += 1
+            else:
+                added += 1
+            self._add(campaign_id, signature)
+        
+        removed = [campaign_id for campaign_id in self._documents if campaign_id not in seen]
+        for campaign_id in removed:
+            self._remove(campaign_id)
+        
+        return {"added": added, "updated": updated, "removed": len(removed)}
+    
+    def _add(self, campaign_id: str, signature: Tuple[Any, ...]):
+        """Add a campaign's tokens to the postings"""
+        tokens = self._tokens(signature)
+        self._documents[campaign_id] = (signature, tokens)
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                self.postings[token] = ids = set()
+                self._vocabulary_dirty = True
+            ids.add(campaign_id)
+    
+    def _remove(self, campaign_id: str):
+        """Drop a campaign's tokens from the postings"""
+        _, tokens = self._documents.pop(campaign_id)
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(campaign_id)
+            if not ids:
+                del self.postings[token]
+                self._vocabulary_dirty = True
+    
+    def _prefix_matches(self, prefix: str) -> Set[str]:
+        """Campaign ids having any token that starts with prefix"""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self.postings)
+            self._vocabulary_dirty = False
+        
+        vocabulary = self._vocabulary
+        matches: Set[str] = set()
+        i = bisect_left(vocabulary, prefix)
+        while i < len(vocabulary) and vocabulary[i].startswith(prefix):
+            matches |= self.postings[vocabulary[i]]
+            i += 1
+        return matches
+    
+    def search(self, query: str) -> List[str]:
+        """
+        Ids of campaigns matching any query token as a prefix, ranked by number of matched tokens
+        
+        Ties keep campaign order; a query without tokens matches every campaign,
+        like the substring test it replaced matched every campaign for a blank query.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return sorted(self._order, key=self._order.get)
+        
+        order = self._order
+        if len(tokens) == 1:
+            return sorted(self._prefix_matches(tokens[0]), key=order.get)
+        
+        scores = Counter()
+        for token in tokens:
+            scores.update(self._prefix_matches(token))
+        return sorted(scores, key=lambda cid: (-scores[cid], order[cid]))
+    
+    def __len__(self) -> int:
+        return len(self._documents)
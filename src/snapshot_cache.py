@@ -0,0 +1,139 @@
+"""
+Binary snapshot cache for CampaignDataLoader
+Stores parsed campaigns, columnar metrics and lookup indexes so later starts skip JSON parsing
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import stat
+import tempfile
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+SNAPSHOT_FORMAT_VERSION = 1
+_ARRAY_NAMES = ["row_campaign", "row_date", "values", "offsets"]
+
+def source_fingerprint(path: str) -> Dict[str, Any]:
+    """Size, mtime and SHA-256 of a source data file"""
+    st = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": digest.hexdigest()
+    }
+
+
+def default_cache_dir() -> str:
+    """Per-user snapshot directory under $XDG_CACHE_HOME (or ~/.cache)"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "campaign_snapshots")
+
+def is_private(path: str) -> bool:
+    """Whether path is owned by the current user, is not a symlink and is not writable by others"""
+    info = os.lstat(path)
+    if stat.S_ISLNK(info.st_mode):
+        return False
+    if not hasattr(os, "getuid"):
+        return True
+    return info.st_uid == os.getuid() and not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+class SnapshotCache:
+    """
+    Read and write loader snapshots keyed by the source file's fingerprint
+    
+    Each campaign representation ("dict" or "compact") has its own snapshot, since
+    compact records need the pool of the loader that built them. Snapshots are
+    unpickled on load, so they live in a directory created with mode 0700, and
+    files not owned by the current user are never read.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or default_cache_dir()
+    
+    def snapshot_path(self, data_path: str, representation: str = "dict") -> str:
+        """Snapshot directory for a data file loaded in the given campaign representation"""
+        key = hashlib.sha1(f"{os.path.abspath(data_path)}\0{representation}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, key)
+    
+    def load(self, data_path: str, fingerprint: Dict[str, Any],
+             representation: str = "dict") -> Optional[Dict[str, Any]]:
+        """Load a snapshot if it matches the source fingerprint and representation, else None"""
+        path = self.snapshot_path(data_path, representation)
+        files = ["meta.json", "objects.pkl"] + [f"{name}.npy" for name in _ARRAY_NAMES]
+        try:
+            if not all(is_private(entry) for entry in
+                       [self.cache_dir, path] + [os.path.join(path, name) for name in files]):
+                print(f"⚠️ Ignoring snapshot in {path}: not owned by the current user or writable by others")
+                return None
+            
+            with open(os.path.join(path, "meta.json"), 'r') as f:
+                meta = json.load(f)
+            if meta.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+                return None
+            if meta["source"] != fingerprint or meta.get("representation", "dict") != representation:
+                return None
+            
+            with open(os.path.join(path, "objects.pkl"), 'rb') as f:
+                objects = pickle.load(f)
+            # Metric arrays are memory-mapped rather than read into memory
+            arrays = {
+                name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+                for name in _ARRAY_NAMES
+            }
+        except (OSError, ValueError, KeyError, pickle.UnpicklingError, EOFError):
+            return None
+        
+        objects["arrays"] = arrays
+        objects["meta"] = meta
+        return objects
+    
+    def save(self, data_path: str, fingerprint: Dict[str, Any], campaigns_data: Dict,
+             store, index, cold_start_seconds: float, representation: str = "dict") -> str:
+        """Write a snapshot atomically and return its directory"""
+        path = self.snapshot_path(data_path, representation)
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        if not is_private(self.cache_dir):
+            raise PermissionError(f"Snapshot directory {self.cache_dir} is not private to the current user")
+        staging = tempfile.mkdtemp(prefix="staging_", dir=self.cache_dir)
+        
+        try:
+            arrays = store.to_arrays()
+            for name in _ARRAY_NAMES:
+                np.save(os.path.join(staging, f"{name}.npy"), arrays[name])
+            
+            objects = {
+                "campaigns_data": campaigns_data,
+                "index": index,
+                "metric_names": store.metric_names,
+                "campaign_ids": store.campaign_ids
+            }
+            with open(os.path.join(staging, "objects.pkl"), 'wb') as f:
+                pickle.dump(objects, f, protocol=pickle.HIGHEST_PROTOCOL)
+            
+            meta = {
+                "format_version": SNAPSHOT_FORMAT_VERSION,
+                "data_path": os.path.abspath(data_path),
+                "source": fingerprint,
+                "representation": representation,
+                "cold_start_seconds": cold_start_seconds
+            }
+            with open(os.path.join(staging, "meta.json"), 'w') as f:
+                json.dump(meta, f, indent=2)
+            
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            os.replace(staging, path)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        
+        return path
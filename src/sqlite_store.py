@@ -0,0 +1,472 @@
+"""
+SQLite storage backend for CampaignDataLoader
+On-disk campaigns and daily_performance tables with indexed, SQL-side aggregation and a
+connection pool so several Streamlit workers can share one database file
+"""
+
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from campaign_store import CampaignMetricsStore, COUNT_METRICS, campaign_metric_names
+
+SCHEMA_VERSION = 1
+
+# Header columns stored in their own indexed/queryable columns
+HEADER_COLUMNS = ("name", "objective", "status", "industry", "audience", "created_date")
+
+# Metrics aggregated by summing in rankings; the rest are averaged
+SUM_METRICS = COUNT_METRICS | {"spend"}
+
+# Keeps IN (...) lists under SQLite's bound-parameter limit
+_MAX_PARAMS = 900
+
+# Metric names become daily_performance columns, so they must be plain identifiers
+_METRIC_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+# A cached data version is re-read after this long even if the database files look unchanged
+VERSION_RECHECK_SECONDS = 1.0
+
+def _metric_column(name: str) -> str:
+    """Column definition for a metric, rejecting names that are not SQL identifiers"""
+    if not _METRIC_NAME.fullmatch(name):
+        raise ValueError(f"Metric name '{name}' cannot be stored as a SQLite column")
+    return f"{name} {'INTEGER' if name in COUNT_METRICS else 'REAL'}"
+
+
+def _schema(metric_names: List[str]) -> str:
+    """DDL for a database whose daily table has one column per metric"""
+    metric_columns = ",\n    ".join(_metric_column(name) for name in metric_names)
+    return f"""
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS campaigns (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT,
+    objective TEXT,
+    status TEXT,
+    industry TEXT,
+    audience TEXT,
+    created_date TEXT,
+    header_json TEXT NOT NULL,
+    insights_json TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_campaigns_industry ON campaigns(industry COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_campaigns_status ON campaigns(status COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS daily_performance (
+    campaign_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    {metric_columns},
+    PRIMARY KEY (campaign_id, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_daily_performance_date ON daily_performance(date);
+"""
+
+def _table_metrics(conn: sqlite3.Connection) -> List[str]:
+    """Metric columns of the daily table, in column order"""
+    return [row[1] for row in conn.execute("PRAGMA table_info(daily_performance)")
+            if row[1] not in ("campaign_id", "date")]
+
+
+def _connect(db_path: str, timeout: float) -> sqlite3.Connection:
+    """Open a connection configured for concurrent readers and one writer"""
+    conn = sqlite3.connect(db_path, timeout=timeout, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+class SQLiteConnectionPool:
+    """Fixed-size pool of SQLite connections shared between threads"""
+    
+    def __init__(self, db_path: str, size: int = 4, timeout: float = 30.0):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    def _acquire(self) -> sqlite3.Connection:
+        """Reuse an idle connection, open a new one below the pool size, or wait"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return _connect(self.db_path, self.timeout)
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No SQLite connection available after {self.timeout}s")
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of a with-block"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+    
+    def close(self):
+        """Close idle connections"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+def build_sqlite_database(campaigns_data: Dict, db_path: str) -> str:
+    """
+    Write campaigns data into a new SQLite database file
+    
+    The database is built next to db_path and moved into place, so readers
+    never see a half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(db_path))
+    os.makedirs(directory, exist_ok=True)
+    staging = f"{db_path}.building"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(staging + suffix):
+            os.remove(staging + suffix)
+    
+    campaigns = campaigns_data.get("campaigns", [])
+    metric_names = campaign_metric_names(campaigns)
+    conn = sqlite3.connect(staging)
+    try:
+        conn.executescript(_schema(metric_names))
+        columns = ", ".join(metric_names)
+        placeholders = ", ".join("?" * (len(metric_names) + 2))
+        with conn:
+            for position, campaign in enumerate(campaigns):
+                header = {k: v for k, v in campaign.items() if k not in ("daily_performance", "insights")}
+                insights = campaign.get("insights")
+                conn.execute(
+                    f"INSERT OR REPLACE INTO campaigns (id, position, {', '.join(HEADER_COLUMNS)}, header_json, insights_json) "
+                    f"VALUES (?, ?, {', '.join('?' * len(HEADER_COLUMNS))}, ?, ?)",
+                    (campaign["id"], position, *(campaign.get(k) for k in HEADER_COLUMNS),
+                     json.dumps(header), json.dumps(insights) if insights is not None else None)
+                )
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO daily_performance (campaign_id, date, {columns}) VALUES ({placeholders})",
+                    [
+                        (campaign["id"], date, *(metrics.get(name) for name in metric_names))
+                        for date, metrics in campaign.get("daily_performance", {}).items()
+                    ]
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                [("schema_version", str(SCHEMA_VERSION)),
+                 ("global_insights", json.dumps(campaigns_data.get("global_insights", {})))]
+            )
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+    
+    os.replace(staging, db_path)
+    return db_path
+
+
+class SQLiteCampaignStore:
+    """Query layer over a campaigns database; aggregation runs inside SQLite"""
+    
+    def __init__(self, db_path: str, pool_size: int = 4):
+        if not os.path.isfile(db_path):
+            raise FileNotFoundError(2, "SQLite store not found", db_path)
+        self.db_path = db_path
+        self.pool = SQLiteConnectionPool(db_path, pool_size)
+        self.metric_names = self._read_metric_names()
+        self.last_append_versions: Optional[Tuple[int, int]] = None
+        self._version = 0
+        self._version_signature = None
+        self._version_checked = 0.0
+        self._version_lock = threading.Lock()
+    
+    def _read_metric_names(self) -> List[str]:
+        """Metric columns of the daily table, in column order"""
+        with self.pool.connection() as conn:
+            return _table_metrics(conn)
+    
+    def _file_signature(self) -> Tuple:
+        """Inode, size and mtime of the database and its WAL, which change when any process commits"""
+        signature = []
+        for path in (self.db_path, f"{self.db_path}-wal"):
+            try:
+                info = os.stat(path)
+                signature.append((info.st_ino, info.st_size, info.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+    
+    @property
+    def version(self) -> int:
+        """
+        Data version stored in the database, bumped by every append_daily commit
+        
+        The value is cached and only re-read when the database files change (or
+        VERSION_RECHECK_SECONDS have passed), so caches keyed on it are still
+        invalidated by writes from other processes without a query per access.
+        """
+        signature = self._file_signature()
+        with self._version_lock:
+            if (signature == self._version_signature
+                    and time.monotonic() - self._version_checked < VERSION_RECHECK_SECONDS):
+                return self._version
+        
+        rows = self._query("SELECT value FROM metadata WHERE key = 'data_version'")
+        version = int(rows[0][0]) if rows else 0
+        with self._version_lock:
+            if version != self._version:
+                # Another process may have added metric columns
+                self.metric_names = self._read_metric_names()
+            self._version = version
+            self._version_signature = signature
+            self._version_checked = time.monotonic()
+        return version
+    
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        """Run a read query on a pooled connection"""
+        with self.pool.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+    
+    def _frame(self, sql: str, params: Tuple = ()) -> pd.DataFrame:
+        """Run a read query into a DataFrame"""
+        with self.pool.connection() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+    
+    def _typed(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop NULL metrics and cast counts to int, like the in-memory store"""
+        return {
+            name: int(value) if name in COUNT_METRICS else float(value)
+            for name, value in metrics.items() if value is not None
+        }
+    
+    def headers(self) -> List[Dict[str, Any]]:
+        """Campaign header dicts (everything except daily_performance and insights), in load order"""
+        return [json.loads(row[0]) for row in self._query("SELECT header_json FROM campaigns ORDER BY position")]
+    
+    def global_insights(self) -> Dict[str, Any]:
+        """Global insights stored with the campaigns"""
+        rows = self._query("SELECT value FROM metadata WHERE key = 'global_insights'")
+        return json.loads(rows[0][0]) if rows else {}
+    
+    def campaign_body(self, campaign_id: str) -> Dict[str, Any]:
+        """daily_performance and insights of one campaign"""
+        rows = self._query("SELECT insights_json FROM campaigns WHERE id = ?", (campaign_id,))
+        if not rows:
+            return {}
+        
+        columns = ", ".join(self.metric_names)
+        daily = self._query(
+            f"SELECT date, {columns} FROM daily_performance WHERE campaign_id = ? ORDER BY date",
+            (campaign_id,)
+        )
+        body = {"daily_performance": {row[0]: self._typed(dict(zip(self.metric_names, row[1:]))) for row in daily}}
+        if rows[0][0] is not None:
+            body["insights"] = json.loads(rows[0][0])
+        return body
+    
+    def latest_date(self) -> Optional[str]:
+        """Most recent date in the daily table"""
+        return self._query("SELECT MAX(date) FROM daily_performance")[0][0]
+    
+    def latest_performance(self, campaign_id: str) -> Dict[str, Any]:
+        """Metrics of a campaign's most recent day"""
+        rows = self._query(
+            f"SELECT {', '.join(self.metric_names)} FROM daily_performance "
+            "WHERE campaign_id = ? ORDER BY date DESC LIMIT 1",
+            (campaign_id,)
+        )
+        return self._typed(dict(zip(self.metric_names, rows[0]))) if rows else {}
+    
+    def window_totals(self, window: str = "latest") -> Dict[str, Any]:
+        """Metric totals and date range for a window: latest, 7d, 30d or all"""
+        days = {"7d": 7, "30d": 30}
+        if window not in ("latest", "all") and window not in days:
+            raise ValueError(f"Unknown window '{window}'. Use one of: latest, 7d, 30d, all")
+        
+        sums = ", ".join(f"SUM(d.{name})" for name in self.metric_names)
+        if window == "latest":
+            sql = (f"SELECT {sums}, MIN(d.date) FROM daily_performance d JOIN "
+                   "(SELECT campaign_id, MAX(date) AS date FROM daily_performance GROUP BY campaign_id) l "
+                   "ON d.campaign_id = l.campaign_id AND d.date = l.date")
+            params: Tuple = ()
+        elif window == "all":
+            sql, params = f"SELECT {sums}, MIN(d.date) FROM daily_performance d", ()
+        else:
+            sql = (f"SELECT {sums}, MIN(d.date) FROM daily_performance d "
+                   "WHERE d.date > date((SELECT MAX(date) FROM daily_performance), ?)")
+            params = (f"-{days[window]} days",)
+        
+        row = self._query(sql, params)[0]
+        totals = {
+            name: (int(value or 0) if name in COUNT_METRICS else float(value or 0))
+            for name, value in zip(self.metric_names, row[:-1])
+        }
+        return {"totals": totals, "start_date": row[-1], "end_date": self.latest_date()}
+    
+    def performance_frame(self, campaign_ids: Optional[List[str]] = None, start=None, end=None,
+                          metrics: Optional[List[str]] = None, with_headers: bool = False) -> pd.DataFrame:
+        """
+        Daily rows between inclusive dates as a DataFrame ordered by campaign, then date
+        
+        Campaigns follow the order of campaign_ids (load order if None).
+        """
+        metrics = [m for m in (metrics or self.metric_names) if m in self.metric_names]
+        select = ["d.date", "d.campaign_id"]
+        if with_headers:
+            select += ["c.name AS campaign_name", "c.industry", "c.audience", "c.status"]
+        select += [f"d.{name}" for name in metrics]
+        
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("d.date >= ?")
+            params.append(str(pd.Timestamp(start).date()))
+        if end is not None:
+            conditions.append("d.date <= ?")
+            params.append(str(pd.Timestamp(end).date()))
+        
+        base = f"SELECT {', '.join(select)} FROM daily_performance d JOIN campaigns c ON c.id = d.campaign_id"
+        if campaign_ids is None:
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            frames = [self._frame(f"{base}{where} ORDER BY c.position, d.date", tuple(params))]
+        else:
+            frames = []
+            for i in range(0, len(campaign_ids), _MAX_PARAMS):
+                batch = list(campaign_ids[i:i + _MAX_PARAMS])
+                batch_conditions = [f"d.campaign_id IN ({', '.join('?' * len(batch))})"] + conditions
+                frames.append(self._frame(
+                    f"{base} WHERE {' AND '.join(batch_conditions)} ORDER BY d.campaign_id, d.date",
+                    tuple(batch + params)
+                ))
+        
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        if campaign_ids is not None and len(df):
+            order = {campaign_id: i for i, campaign_id in enumerate(dict.fromkeys(campaign_ids))}
+            df = df.iloc[np.argsort(df["campaign_id"].map(order).to_numpy(), kind="stable")].reset_index(drop=True)
+        df["date"] = pd.to_datetime(df["date"]).astype("datetime64[ns]")
+        return df
+    
+    def rank_campaigns(self, metric: str, start=None, end=None, limit: Optional[int] = 10,
+                       ascending: bool = False) -> List[Dict[str, Any]]:
+        """Campaigns ordered by a metric aggregated over a date range (sums for counts and spend, else means)"""
+        if metric not in self.metric_names:
+            raise ValueError(f"Unknown metric '{metric}'")
+        aggregate = "SUM" if metric in SUM_METRICS else "AVG"
+        
+        conditions, params = [f"d.{metric} IS NOT NULL"], []
+        if start is not None:
+            conditions.append("d.date >= ?")
+            params.append(str(pd.Timestamp(start).date()))
+        if end is not None:
+            conditions.append("d.date <= ?")
+            params.append(str(pd.Timestamp(end).date()))
+        
+        sql = (f"SELECT d.campaign_id, c.name, {aggregate}(d.{metric}) AS value, COUNT(*) AS days "
+               "FROM daily_performance d JOIN campaigns c ON c.id = d.campaign_id "
+               f"WHERE {' AND '.join(conditions)} GROUP BY d.campaign_id "
+               f"ORDER BY value {'ASC' if ascending else 'DESC'}, c.position")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        
+        return [
+            {"campaign_id": campaign_id, "campaign_name": name, "metric": metric, "value": value, "days": days}
+            for campaign_id, name, value, days in self._query(sql, tuple(params))
+        ]
+    
+    def append_daily(self, daily_rows: Dict[str, Dict[str, Dict[str, Any]]]) -> int:
+        """
+        Insert or replace campaign-days ({campaign_id: {date: metrics}}) in one transaction
+        
+        Metrics without a column yet are added as new columns; names that are not
+        SQL identifiers raise ValueError before anything is written.
+        """
+        new_metrics = {}
+        for days in daily_rows.values():
+            for metrics in days.values():
+                new_metrics.update(dict.fromkeys(name for name in metrics if name not in self.metric_names))
+        new_columns = [_metric_column(name) for name in new_metrics]
+        
+        with self.pool.connection() as conn:
+            with conn:
+                # Take the write lock first so the column check, new columns and rows commit together
+                conn.execute("BEGIN IMMEDIATE")
+                metric_names = _table_metrics(conn)
+                for name, column in zip(new_metrics, new_columns):
+                    # Another process may have added the column since this store read them
+                    if name not in metric_names:
+                        conn.execute(f"ALTER TABLE daily_performance ADD COLUMN {column}")
+                        metric_names.append(name)
+                columns = ", ".join(metric_names)
+                placeholders = ", ".join("?" * (len(metric_names) + 2))
+                values = [
+                    (campaign_id, date, *(metrics.get(name) for name in metric_names))
+                    for campaign_id, days in daily_rows.items() for date, metrics in days.items()
+                ]
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO daily_performance (campaign_id, date, {columns}) VALUES ({placeholders})",
+                    values
+                )
+                conn.execute(
+                    "INSERT INTO metadata (key, value) VALUES ('data_version', '1') "
+                    "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+                )
+                version = int(conn.execute("SELECT value FROM metadata WHERE key = 'data_version'").fetchone()[0])
+        with self._version_lock:
+            self.metric_names = metric_names
+            self._version = version
+            # Re-read on the next access, in case another process commits right after this one
+            self._version_signature = None
+        # Versions before and after this commit; a copy current at the first is current at the second
+        self.last_append_versions = (version - 1, version)
+        return len(values)
+    
+    def to_metrics_store(self) -> CampaignMetricsStore:
+        """Load the daily table into an in-memory columnar store (for whole-history analytics)"""
+        campaign_ids = [row[0] for row in self._query("SELECT id FROM campaigns ORDER BY position")]
+        df = self.performance_frame()
+        positions = {campaign_id: i for i, campaign_id in enumerate(campaign_ids)}
+        row_campaign = df["campaign_id"].map(positions).to_numpy(dtype=np.int32)
+        return CampaignMetricsStore.from_arrays(self.metric_names, campaign_ids, {
+            "row_campaign": row_campaign,
+            "row_date": df["date"].to_numpy().astype("datetime64[D]"),
+            "values": np.vstack([df[name].to_numpy(dtype=np.float64) for name in self.metric_names])
+            if len(df) else np.empty((len(self.metric_names), 0)),
+            "offsets": np.concatenate([[0], np.cumsum(np.bincount(row_campaign, minlength=len(campaign_ids)))])
+        })
+    
+    def close(self):
+        """Close pooled connections"""
+        self.pool.close()
+
+
+if __name__ == "__main__":
+    import sys
+    
+    source = sys.argv[1] if len(sys.argv) > 1 else "data/demo/campaigns.json"
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + ".db"
+    with open(source, 'r') as f:
+        data = json.load(f)
+    build_sqlite_database(data, target)
+    print(f"✅ Wrote {len(data.get('campaigns', []))} campaigns to {target}")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Account Loading Test for Meta Ads RAG Demo
+Tests that a directory of account files loads as one namespaced data source
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append('src')
+
+DATA_PATH = "data/demo/campaigns.json"
+
+def write_accounts(tmp, campaigns_data, count=3):
+    """Split the campaigns across count account files in tmp"""
+    for i in range(count):
+        with open(os.path.join(tmp, f"account_{i}.json"), 'w') as f:
+            json.dump({"campaigns": campaigns_data["campaigns"][i::count],
+                       "global_insights": campaigns_data["global_insights"]}, f)
+
+def test_account_directory():
+    """Test that account files merge into namespaced campaigns and other JSON files are skipped"""
+    print("🚀 Testing Account Directory Loading\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        from parquet_store import write_parquet_dataset
+        
+        with open(DATA_PATH, 'r') as f:
+            campaigns_data = json.load(f)
+        expected = CampaignDataLoader(data_path=DATA_PATH)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            write_accounts(tmp, campaigns_data)
+            with open(os.path.join(tmp, "notes.json"), 'w') as f:
+                json.dump({"campaigns": {"camp_001": "not an account file"}}, f)
+            
+            loader = CampaignDataLoader(data_path=tmp, load_workers=2)
+            ids = sorted(campaign["id"] for campaign in loader.get_all_campaigns())
+            assert ids == sorted(f"account_{i}:{campaign['id']}" for i in range(3)
+                                 for campaign in campaigns_data["campaigns"][i::3]), "campaign ids not namespaced"
+            skipped = [stats["path"] for stats in loader.load_stats["files"] if stats.get("skipped")]
+            assert skipped == [os.path.join(tmp, "notes.json")], "file without a campaigns list not skipped"
+            print(f"✅ {len(ids)} namespaced campaigns, {len(skipped)} file skipped")
+            
+            for window in ("latest", "7d", "all"):
+                summary, expected_summary = loader.get_performance_summary(window), expected.get_performance_summary(window)
+                assert summary["total_spend"] == expected_summary["total_spend"], f"{window} spend differs"
+            assert set(loader.get_global_insights()["accounts"]) == {"account_0", "account_1", "account_2"}
+            print("✅ Merged summaries match the single-file load")
+            
+            # A Parquet dataset directory is not globbed for account files
+            parquet_dir = write_parquet_dataset(campaigns_data, os.path.join(tmp, "parquet"))
+            loader = CampaignDataLoader(data_path=parquet_dir)
+            assert loader.data_files == [] and len(loader.get_all_campaigns()) == len(campaigns_data["campaigns"])
+            print("✅ Parquet dataset directory loads without account files")
+        
+        print("\n🎉 Account directory test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Account directory test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_account_metrics_store():
+    """Test that the metrics store built in the workers matches one built from the merged campaigns"""
+    print("🚀 Testing Account Metrics Stores\n")
+    
+    try:
+        import pandas as pd
+        from data_loader import CampaignDataLoader
+        from campaign_store import CampaignMetricsStore
+        
+        with open(DATA_PATH, 'r') as f:
+            campaigns_data = json.load(f)
+        # A metric present in one account only is NaN for the others
+        for metrics in campaigns_data["campaigns"][0]["daily_performance"].values():
+            metrics["video_views"] = 100
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            write_accounts(tmp, campaigns_data)
+            dict_loader = CampaignDataLoader(data_path=tmp, load_workers=2)
+            expected = CampaignMetricsStore.from_campaigns(dict_loader.get_all_campaigns())
+            
+            for compact in (False, True):
+                loader = dict_loader if not compact else CampaignDataLoader(data_path=tmp, load_workers=2, compact=True)
+                store = loader.metrics_store
+                assert store.campaign_ids == expected.campaign_ids, "campaign order differs"
+                assert set(store.metric_names) == set(expected.metric_names), "metric names differ"
+                for campaign in loader.get_all_campaigns():
+                    pd.testing.assert_frame_equal(loader.get_campaign_performance_df(campaign["id"]),
+                                                  dict_loader.get_campaign_performance_df(campaign["id"]))
+                    assert dict(campaign["daily_performance"]) == \
+                        dict(dict_loader.get_campaign_by_id(campaign["id"])["daily_performance"]), \
+                        f"daily performance of {campaign['id']} differs"
+                assert loader.get_performance_summary("all") == dict_loader.get_performance_summary("all")
+                print(f"✅ {'compact' if compact else 'dict'} loader store matches the merged campaigns")
+        
+        print("\n🎉 Account metrics store test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Account metrics store test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = test_account_directory() and test_account_metrics_store()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Anomaly Detection Test for Meta Ads RAG Demo
+Tests that injected spikes and level shifts are reported, blockwise and incremental scans included
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append('src')
+
+DAYS = 60
+SPIKE_DAY = 40
+SHIFT_DAY = 30
+
+def synthetic_campaigns():
+    """Three campaigns of noisy daily metrics: a CPM spike in the first, a ROAS level shift in the second"""
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(7)
+    dates = [str(d.date()) for d in pd.date_range("2024-01-01", periods=DAYS)]
+    campaigns = []
+    for i in range(3):
+        cpm = 10 + rng.normal(0, 0.3, DAYS)
+        roas = 3 + rng.normal(0, 0.1, DAYS)
+        if i == 0:
+            cpm[SPIKE_DAY] = 25
+        if i == 1:
+            roas[SHIFT_DAY:] -= 1.5
+        campaigns.append({
+            "id": f"camp_{i}", "name": f"Campaign {i}", "industry": "Retail", "audience": "Broad",
+            "daily_performance": {date: {"impressions": 10000, "spend": 100.0, "cpm": round(float(cpm[d]), 3),
+                                         "roas": round(float(roas[d]), 3)} for d, date in enumerate(dates)}
+        })
+    return {"campaigns": campaigns, "global_insights": {}}, dates
+
+def test_detected_anomalies():
+    """Test that the spike and the level shift are found, with the same results for any block size"""
+    print("🚀 Testing Anomaly Detection\n")
+    
+    try:
+        import anomaly_detector
+        from anomaly_detector import AnomalyDetector
+        from data_loader import CampaignDataLoader
+        
+        campaigns_data, dates = synthetic_campaigns()
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, "campaigns.json")
+            with open(data_path, 'w') as f:
+                json.dump(campaigns_data, f)
+            loader = CampaignDataLoader(data_path=data_path)
+            anomalies = loader.get_anomalies()
+            
+            spikes = loader.get_anomalies(campaign_id="camp_0", metric="cpm")
+            assert any(r["method"] == "robust_z" and r["date"] == dates[SPIKE_DAY] and r["direction"] == "spike"
+                       for r in spikes), f"CPM spike not reported: {spikes}"
+            shifts = [r for r in loader.get_anomalies(campaign_id="camp_1", metric="roas") if r["method"] == "changepoint"]
+            assert shifts and all(r["direction"] == "drop" for r in shifts), f"ROAS shift not reported: {shifts}"
+            assert min(abs(dates.index(r["date"]) - SHIFT_DAY) for r in shifts) <= 1, "shift reported on the wrong day"
+            print(f"✅ Spike and level shift reported ({len(anomalies)} anomalies in total)")
+            
+            # The rolling median is computed in row blocks; tiny blocks must not change the result
+            block_rows = anomaly_detector.ROBUST_Z_BLOCK_ROWS
+            anomaly_detector.ROBUST_Z_BLOCK_ROWS = 7
+            try:
+                blockwise = AnomalyDetector(loader.metrics_store).detect()
+            finally:
+                anomaly_detector.ROBUST_Z_BLOCK_ROWS = block_rows
+            assert blockwise == anomalies, "blockwise scan differs"
+            print("✅ Blockwise robust z-scores match")
+        
+        print("\n🎉 Anomaly detection test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Anomaly detection test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_incremental_anomalies():
+    """Test that anomalies after ingesting the later days match a full scan of all days"""
+    print("🚀 Testing Incremental Anomaly Detection\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        
+        campaigns_data, dates = synthetic_campaigns()
+        cut = dates[SPIKE_DAY - 5]
+        earlier = json.loads(json.dumps(campaigns_data))
+        rows = []
+        for campaign in earlier["campaigns"]:
+            daily = campaign["daily_performance"]
+            for date in [d for d in daily if d > cut]:
+                rows.append({"campaign_id": campaign["id"], "date": date, **daily.pop(date)})
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = os.path.join(tmp, "full.json"), os.path.join(tmp, "earlier.json")
+            for path, data in zip(paths, (campaigns_data, earlier)):
+                with open(path, 'w') as f:
+                    json.dump(data, f)
+            expected = CampaignDataLoader(data_path=paths[0]).get_anomalies()
+            
+            loader = CampaignDataLoader(data_path=paths[1])
+            loader.get_anomalies()
+            loader.ingest_daily(rows)
+            assert loader.get_anomalies() == expected, "incremental anomalies differ from a full scan"
+            print(f"✅ {len(rows)} ingested rows scanned incrementally, {len(expected)} anomalies match")
+        
+        print("\n🎉 Incremental anomaly test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Incremental anomaly test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = test_detected_anomalies() and test_incremental_anomalies()
+    sys.exit(0 if success else 1)
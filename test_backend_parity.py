@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Backend Parity Test for Meta Ads RAG Demo
+Tests that the SQLite and Parquet backends answer the loader's accessors like the JSON loader
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append('src')
+
+DATA_PATH = "data/demo/campaigns.json"
+
+def build_backends(tmp, campaigns_data=None):
+    """JSON loader plus SQLite and Parquet loaders over the same campaigns (the demo data by default)"""
+    from data_loader import CampaignDataLoader
+    from sqlite_store import build_sqlite_database
+    from parquet_store import write_parquet_dataset
+    
+    if campaigns_data is None:
+        with open(DATA_PATH, 'r') as f:
+            campaigns_data = json.load(f)
+    data_path = os.path.join(tmp, "campaigns.json")
+    with open(data_path, 'w') as f:
+        json.dump(campaigns_data, f)
+    db_path = build_sqlite_database(campaigns_data, os.path.join(tmp, "campaigns.db"))
+    parquet_dir = write_parquet_dataset(campaigns_data, os.path.join(tmp, "parquet"))
+    return CampaignDataLoader(data_path=data_path), {
+        "sqlite": CampaignDataLoader(data_path=db_path),
+        "parquet": CampaignDataLoader(data_path=parquet_dir)
+    }
+
+def assert_same_accessors(expected, loader, name):
+    """Compare the loader's campaign, performance, ranking and analytics accessors"""
+    import pandas as pd
+    
+    campaign_ids = [campaign["id"] for campaign in expected.get_all_campaigns()]
+    assert [campaign["id"] for campaign in loader.get_all_campaigns()] == campaign_ids, f"{name}: campaign ids differ"
+    assert loader.get_global_insights() == expected.get_global_insights(), f"{name}: global insights differ"
+    
+    for campaign_id in campaign_ids:
+        campaign = loader.get_campaign_by_id(campaign_id)
+        assert dict(campaign["daily_performance"]) == dict(expected.get_campaign_by_id(campaign_id)["daily_performance"]), \
+            f"{name}: daily performance of {campaign_id} differs"
+        assert loader.get_latest_performance(campaign_id) == expected.get_latest_performance(campaign_id), \
+            f"{name}: latest performance of {campaign_id} differs"
+        pd.testing.assert_frame_equal(loader.get_campaign_performance_df(campaign_id),
+                                      expected.get_campaign_performance_df(campaign_id))
+    
+    for window in ("latest", "7d", "30d", "all"):
+        summary, expected_summary = loader.get_performance_summary(window), expected.get_performance_summary(window)
+        assert summary.keys() == expected_summary.keys(), f"{name}: {window} summary fields differ"
+        for key, value in expected_summary.items():
+            if isinstance(value, float):
+                assert abs(summary[key] - value) <= 1e-6 * max(1, abs(value)), f"{name}: {window} {key} differs"
+            else:
+                assert summary[key] == value, f"{name}: {window} {key} differs"
+    
+    pd.testing.assert_frame_equal(loader.get_all_performance_df(), expected.get_all_performance_df(),
+                                  check_categorical=False)
+    end = expected.get_performance_summary("all")["end_date"]
+    pd.testing.assert_frame_equal(loader.get_performance_range(campaign_ids[::-1], end=end),
+                                  expected.get_performance_range(campaign_ids[::-1], end=end))
+    for metric in ("roas", "spend", "ctr"):
+        assert [row["campaign_id"] for row in loader.rank_campaigns(metric)] == \
+            [row["campaign_id"] for row in expected.rank_campaigns(metric)], f"{name}: {metric} ranking differs"
+    pd.testing.assert_frame_equal(loader.get_rolling_metrics(), expected.get_rolling_metrics())
+    assert loader.get_anomalies() == expected.get_anomalies(), f"{name}: anomalies differ"
+
+def test_backend_parity():
+    """Test that SQLite and Parquet loaders match the JSON loader"""
+    print("🚀 Testing SQLite and Parquet Backend Parity\n")
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            expected, backends = build_backends(tmp)
+            for name, loader in backends.items():
+                print(f"📊 Backend: {name}...")
+                assert_same_accessors(expected, loader, name)
+                print(f"✅ {name} accessors match the JSON loader")
+        
+        print("\n🎉 Backend parity test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Backend parity test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_sqlite_ingest_parity():
+    """Test that ingesting into the SQLite backend keeps it in line with the JSON loader and other readers"""
+    print("🚀 Testing SQLite Ingest Parity\n")
+    
+    try:
+        import pandas as pd
+        from data_loader import CampaignDataLoader
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            expected, backends = build_backends(tmp)
+            loader = backends["sqlite"]
+            other = CampaignDataLoader(data_path=loader.data_path)
+            assert_same_accessors(expected, other, "sqlite reader")
+            
+            end = expected.get_performance_summary("all")["end_date"]
+            new_day = str((pd.Timestamp(end) + pd.Timedelta(days=1)).date())
+            rows = [{"campaign_id": campaign["id"], "date": new_day, "impressions": 1000, "clicks": 10, "spend": 99.0,
+                     "conversions": 3, "ctr": 1.0, "cpm": 99.0, "cpc": 9.9, "roas": 1.5}
+                    for campaign in expected.get_all_campaigns()]
+            expected.ingest_daily(rows)
+            loader.ingest_daily(rows)
+            assert_same_accessors(expected, loader, "sqlite")
+            print("✅ Ingesting loader matches the JSON loader")
+            
+            # A second loader on the same database drops its cached analytics and sees the new day
+            assert other.get_performance_summary("7d")["end_date"] == new_day, "other reader kept stale aggregates"
+            assert_same_accessors(expected, other, "sqlite reader")
+            print("✅ Another loader on the database sees the ingested day")
+        
+        print("\n🎉 SQLite ingest parity test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ SQLite ingest parity test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_unusable_database():
+    """Test that a missing or corrupt database serves empty data like a missing JSON file"""
+    print("🚀 Testing Missing and Corrupt SQLite Databases\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            empty = CampaignDataLoader(data_path=os.path.join(tmp, "missing.json"))
+            corrupt_path = os.path.join(tmp, "corrupt.db")
+            with open(corrupt_path, 'w') as f:
+                f.write("not a database")
+            
+            for name, path in (("missing", os.path.join(tmp, "missing.db")), ("corrupt", corrupt_path)):
+                loader = CampaignDataLoader(data_path=path)
+                for window in ("latest", "7d", "all"):
+                    assert loader.get_performance_summary(window) == empty.get_performance_summary(window), \
+                        f"{name}: {window} summary differs from an empty source"
+                assert loader.get_all_performance_df().empty and loader.get_rolling_metrics().empty, \
+                    f"{name}: performance frames not empty"
+                assert loader.rank_campaigns("roas") == [] and loader.get_anomalies() == [], f"{name}: rankings not empty"
+                assert loader.ingest_daily([{"campaign_id": "camp_001", "date": "2024-12-01"}])["ingested"] == [], \
+                    f"{name}: ingest into a missing database"
+                print(f"✅ {name} database serves empty data")
+        
+        print("\n🎉 Unusable database test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Unusable database test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_extra_metrics():
+    """Test that metrics beyond the default set survive the SQLite and Parquet builds and SQLite ingests"""
+    print("🚀 Testing Extra Metrics\n")
+    
+    try:
+        import pandas as pd
+        
+        with open(DATA_PATH, 'r') as f:
+            campaigns_data = json.load(f)
+        for campaign in campaigns_data["campaigns"]:
+            for metrics in campaign["daily_performance"].values():
+                metrics["approved_conversions"] = metrics["conversions"] // 2
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            expected, backends = build_backends(tmp, campaigns_data)
+            for name, loader in backends.items():
+                assert_same_accessors(expected, loader, name)
+                print(f"✅ {name} keeps the extra metric")
+            loader = backends["sqlite"]
+            
+            end = expected.get_performance_summary("all")["end_date"]
+            new_day = str((pd.Timestamp(end) + pd.Timedelta(days=1)).date())
+            rows = [{"campaign_id": campaign["id"], "date": new_day, "impressions": 1000, "spend": 99.0,
+                     "video_views": 250.0} for campaign in campaigns_data["campaigns"]]
+            expected.ingest_daily(rows)
+            loader.ingest_daily(rows)
+            assert "video_views" in loader.sql_store.metric_names, "new metric dropped on ingest"
+            assert_same_accessors(expected, loader, "sqlite")
+            print("✅ New metric added as a column on ingest")
+            
+            version = loader.sql_store.version
+            try:
+                loader.ingest_daily([{"campaign_id": rows[0]["campaign_id"], "date": new_day, "bad name": 1}])
+                raise AssertionError("metric name that is not an identifier was accepted")
+            except ValueError:
+                pass
+            assert loader.sql_store.version == version, "rejected ingest changed the database"
+            print("✅ Metric names that are not identifiers are rejected")
+        
+        print("\n🎉 Extra metrics test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Extra metrics test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_sqlite_version_cache():
+    """Test that the SQLite data version is cached between writes yet follows writes by other stores"""
+    print("🚀 Testing SQLite Version Cache\n")
+    
+    try:
+        from sqlite_store import SQLiteCampaignStore
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            _, backends = build_backends(tmp)
+            store = backends["sqlite"].sql_store
+            queries = []
+            query = store._query
+            store._query = lambda *args: queries.append(args[0]) or query(*args)
+            
+            version = store.version
+            for _ in range(100):
+                assert store.version == version
+            assert len(queries) <= 1, f"{len(queries)} queries for unchanged versions"
+            print("✅ Unchanged version served from the cache")
+            
+            writer = SQLiteCampaignStore(store.db_path)
+            campaign_id = store.headers()[0]["id"]
+            writer.append_daily({campaign_id: {"2030-01-01": {"impressions": 1}}})
+            assert store.version == writer.version == version + 1, "write by another store not seen"
+            print("✅ Write by another store bumps the cached version")
+            writer.close()
+        
+        print("\n🎉 SQLite version cache test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ SQLite version cache test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = (test_backend_parity() and test_sqlite_ingest_parity() and test_unusable_database()
+               and test_extra_metrics() and test_sqlite_version_cache())
+    sys.exit(0 if success else 1)
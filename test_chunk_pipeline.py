@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Chunk Pipeline Test for Meta Ads RAG Demo
+Tests that streamed chunks and chunk batches match the chunks create_all_chunks builds
+"""
+
+import sys
+sys.path.append('src')
+
+DATA_PATH = "data/demo/campaigns.json"
+
+def test_streamed_chunks():
+    """Test that iter_chunks yields the chunks of every create_* method, in order, without keeping them"""
+    print("🚀 Testing Streamed Chunks\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        from data_chunker import CampaignDataChunker
+        
+        loader = CampaignDataLoader(data_path=DATA_PATH)
+        chunker = CampaignDataChunker(loader.campaigns_data, loader=loader)
+        for create in (chunker.create_campaign_overview_chunks, chunker.create_daily_performance_chunks,
+                       chunker.create_insights_chunks, chunker.create_comparison_chunks,
+                       chunker.create_trend_chunks, chunker.create_anomaly_chunks,
+                       chunker.create_global_insights_chunks):
+            create()
+        by_type = chunker.chunks
+        
+        chunker = CampaignDataChunker(loader.campaigns_data, loader=loader)
+        streamed = list(chunker.iter_chunks())
+        assert chunker.chunks == [], "iter_chunks kept its chunks"
+        assert streamed == by_type, "streamed chunks differ from the create_* methods"
+        assert streamed == chunker.create_all_chunks(), "streamed chunks differ from create_all_chunks"
+        assert len({chunk["id"] for chunk in streamed}) == len(streamed), "duplicate chunk ids"
+        print(f"✅ {len(streamed)} streamed chunks match create_all_chunks")
+        
+        # A pass reads the loader version current when it started, even if days are ingested meanwhile
+        chunks = chunker.iter_chunks()
+        first = next(chunks)
+        loader.ingest_daily([{"campaign_id": "camp_001", "date": "2025-01-01", "impressions": 5000, "clicks": 60,
+                              "spend": 40.0, "conversions": 3}])
+        assert [first] + list(chunks) == streamed, "a pass started before an ingest saw the ingested day"
+        assert "daily_camp_001_2025-01-01" in [chunk["id"] for chunk in chunker.iter_chunks()], \
+            "a pass started after an ingest missed the ingested day"
+        print("✅ Each pass reads one loader version")
+        
+        print("\n🎉 Streamed chunks test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Streamed chunks test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_chunk_batches():
+    """Test that chunk batches hold batch_size chunks each and add up to the streamed chunks"""
+    print("🚀 Testing Chunk Batches\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        from data_chunker import CampaignDataChunker, batched
+        
+        loader = CampaignDataLoader(data_path=DATA_PATH)
+        chunker = CampaignDataChunker(loader.campaigns_data, loader=loader)
+        streamed = list(chunker.iter_chunks())
+        
+        for batch_size in (1, 7, len(streamed), len(streamed) + 5):
+            batches = list(chunker.iter_chunk_batches(batch_size))
+            assert [chunk for batch in batches for chunk in batch] == streamed, f"batches of {batch_size} differ"
+            assert all(len(batch) == batch_size for batch in batches[:-1]) and 0 < len(batches[-1]) <= batch_size, \
+                f"uneven batches of {batch_size}"
+        print(f"✅ Batches of 1 to {len(streamed) + 5} chunks add up to the {len(streamed)} streamed chunks")
+        
+        try:
+            next(batched(streamed, 0))
+            raise AssertionError("batch size 0 accepted")
+        except ValueError:
+            pass
+        assert list(batched([], 3)) == [], "empty input gave a batch"
+        print("✅ Invalid batch sizes refused, empty input gives no batches")
+        
+        print("\n🎉 Chunk batches test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Chunk batches test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = test_streamed_chunks() and test_chunk_batches()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Conversion Equivalence Test for Meta Ads RAG Demo
+Tests that the converters match per-row reference conversions, and that streamed, multi-file and incremental
+conversions of data/real/data.csv match a full one-pass conversion
+"""
+
+import sys
+import os
+import re
+import json
+import tempfile
+sys.path.append('src')
+sys.path.append('scripts')
+
+SOURCE_CSV = "data/real/data.csv"
+
+def rounded(value):
+    """
+    Value with floats (also those inside strings) rounded to 6 decimals
+    
+    Some source rows have fractional counts, whose sums differ in the last
+    digits depending on how rows are split across chunks.
+    """
+    if isinstance(value, dict):
+        return {key: rounded(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [rounded(item) for item in value]
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, str):
+        return re.sub(r"\d[\d,]*\.\d+", lambda m: f"{float(m.group().replace(',', '')):.6f}", value)
+    return value
+
+def conversion_outputs(output_json):
+    """
+    Converted campaigns JSON (floats rounded) and the ad-level audience breakdown
+    
+    The processing timestamp, generation id and fact file names differ between
+    runs and are left out.
+    """
+    from data_loader import CampaignDataLoader
+    with open(output_json, 'r') as f:
+        data = rounded(json.load(f))
+    for key in ("processed_date", "conversion_generation", "ad_fact_files"):
+        data["global_insights"].pop(key, None)
+    breakdown = CampaignDataLoader(data_path=output_json).get_audience_breakdown(by=("age", "gender", "interest"))
+    return data, breakdown
+
+def output_files(output_json):
+    """Files next to output_json with their modification time and content"""
+    directory = os.path.dirname(output_json)
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), 'rb') as f:
+            files[name] = (os.fstat(f.fileno()).st_mtime_ns, f.read())
+    return files
+
+def fail(*args):
+    """Stand-in for an output writer that fails"""
+    raise OSError("disk full")
+
+def split_by_date(tmp, cut, overlap=50):
+    """Write the source rows up to cut and those after it (plus overlap already-converted rows) as two CSVs"""
+    import pandas as pd
+    df = pd.read_csv(SOURCE_CSV, dtype=str)
+    dates = pd.to_datetime(df["reporting_start"], format="%d/%m/%Y")
+    earlier, later = df[dates <= cut], df[dates > cut]
+    paths = os.path.join(tmp, "earlier.csv"), os.path.join(tmp, "later.csv")
+    earlier.to_csv(paths[0], index=False)
+    pd.concat([earlier.tail(overlap), later]).to_csv(paths[1], index=False)
+    return paths
+
+def unordered_targeting(data):
+    """
+    Campaigns with targeting values as sets
+    
+    Targeting lists follow first appearance in the input, which differs when days
+    arrive in separate runs; interests are cut to MAX_INTERESTS, so only their count is kept.
+    """
+    campaigns = json.loads(json.dumps(data["campaigns"]))
+    for campaign in campaigns:
+        targeting = campaign["targeting"]
+        targeting["age_ranges"] = sorted(targeting["age_ranges"])
+        targeting["genders"] = sorted(targeting["genders"])
+        targeting["interests"] = len(targeting["interests"])
+    return {**data, "campaigns": campaigns}
+
+def reference_campaigns(input_csv):
+    """Campaign totals, targeting and daily performance by looping over campaign and date groups of the CSV"""
+    import pandas as pd
+    from datetime import datetime
+    df = pd.read_csv(input_csv)
+    campaigns = {}
+    for campaign_id, campaign_data in df.groupby("campaign_id"):
+        interests = set()
+        for _, row in campaign_data.iterrows():
+            for column in ("interest1", "interest2", "interest3"):
+                if pd.notna(row[column]):
+                    interests.add(str(int(row[column])))
+        daily_performance = {}
+        for start_date, daily_data in campaign_data.groupby("reporting_start"):
+            day_impressions = daily_data["impressions"].sum()
+            day_clicks = daily_data["clicks"].sum()
+            day_spend = daily_data["spent"].sum()
+            day_conversions = daily_data["total_conversion"].sum()
+            daily_performance[datetime.strptime(start_date, "%d/%m/%Y").strftime("%Y-%m-%d")] = {
+                "impressions": int(day_impressions),
+                "clicks": int(day_clicks),
+                "spend": round(day_spend, 2),
+                "conversions": int(day_conversions),
+                "ctr": round(day_clicks / day_impressions * 100, 2) if day_impressions > 0 else 0,
+                "cpm": round(day_spend / day_impressions * 1000, 2) if day_impressions > 0 else 0,
+                "cpc": round(day_spend / day_clicks, 2) if day_clicks > 0 else 0,
+                "roas": round(day_conversions * 50 / day_spend, 2) if day_spend > 0 else 0,
+                "frequency": round(day_impressions / (day_impressions * 0.7), 2),
+                "reach": int(day_impressions * 0.7)
+            }
+        campaigns[f"real_camp_{campaign_id}"] = {
+            "daily_budget": round(campaign_data["spent"].sum() / len(campaign_data) * 10, 2),
+            "age_ranges": set(campaign_data["age"]),
+            "genders": set(campaign_data["gender"]),
+            "interests": interests,
+            "daily_performance": daily_performance
+        }
+    return campaigns
+
+def kaggle_csv(path, rows=50, seed=5):
+    """Kaggle-style CSV mixing lowercase and capitalized columns, with some performance columns missing"""
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        "impressions": rng.integers(100, 50000, rows),
+        "Clicks": rng.uniform(0, 900, rows).round(1),
+        "spend": rng.uniform(1, 400, rows).round(2),
+        "CTR": rng.uniform(0.1, 5, rows).round(3),
+        "cpm": rng.uniform(2, 40, rows),
+        "Reach": rng.integers(50, 30000, rows),
+        "ad_name": [f"Ad {i}" for i in range(rows)]
+    }).to_csv(path, index=False)
+
+def reference_kaggle_performance(input_csv):
+    """Daily performance of each Kaggle row, looked up per row with fallbacks to the default values"""
+    import pandas as pd
+    performance = {}
+    for idx, row in pd.read_csv(input_csv).iterrows():
+        performance[f"kaggle_{idx}"] = {
+            "impressions": int(row.get('impressions', row.get('Impressions', 1000))),
+            "clicks": int(row.get('clicks', row.get('Clicks', 30))),
+            "spend": float(row.get('spend', row.get('Spend', 25.0))),
+            "conversions": int(row.get('conversions', row.get('Conversions', 2))),
+            "ctr": float(row.get('ctr', row.get('CTR', 3.0))),
+            "cpm": float(row.get('cpm', row.get('CPM', 25.0))),
+            "cpc": float(row.get('cpc', row.get('CPC', 0.83))),
+            "roas": float(row.get('roas', row.get('ROAS', 3.0))),
+            "frequency": float(row.get('frequency', row.get('Frequency', 1.5))),
+            "reach": int(row.get('reach', row.get('Reach', 667)))
+        }
+    return performance
+
+def reference_breakdown(by, campaign_ids=None, start=None, end=None):
+    """Breakdown sums by grouping the raw CSV rows with pandas, interests melted into one column"""
+    import pandas as pd
+    df = pd.read_csv(SOURCE_CSV, dtype={"campaign_id": str, "age": str, "gender": str})
+    df["campaign_id"] = "real_camp_" + df["campaign_id"]
+    df["date"] = pd.to_datetime(df["reporting_start"], format="%d/%m/%Y")
+    if campaign_ids is not None:
+        df = df[df["campaign_id"].isin(campaign_ids)]
+    if start is not None:
+        df = df[df["date"] >= start]
+    if end is not None:
+        df = df[df["date"] <= end]
+    if "interest" in by:
+        df = df.melt(id_vars=[c for c in df.columns if not c.startswith("interest")], value_name="interest").dropna(
+            subset=["interest"])
+        df["interest"] = df["interest"].astype(int).astype(str)
+    grouped = df.groupby(list(by))
+    sums = grouped[["impressions", "clicks", "spent", "total_conversion", "approved_conversion"]].sum()
+    sums["ads"] = grouped.size()
+    return {key if isinstance(key, tuple) else (key,): row for key, row in sums.to_dict("index").items()}
+
+def test_streamed_conversion():
+    """Test that chunked and multi-file conversions write the same output as a one-pass conversion"""
+    print("🚀 Testing Streamed and Multi-File Conversion\n")
+    
+    try:
+        import pandas as pd
+        from convert_real_data import convert_real_csv_to_rag_format
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            full_json = os.path.join(tmp, "full", "campaigns.json")
+            assert convert_real_csv_to_rag_format(SOURCE_CSV, full_json), "full conversion failed"
+            full, full_facts = conversion_outputs(full_json)
+            
+            print("📊 Chunked conversion...")
+            import convert_real_data
+            import parquet_store
+            from data_loader import CampaignDataLoader
+            # Small buffers, so chunk aggregates are regrouped mid-run and the Parquet dataset has several row groups
+            defaults = convert_real_data.REGROUP_ROWS, parquet_store.CAMPAIGN_BLOCK
+            convert_real_data.REGROUP_ROWS, parquet_store.CAMPAIGN_BLOCK = 100, 2
+            chunked_json = os.path.join(tmp, "chunked", "campaigns.json")
+            parquet_dir = os.path.join(tmp, "chunked", "parquet")
+            try:
+                assert convert_real_csv_to_rag_format(SOURCE_CSV, chunked_json, parquet_dir, chunksize=200), \
+                    "chunked conversion failed"
+            finally:
+                convert_real_data.REGROUP_ROWS, parquet_store.CAMPAIGN_BLOCK = defaults
+            chunked, chunked_facts = conversion_outputs(chunked_json)
+            assert chunked == full, "chunked output differs from the full conversion"
+            pd.testing.assert_frame_equal(chunked_facts, full_facts)
+            assert not [name for name in os.listdir(os.path.dirname(chunked_json)) if name.startswith((".ad_facts_", ".merging_"))], \
+                "spilled ad facts left behind"
+            # Partials merged on disk give the same rows, in the same order, as one in-memory table
+            from audience_facts import AudienceFactTable, ad_facts_path
+            merged, single = (AudienceFactTable.load(ad_facts_path(path)) for path in (chunked_json, full_json))
+            assert merged.dictionaries == single.dictionaries, "merged fact dictionaries differ"
+            for name, values in single.columns.items():
+                assert (merged.columns[name] == values).all(), f"merged fact column {name} differs"
+            print(f"✅ Chunked output matches ({len(full['campaigns'])} campaigns)")
+            
+            expected = CampaignDataLoader(data_path=full_json)
+            loader = CampaignDataLoader(data_path=parquet_dir)
+            assert [dict(c["daily_performance"]) for c in loader.get_all_campaigns()] == \
+                [dict(c["daily_performance"]) for c in expected.get_all_campaigns()], "Parquet daily rows differ"
+            pd.testing.assert_frame_equal(loader.get_all_performance_df(), expected.get_all_performance_df(),
+                                          check_categorical=False)
+            print("✅ Streamed Parquet dataset matches the JSON output")
+            
+            # The output directory loads as a data source despite the sidecar files next to the JSON
+            loader = CampaignDataLoader(data_path=os.path.dirname(chunked_json))
+            assert len(loader.get_all_campaigns()) == len(full["campaigns"]), "output directory did not load"
+            print("✅ Output directory loads as a data source")
+            
+            print("📊 Multi-file conversion...")
+            df = pd.read_csv(SOURCE_CSV, dtype=str)
+            parts = []
+            for i in range(3):
+                parts.append(os.path.join(tmp, f"part{i}.csv"))
+                df.iloc[i::3].to_csv(parts[-1], index=False)
+            multi_json = os.path.join(tmp, "multi", "campaigns.json")
+            assert convert_real_csv_to_rag_format(parts, multi_json, max_workers=2), "multi-file conversion failed"
+            multi, multi_facts = conversion_outputs(multi_json)
+            assert unordered_targeting(multi) == unordered_targeting(full), "multi-file output differs from the full conversion"
+            pd.testing.assert_frame_equal(multi_facts, full_facts)
+            print("✅ Multi-file output matches")
+        
+        print("\n🎉 Streamed conversion test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Streamed conversion test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_incremental_conversion():
+    """Test that appending later days incrementally gives the same output as converting everything at once"""
+    print("🚀 Testing Incremental Conversion\n")
+    
+    try:
+        import shutil
+        import pandas as pd
+        from convert_real_data import convert_real_csv_to_rag_format, aggregates_path
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            full_json = os.path.join(tmp, "full", "campaigns.json")
+            assert convert_real_csv_to_rag_format(SOURCE_CSV, full_json), "full conversion failed"
+            full, full_facts = conversion_outputs(full_json)
+            
+            earlier_csv, later_csv = split_by_date(tmp, "2017-08-24")
+            incremental_json = os.path.join(tmp, "incremental", "campaigns.json")
+            assert convert_real_csv_to_rag_format(earlier_csv, incremental_json, incremental=True), "first run failed"
+            first_run = output_files(incremental_json)
+            first_aggregates = os.path.join(tmp, "first_run.aggregates")
+            shutil.copyfile(aggregates_path(incremental_json), first_aggregates)
+            assert convert_real_csv_to_rag_format(later_csv, incremental_json, incremental=True, chunksize=200), \
+                "incremental run failed"
+            appended = output_files(incremental_json)
+            assert len(appended) == len(first_run) + 1, "incremental run did not add one fact file"
+            for name, stored in first_run.items():
+                if "ad_facts" in name:
+                    assert appended[name] == stored, f"incremental run rewrote {name}"
+            print("✅ Incremental run appends a fact file and leaves the earlier one alone")
+            incremental, incremental_facts = conversion_outputs(incremental_json)
+            assert unordered_targeting(incremental) == unordered_targeting(full), \
+                "incremental output differs from the full conversion"
+            pd.testing.assert_frame_equal(incremental_facts, full_facts)
+            print(f"✅ Incremental output matches ({len(full['campaigns'])} campaigns)")
+            
+            # Re-running with rows that are all converted already changes nothing
+            assert convert_real_csv_to_rag_format(later_csv, incremental_json, incremental=True), "re-run failed"
+            rerun, rerun_facts = conversion_outputs(incremental_json)
+            assert rerun == incremental, "re-running the incremental conversion changed the output"
+            pd.testing.assert_frame_equal(rerun_facts, incremental_facts)
+            assert output_files(incremental_json).keys() == appended.keys(), "re-run changed the output files"
+            print("✅ Re-run with converted rows leaves the output unchanged")
+            
+            # A run failing before its outputs are complete leaves the previous ones in place
+            import convert_real_data
+            before = output_files(incremental_json)
+            write_aggregates = convert_real_data.write_aggregates
+            convert_real_data.write_aggregates = fail
+            try:
+                assert not convert_real_csv_to_rag_format(later_csv, incremental_json, incremental=True), \
+                    "failing run reported success"
+            finally:
+                convert_real_data.write_aggregates = write_aggregates
+            assert output_files(incremental_json) == before, "failed run changed the output"
+            print("✅ Failed run leaves the output and no staged files behind")
+            
+            # Aggregates left behind by a run interrupted between the moves are refused
+            shutil.copyfile(first_aggregates, aggregates_path(incremental_json))
+            before = output_files(incremental_json)
+            assert not convert_real_csv_to_rag_format(later_csv, incremental_json, incremental=True), \
+                "run on mismatched aggregates reported success"
+            assert output_files(incremental_json) == before, "refused run changed the output"
+            print("✅ Aggregates from another generation are refused")
+        
+        print("\n🎉 Incremental conversion test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Incremental conversion test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_vectorized_conversion():
+    """Test that the groupby-based conversion matches looping over campaign and date groups of the CSV"""
+    print("🚀 Testing Vectorized Conversion\n")
+    
+    try:
+        import math
+        from convert_real_data import convert_real_csv_to_rag_format, MAX_INTERESTS
+        
+        expected = reference_campaigns(SOURCE_CSV)
+        with tempfile.TemporaryDirectory() as tmp:
+            output_json = os.path.join(tmp, "campaigns.json")
+            assert convert_real_csv_to_rag_format(SOURCE_CSV, output_json), "conversion failed"
+            with open(output_json, 'r') as f:
+                campaigns = {campaign["id"]: campaign for campaign in json.load(f)["campaigns"]}
+        
+        assert campaigns.keys() == expected.keys(), "converted campaign ids differ"
+        days = 0
+        for campaign_id, reference in expected.items():
+            campaign = campaigns[campaign_id]
+            targeting = campaign["targeting"]
+            assert set(targeting["age_ranges"]) == reference["age_ranges"], f"{campaign_id}: ages differ"
+            assert set(targeting["genders"]) == reference["genders"], f"{campaign_id}: genders differ"
+            assert set(targeting["interests"]) <= reference["interests"] and \
+                len(targeting["interests"]) == min(MAX_INTERESTS, len(reference["interests"])), \
+                f"{campaign_id}: interests differ"
+            assert math.isclose(campaign["budget"]["daily_budget"], reference["daily_budget"], abs_tol=0.011)
+            
+            daily = campaign["daily_performance"]
+            assert list(daily) == sorted(reference["daily_performance"]), f"{campaign_id}: dates differ"
+            for date, metrics in reference["daily_performance"].items():
+                assert daily[date].keys() == metrics.keys(), f"{campaign_id} {date}: metric names differ"
+                for name, value in metrics.items():
+                    assert math.isclose(daily[date][name], value, abs_tol=0.011), \
+                        f"{campaign_id} {date} {name}: {daily[date][name]} != {value}"
+            days += len(daily)
+        print(f"✅ {len(campaigns)} campaigns and {days} campaign-days match the grouped loop")
+        
+        print("\n🎉 Vectorized conversion test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Vectorized conversion test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_kaggle_conversion():
+    """Test that the column-wise Kaggle conversion matches per-row lookups, whole and in chunks"""
+    print("🚀 Testing Kaggle Conversion\n")
+    
+    try:
+        from convert_kaggle_data import convert_kaggle_to_rag_format
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, "kaggle.csv")
+            kaggle_csv(input_csv)
+            expected = reference_kaggle_performance(input_csv)
+            
+            outputs = []
+            for chunksize in (None, 7):
+                output_json = os.path.join(tmp, f"campaigns_{chunksize}.json")
+                assert convert_kaggle_to_rag_format(input_csv, output_json, chunksize), "conversion failed"
+                with open(output_json, 'r') as f:
+                    data = json.load(f)
+                campaigns = data["campaigns"]
+                assert [c["id"] for c in campaigns] == list(expected), f"chunksize {chunksize}: campaign ids differ"
+                for campaign in campaigns:
+                    performance = campaign["daily_performance"]["2024-01-01"]
+                    assert performance == expected[campaign["id"]], f"{campaign['id']}: performance differs"
+                    assert type(performance["clicks"]) is int and type(performance["spend"]) is float
+                assert data["global_insights"]["total_campaigns"] == len(expected)
+                outputs.append(campaigns)
+            assert outputs[0] == outputs[1], "chunked conversion differs"
+            print(f"✅ {len(expected)} rows match per-row lookups, whole and in chunks of 7")
+        
+        print("\n🎉 Kaggle conversion test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Kaggle conversion test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_audience_breakdown():
+    """Test that ad-level breakdowns of the converted data match grouping the CSV rows with pandas"""
+    print("🚀 Testing Audience Breakdown\n")
+    
+    try:
+        import math
+        from convert_real_data import convert_real_csv_to_rag_format
+        from data_loader import CampaignDataLoader
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            output_json = os.path.join(tmp, "campaigns.json")
+            assert convert_real_csv_to_rag_format(SOURCE_CSV, output_json), "conversion failed"
+            loader = CampaignDataLoader(data_path=output_json)
+            
+            queries = [
+                (("age", "gender"), ["real_camp_916"], "2017-08-18", "2017-08-25"),
+                (("interest",), None, None, None),
+                (("gender", "interest"), ["real_camp_936", "real_camp_1178"], "2017-08-20", None)
+            ]
+            for by, campaign_ids, start, end in queries:
+                frame = loader.get_audience_breakdown(campaign_ids, by=by, start=start, end=end)
+                expected = reference_breakdown(by, campaign_ids, start, end)
+                groups = {tuple(row[list(by)]): row for _, row in frame.iterrows()}
+                assert groups.keys() == expected.keys(), f"{by}: groups differ"
+                for key, sums in expected.items():
+                    row = groups[key]
+                    assert row["ads"] == sums["ads"], f"{by} {key}: ad count differs"
+                    for name, column in (("impressions", "impressions"), ("clicks", "clicks"), ("spend", "spent"),
+                                         ("conversions", "total_conversion"),
+                                         ("approved_conversions", "approved_conversion")):
+                        assert math.isclose(row[name], sums[column], rel_tol=1e-9, abs_tol=1e-9), \
+                            f"{by} {key}: {name} {row[name]} != {sums[column]}"
+                print(f"✅ {' x '.join(by)} breakdown of {campaign_ids or 'all campaigns'}: {len(groups)} groups match")
+            
+            start, end = loader.resolve_time_filter({"days": 3})
+            assert loader.get_audience_breakdown(by="age", time_filter={"days": 3}).equals(
+                loader.get_audience_breakdown(by="age", start=start, end=end)), "time filter not applied"
+            print(f"✅ Time filter resolves to {start}..{end}")
+        
+        print("\n🎉 Audience breakdown test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Audience breakdown test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = (test_vectorized_conversion() and test_kaggle_conversion() and test_audience_breakdown()
+               and test_streamed_conversion() and test_incremental_conversion())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Ingest Refresh Test for Meta Ads RAG Demo
+Tests that chunks and vector store documents built after ingest_daily include the newly ingested days
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append('src')
+
+def new_day_rows(campaigns_data):
+    """One row per campaign for the day after the latest reporting day"""
+    import pandas as pd
+    last = max(max(c["daily_performance"]) for c in campaigns_data["campaigns"])
+    new_day = str((pd.Timestamp(last) + pd.Timedelta(days=1)).date())
+    rows = [{"campaign_id": c["id"], "date": new_day, "impressions": 1000, "clicks": 10, "spend": 99.0,
+             "conversions": 3, "ctr": 1.0, "cpm": 99.0, "cpc": 9.9, "roas": 1.5}
+            for c in campaigns_data["campaigns"]]
+    return new_day, rows
+
+def test_chunks_after_ingest():
+    """Test that a chunker rebuild after ingest_daily sees the ingested days in every mode"""
+    print("🚀 Testing Chunk Refresh After Daily Ingest\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        from data_chunker import CampaignDataChunker
+        
+        with open("data/demo/campaigns.json", 'r') as f:
+            campaigns_data = json.load(f)
+        new_day, rows = new_day_rows(campaigns_data)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, "campaigns.json")
+            with open(data_path, 'w') as f:
+                json.dump(campaigns_data, f)
+            
+            for mode, options in (("dict", {}), ("compact", {"compact": True}), ("lazy", {"lazy": True})):
+                print(f"📊 Mode: {mode}...")
+                loader = CampaignDataLoader(data_path=data_path, **options)
+                chunker = CampaignDataChunker(loader.campaigns_data, loader=loader)
+                before = len(chunker.create_all_chunks())
+                
+                # A pass started before the ingest keeps reading its version
+                pinned_pass = chunker.iter_chunks()
+                first = next(pinned_pass)
+                result = loader.ingest_daily(rows)
+                pinned_ids = {first["id"]} | {chunk["id"] for chunk in pinned_pass}
+                assert f"daily_{rows[0]['campaign_id']}_{new_day}" not in pinned_ids, "pinned pass saw the ingest"
+                
+                incremental = chunker.create_incremental_chunks(result["ingested"])
+                chunks = chunker.create_all_chunks()
+                ids = {chunk["id"] for chunk in chunks}
+                assert len(chunks) == before + len(rows), f"expected {before + len(rows)} chunks, got {len(chunks)}"
+                assert all(f"daily_{row['campaign_id']}_{new_day}" in ids for row in rows), "ingested days missing"
+                print(f"✅ {before} → {len(chunks)} chunks, ingested days included")
+                
+                # Chunks built from the ingested days alone match the same chunks of a full rebuild
+                by_id = {chunk["id"]: chunk for chunk in chunks}
+                kinds = {chunk["metadata"]["chunk_type"] for chunk in incremental}
+                assert {"daily_performance", "campaign_trends"} <= kinds, f"incremental chunk types {sorted(kinds)}"
+                assert all(by_id[chunk["id"]] == chunk for chunk in incremental), "incremental chunks differ from a rebuild"
+                print(f"✅ {len(incremental)} incremental chunks ({', '.join(sorted(kinds))}) match the rebuild")
+        
+        print("\n🎉 Chunk refresh test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Chunk refresh test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_vectorstore_after_ingest():
+    """Test that ingesting upserts documents by stable id into an index built before"""
+    print("🚀 Testing Vector Store Refresh After Daily Ingest\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        from rag_processor import CampaignRAGProcessor
+        
+        with open("data/demo/campaigns.json", 'r') as f:
+            campaigns_data = json.load(f)
+        new_day, rows = new_day_rows(campaigns_data)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, "campaigns.json")
+            with open(data_path, 'w') as f:
+                json.dump(campaigns_data, f)
+            
+            for streamed in (True, False):
+                print(f"📊 {'Streamed' if streamed else 'Split'} index...")
+                processor = CampaignRAGProcessor()
+                processor.campaign_loader = CampaignDataLoader(data_path=data_path)
+                if not streamed:
+                    processor.split_documents()
+                store = processor.create_mock_vectorstore()
+                before = len(store.documents)
+                
+                processor.ingest_daily(rows)
+                after = len(store.documents)
+                processor.ingest_daily(rows)
+                ids = [doc.metadata["chunk_id"] for doc in store.documents]
+                
+                assert len(ids) == len(set(ids)) == after, "duplicate documents in the vector store"
+                assert after == before + len(rows), f"expected {before + len(rows)} documents, got {after}"
+                assert f"daily_{rows[0]['campaign_id']}_{new_day}_0" in ids, "ingested day missing"
+                if not streamed:
+                    chunk_ids = [doc.metadata["chunk_id"] for doc in processor.processed_chunks]
+                    assert len(chunk_ids) == len(set(chunk_ids)) == after, "duplicate processed chunks"
+                print(f"✅ {before} → {after} documents, re-ingest replaced in place")
+                
+                # Re-ingesting with a larger split size leaves no pieces of the earlier, finer split
+                processor.chunk_size, processor.text_splitter = 40, None
+                processor.ingest_daily(rows)
+                fine = len(store.documents)
+                processor.chunk_size, processor.text_splitter = 1000, None
+                processor.ingest_daily(rows)
+                ids = [doc.metadata["chunk_id"] for doc in store.documents]
+                assert fine > after and len(ids) == after, f"{fine} → {len(ids)} documents after re-splitting"
+                assert f"daily_{rows[0]['campaign_id']}_{new_day}_1" not in ids, "stale piece left in the vector store"
+                if not streamed:
+                    assert len(processor.processed_chunks) == after, "stale pieces left in processed chunks"
+                print(f"✅ Coarser re-split dropped {fine - after} stale pieces")
+                
+                # A rebuild over the ingested data gives the same ids
+                processor.campaign_chunker = None
+                rebuilt = rebuilt_ids(processor)
+                assert rebuilt == set(ids), "rebuilt index ids differ from the upserted ones"
+                print(f"✅ Rebuilt index has the same {len(rebuilt)} ids")
+        
+        print("\n🎉 Vector store refresh test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Vector store refresh test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def rebuilt_ids(processor):
+    """Ids of the documents a fresh index over the processor's loader would hold"""
+    return {doc.metadata["chunk_id"] for batch in processor.iter_document_batches() for doc in batch}
+
+if __name__ == "__main__":
+    success = test_chunks_after_ingest() and test_vectorstore_after_ingest()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Ingestion Worker Test for Meta Ads RAG Demo
+Tests that the directory-watching worker ingests dropped exports in bounded batches
+"""
+
+import sys
+import os
+import time
+import tempfile
+sys.path.append('src')
+
+SOURCE_CSV = "data/real/data.csv"
+
+def drop_exports(directory):
+    """Write the source rows as one export per reporting day; returns its campaign-day rows"""
+    import pandas as pd
+    from ingestion_worker import parse_daily_csv
+    os.makedirs(directory)
+    df = pd.read_csv(SOURCE_CSV, dtype=str)
+    for day, rows in df.groupby("reporting_start"):
+        rows.to_csv(os.path.join(directory, f"export_{day.replace('/', '-')}.csv"), index=False)
+    return sorted_rows(parse_daily_csv(SOURCE_CSV))
+
+def sorted_rows(rows):
+    """Campaign-day rows in (campaign, date) order"""
+    return sorted(rows, key=lambda row: (str(row["campaign_id"]), row["date"]))
+
+def test_run_once():
+    """Test that a synchronous pass ingests every export, archiving good files and setting aside bad ones"""
+    print("🚀 Testing Ingestion Worker Single Pass\n")
+    
+    try:
+        from ingestion_worker import IngestionWorker
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            incoming = os.path.join(tmp, "incoming")
+            expected = drop_exports(incoming)
+            files = len(os.listdir(incoming))
+            with open(os.path.join(incoming, "broken.csv"), 'w') as f:
+                f.write("not,an,export\n1,2,3\n")
+            
+            batches = []
+            worker = IngestionWorker(batches.append, incoming, batch_rows=4, archive_dir=os.path.join(tmp, "archive"),
+                                     error_dir=os.path.join(tmp, "errors"))
+            stats = worker.run_once()
+            
+            ingested = [row for batch in batches for row in batch]
+            assert sorted_rows(ingested) == expected, "ingested rows differ from the export's campaign-day rows"
+            assert max(len(batch) for batch in batches) <= 4, "batch larger than batch_rows"
+            assert stats["files_parsed"] == files and stats["files_failed"] == 1, f"unexpected file counts {stats}"
+            assert len(os.listdir(os.path.join(tmp, "archive"))) == files, "ingested files not archived"
+            assert os.listdir(os.path.join(tmp, "errors")) == ["broken.csv"], "broken file not set aside"
+            assert not os.listdir(incoming), "files left in the watched directory"
+            print(f"✅ {len(ingested)} rows from {files} files in {len(batches)} batches, broken file set aside")
+            
+            assert worker.run_once()["files_parsed"] == files, "second pass parsed files again"
+            print("✅ Second pass finds nothing new")
+        
+        print("\n🎉 Single pass test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Single pass test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_background_backpressure():
+    """Test that with a slow ingest callback the queue stays within capacity and no rows are lost"""
+    print("🚀 Testing Ingestion Worker Backpressure\n")
+    
+    try:
+        from ingestion_worker import IngestionWorker
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            incoming = os.path.join(tmp, "incoming")
+            expected = drop_exports(incoming)
+            
+            batches, depths = [], []
+            def slow_ingest(rows):
+                depths.append(worker.queue.qsize())
+                batches.append(rows)
+                time.sleep(0.01)
+            
+            worker = IngestionWorker(slow_ingest, incoming, poll_interval=0.05, queue_size=1, batch_rows=3,
+                                     apply_interval=0.0, archive_dir=os.path.join(tmp, "archive"))
+            worker.start()
+            deadline = time.time() + 60
+            while worker.stats()["rows_ingested"] < len(expected) and time.time() < deadline:
+                time.sleep(0.05)
+            worker.stop()
+            stats = worker.stats()
+            
+            assert sorted_rows([row for batch in batches for row in batch]) == expected, "rows lost or duplicated"
+            assert max(depths) <= 1, f"queue grew to {max(depths)} batches"
+            assert stats["last_lag_seconds"] is not None and stats["queue_depth"] == 0 and not stats["running"]
+            print(f"✅ {stats['rows_ingested']} rows in {stats['batches_ingested']} batches, "
+                  f"parsers blocked {stats['blocked_seconds']:.2f}s, max lag {stats['max_lag_seconds']:.2f}s")
+        
+        print("\n🎉 Backpressure test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Backpressure test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = test_run_once() and test_background_backpressure()
+    sys.exit(0 if success else 1)
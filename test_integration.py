@@ -23,7 +23,7 @@ def test_complete_pipeline():
         # Test 2: Data Chunking
         print("\n📝 Test 2: Data Chunking...")
         from data_chunker import CampaignDataChunker
-        chunker = CampaignDataChunker(loader.campaigns_data)
+        chunker = CampaignDataChunker(loader.campaigns_data, loader=loader)
         chunks = chunker.create_all_chunks()
         print(f"✅ Created {len(chunks)} text chunks")
         
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Loader Analytics Test for Meta Ads RAG Demo
+Tests the loader's columnar accessors against plain computations over the campaign dicts
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append('src')
+
+INDUSTRIES = ["Retail", "Fashion", "Electronics"]
+AUDIENCES = ["Lookalike 1%", "Retargeting"]
+
+def synthetic_campaigns(campaign_count=8, days=90, seed=11):
+    """Campaigns with unsorted date keys, missing days and missing metrics, plus one without history"""
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    dates = [str(d.date()) for d in pd.date_range("2024-01-01", periods=days)]
+    campaigns = []
+    for i in range(campaign_count):
+        daily = {}
+        for d in rng.permutation(days):
+            if rng.random() < 0.1:
+                continue
+            impressions = int(rng.integers(1000, 20000))
+            clicks = int(impressions * rng.uniform(0.005, 0.04))
+            spend = round(float(impressions * rng.uniform(0.005, 0.02)), 2)
+            conversions = int(clicks * rng.uniform(0, 0.2))
+            metrics = {"impressions": impressions, "clicks": clicks, "spend": spend, "conversions": conversions,
+                       "ctr": round(clicks / impressions * 100, 3), "cpm": round(spend / impressions * 1000, 3),
+                       "cpc": round(spend / max(clicks, 1), 3), "roas": round(float(rng.uniform(0.5, 5)), 3)}
+            if rng.random() < 0.1:
+                del metrics["roas"]
+            daily[dates[d]] = metrics
+        campaigns.append({"id": f"camp_{i:03d}", "name": f"Campaign {i}", "industry": INDUSTRIES[i % 3],
+                          "audience": AUDIENCES[i % 2], "status": "PAUSED" if i % 3 == 0 else "ACTIVE",
+                          "daily_performance": daily})
+    campaigns.append({"id": "camp_empty", "name": "No History", "industry": "Retail", "audience": "Broad",
+                      "status": "ACTIVE", "daily_performance": {}})
+    return {"campaigns": campaigns, "global_insights": {}}
+
+def write_campaigns(tmp, campaigns_data):
+    """Write campaigns_data as campaigns.json in tmp and return its path"""
+    data_path = os.path.join(tmp, "campaigns.json")
+    with open(data_path, 'w') as f:
+        json.dump(campaigns_data, f)
+    return data_path
+
+def reference_campaign_df(campaign):
+    """A campaign's daily rows as a DataFrame, built row by row from its dict"""
+    import pandas as pd
+    rows = [{"date": date, "campaign_name": campaign["name"], **metrics}
+            for date, metrics in campaign["daily_performance"].items()]
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows)
+    df["date"] = pd.to_datetime(df["date"])
+    return df.sort_values("date").reset_index(drop=True)
+
+def reference_summary(campaigns, window):
+    """Window totals and date range, by looping over every campaign-day of the dicts"""
+    import numpy as np
+    days = {"latest": None, "7d": 7, "30d": 30, "all": None}[window]
+    all_dates = [date for c in campaigns for date in c["daily_performance"]]
+    end_date = max(all_dates)
+    first_date = str(np.datetime64(end_date) - np.timedelta64(days - 1, "D")) if days else None
+    rows = []
+    for campaign in campaigns:
+        daily = campaign["daily_performance"]
+        if window == "latest":
+            rows.extend((date, daily[date]) for date in daily if date == max(daily))
+        else:
+            rows.extend((date, metrics) for date, metrics in daily.items() if not first_date or date >= first_date)
+    total = lambda name: sum(metrics.get(name, 0) for _, metrics in rows)
+    spend, conversions = total("spend"), total("conversions")
+    return {
+        "total_campaigns": len(campaigns),
+        "active_campaigns": sum(1 for c in campaigns if c["status"] == "ACTIVE"),
+        "total_spend": spend,
+        "total_conversions": conversions,
+        "total_impressions": total("impressions"),
+        "average_roas": conversions * 50 / spend if spend > 0 else 0,
+        "window": window,
+        "start_date": min(date for date, _ in rows),
+        "end_date": end_date
+    }
+
+def assert_summary_equal(summary, expected, label):
+    """Compare performance summaries, allowing float rounding in the sums"""
+    import math
+    assert summary.keys() == expected.keys(), f"{label}: summary keys differ"
+    for key, value in expected.items():
+        if isinstance(value, float):
+            assert math.isclose(summary[key], value, rel_tol=1e-9), f"{label}: {key} {summary[key]} != {value}"
+        else:
+            assert summary[key] == value, f"{label}: {key} {summary[key]} != {value}"
+
+def reference_range(campaigns, campaign_ids, start, end, metrics):
+    """Rows of the given campaigns between two dates, filtered from the dicts"""
+    import pandas as pd
+    by_id = {campaign["id"]: campaign for campaign in campaigns}
+    rows = []
+    for campaign_id in campaign_ids:
+        daily = by_id[campaign_id]["daily_performance"]
+        for date in sorted(daily):
+            if (start is None or date >= start) and (end is None or date <= end):
+                rows.append({"date": pd.Timestamp(date), "campaign_id": campaign_id,
+                             **{name: daily[date].get(name, float("nan")) for name in metrics}})
+    return pd.DataFrame(rows, columns=["date", "campaign_id"] + metrics)
+
+def reference_portfolio_df(campaigns):
+    """All campaigns' daily rows as one DataFrame, built row by row from the dicts"""
+    import pandas as pd
+    rows = [{"date": date, "campaign_id": c["id"], "campaign_name": c["name"], "industry": c.get("industry"),
+             "audience": c.get("audience"), "status": c.get("status"), **metrics}
+            for c in campaigns for date, metrics in c["daily_performance"].items()]
+    df = pd.DataFrame(rows)
+    df["date"] = pd.to_datetime(df["date"])
+    return df.sort_values(["campaign_id", "date"]).reset_index(drop=True)
+
+def reference_rolling(campaign, metric):
+    """Rolling statistics of one metric, from pandas rolling windows over a daily calendar"""
+    import numpy as np
+    import pandas as pd
+    daily = campaign["daily_performance"]
+    values = pd.Series({pd.Timestamp(date): m.get(metric, np.nan) for date, m in daily.items()}, dtype=float)
+    values = values.sort_index()
+    calendar = values.reindex(pd.date_range(values.index.min(), values.index.max()))
+    ma7 = calendar.rolling(7, min_periods=1).mean()
+    ma30 = calendar.rolling(30, min_periods=1).mean()
+    pct = lambda current, previous: ((current - previous) / previous.abs() * 100).where(previous != 0)
+    frame = pd.DataFrame({
+        metric: calendar,
+        f"{metric}_ma7": ma7,
+        f"{metric}_ma30": ma30,
+        f"{metric}_dod_pct": pct(calendar, calendar.shift(1)),
+        f"{metric}_wow_pct": pct(ma7, ma7.shift(7)),
+        f"{metric}_mom_pct": pct(ma30, ma30.shift(30))
+    })
+    return frame.loc[values.index]
+
+def test_metrics_store():
+    """Test that per-campaign frames and latest metrics from the columnar store match the campaign dicts"""
+    print("🚀 Testing Columnar Metrics Store\n")
+    
+    try:
+        import pandas as pd
+        from data_loader import CampaignDataLoader
+        
+        campaigns_data = synthetic_campaigns()
+        campaigns = campaigns_data["campaigns"]
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = write_campaigns(tmp, campaigns_data)
+            for mode, options in (("dict", {}), ("compact", {"compact": True}), ("lazy", {"lazy": True})):
+                loader = CampaignDataLoader(data_path=data_path, **options)
+                store = loader.metrics_store
+                assert len(store) == sum(len(c["daily_performance"]) for c in campaigns), f"{mode}: row count differs"
+                
+                for campaign in campaigns:
+                    expected = reference_campaign_df(campaign)
+                    df = loader.get_campaign_performance_df(campaign["id"])
+                    if expected.empty:
+                        assert df.empty, f"{mode}: frame for a campaign without history"
+                        assert loader.get_latest_performance(campaign["id"]) == {}
+                        continue
+                    pd.testing.assert_frame_equal(df, expected, check_like=True, check_dtype=False)
+                    daily = campaign["daily_performance"]
+                    assert loader.get_latest_performance(campaign["id"]) == daily[max(daily)], \
+                        f"{mode}: latest performance of {campaign['id']} differs"
+                print(f"✅ {mode}: {len(store)} rows match the campaign dicts")
+        
+        print("\n🎉 Metrics store test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Metrics store test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_performance_windows():
+    """Test that windowed performance summaries match sums over the campaign dicts, before and after an ingest"""
+    print("🚀 Testing Performance Summary Windows\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        
+        campaigns_data = synthetic_campaigns()
+        campaigns = campaigns_data["campaigns"]
+        updated = json.loads(json.dumps(campaigns))
+        rows = [
+            {"campaign_id": "camp_001", "date": "2024-04-02", "impressions": 5000, "clicks": 90, "spend": 61.5,
+             "conversions": 7},
+            {"campaign_id": "camp_002", "date": "2024-03-30", "impressions": 1200, "clicks": 15, "spend": 12.25,
+             "conversions": 1},
+            {"campaign_id": "camp_003", "date": max(campaigns[3]["daily_performance"]), "impressions": 9000,
+             "clicks": 300, "spend": 140.0, "conversions": 22}
+        ]
+        for row in rows:
+            campaign = next(c for c in updated if c["id"] == row["campaign_id"])
+            campaign["daily_performance"][row["date"]] = {k: v for k, v in row.items() if k not in ("campaign_id", "date")}
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = write_campaigns(tmp, campaigns_data)
+            for mode, options in (("dict", {}), ("compact", {"compact": True}), ("lazy", {"lazy": True})):
+                loader = CampaignDataLoader(data_path=data_path, **options)
+                for window in ("latest", "7d", "30d", "all"):
+                    assert_summary_equal(loader.get_performance_summary(window), reference_summary(campaigns, window),
+                                         f"{mode} {window}")
+                loader.ingest_daily(rows)
+                for window in ("latest", "7d", "30d", "all"):
+                    assert_summary_equal(loader.get_performance_summary(window), reference_summary(updated, window),
+                                         f"{mode} {window} after ingest")
+                print(f"✅ {mode}: every window matches the dicts, before and after ingesting {len(rows)} rows")
+        
+        print("\n🎉 Performance window test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Performance window test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_performance_range():
+    """Test that date-range reads, rankings and time filters match filtering the campaign dicts"""
+    print("🚀 Testing Performance Ranges and Rankings\n")
+    
+    try:
+        import math
+        import numpy as np
+        import pandas as pd
+        from data_loader import CampaignDataLoader
+        
+        campaigns_data = synthetic_campaigns()
+        campaigns = campaigns_data["campaigns"]
+        metrics = ["spend", "conversions", "roas"]
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = write_campaigns(tmp, campaigns_data)
+            for mode, options in (("dict", {}), ("compact", {"compact": True}), ("lazy", {"lazy": True})):
+                loader = CampaignDataLoader(data_path=data_path, **options)
+                for campaign_ids, start, end in ((["camp_004", "camp_001"], "2024-02-10", "2024-02-20"),
+                                                 (["camp_002", "camp_empty"], None, "2024-01-05"),
+                                                 (["camp_003"], "2024-03-29", None)):
+                    expected = reference_range(campaigns, campaign_ids, start, end, metrics)
+                    df = loader.get_performance_range(campaign_ids, start, end, metrics)
+                    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+                    arrays = loader.get_performance_range(campaign_ids, start, end, metrics, as_frame=False)
+                    for campaign_id, rows in expected.groupby("campaign_id", sort=False):
+                        assert list(arrays[campaign_id]["date"].astype(str)) == list(rows["date"].dt.strftime("%Y-%m-%d"))
+                        np.testing.assert_allclose(arrays[campaign_id]["roas"], rows["roas"].to_numpy(), rtol=1e-12)
+                
+                start, end = loader.resolve_time_filter({"period": "last_week", "days": 7})
+                assert (start, end) == ("2024-03-24", "2024-03-30"), f"last week resolved to {start}..{end}"
+                assert loader.resolve_time_filter({"period": "custom"}) == (None, None), "open filter got bounds"
+                
+                for metric in ("spend", "roas"):
+                    frame = reference_range(campaigns, [c["id"] for c in campaigns], start, end, [metric]).dropna()
+                    grouped = frame.groupby("campaign_id", sort=False)[metric]
+                    values = grouped.sum() if metric == "spend" else grouped.mean()
+                    expected = values.sort_values(ascending=False, kind="stable").head(5)
+                    ranked = loader.rank_campaigns(metric, limit=5, time_filter={"days": 7})
+                    assert [r["campaign_id"] for r in ranked] == list(expected.index), f"{mode}: {metric} ranking differs"
+                    for record in ranked:
+                        assert math.isclose(record["value"], expected[record["campaign_id"]], rel_tol=1e-9)
+                        assert record["days"] == int(grouped.size()[record["campaign_id"]])
+                print(f"✅ {mode}: ranges, last-week filter and rankings match the dicts")
+        
+        print("\n🎉 Performance range test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Performance range test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_portfolio_frame():
+    """Test that the portfolio frame holds the dicts' values in categorical and 32-bit columns, cached per version"""
+    print("🚀 Testing Portfolio Performance Frame\n")
+    
+    try:
+        import numpy as np
+        import pandas as pd
+        from data_loader import CampaignDataLoader
+        
+        campaigns_data = synthetic_campaigns(campaign_count=12, days=120)
+        expected = reference_portfolio_df(campaigns_data["campaigns"])
+        header_columns = ["campaign_id", "campaign_name", "industry", "audience", "status"]
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = write_campaigns(tmp, campaigns_data)
+            for mode, options in (("dict", {}), ("compact", {"compact": True}), ("lazy", {"lazy": True})):
+                loader = CampaignDataLoader(data_path=data_path, **options)
+                df = loader.get_all_performance_df()
+                
+                for column in header_columns:
+                    assert isinstance(df[column].dtype, pd.CategoricalDtype), f"{mode}: {column} not categorical"
+                for column in ("impressions", "clicks", "conversions"):
+                    assert df[column].dtype == np.int32, f"{mode}: {column} is {df[column].dtype}"
+                for column in ("spend", "ctr", "cpm", "cpc", "roas"):
+                    assert df[column].dtype == np.float32, f"{mode}: {column} is {df[column].dtype}"
+                
+                assert list(df.columns) == list(expected.columns), f"{mode}: columns differ"
+                pd.testing.assert_frame_equal(df.astype({c: object for c in header_columns}), expected,
+                                              check_dtype=False, rtol=1e-6)
+                reference_bytes = expected.memory_usage(deep=True).sum()
+                frame_bytes = df.memory_usage(deep=True).sum()
+                assert frame_bytes * 2 < reference_bytes, f"{mode}: {frame_bytes} bytes vs {reference_bytes}"
+                print(f"✅ {mode}: {len(df)} rows match the dicts in {frame_bytes:,} bytes (row-built: {reference_bytes:,})")
+            
+            df["scratch"] = 1
+            assert "scratch" not in loader.get_all_performance_df(), "caller's column leaked into the cached frame"
+            loader.ingest_daily([{"campaign_id": "camp_empty", "date": "2024-05-01", "impressions": 10, "clicks": 1,
+                                  "spend": 2.0, "conversions": 0}])
+            refreshed = loader.get_all_performance_df()
+            assert len(refreshed) == len(expected) + 1 and "camp_empty" in set(refreshed["campaign_id"]), \
+                "ingested row missing from the cached frame"
+            print("✅ Cached frame isolated from callers and rebuilt after an ingest")
+        
+        print("\n🎉 Portfolio frame test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Portfolio frame test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_rolling_metrics():
+    """Test that moving averages and period-over-period changes match pandas calendar windows"""
+    print("🚀 Testing Rolling Metrics\n")
+    
+    try:
+        import numpy as np
+        from data_loader import CampaignDataLoader
+        from metric_windows import TREND_METRICS
+        
+        campaigns_data = synthetic_campaigns()
+        campaigns = [c for c in campaigns_data["campaigns"] if c["daily_performance"]]
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = write_campaigns(tmp, campaigns_data)
+            loader = CampaignDataLoader(data_path=data_path)
+            trends = CampaignDataLoader(data_path=data_path).get_latest_trends([c["id"] for c in campaigns[:3]])
+            
+            for campaign in campaigns:
+                rolling = loader.get_rolling_metrics(campaign["id"]).set_index("date")
+                for metric in TREND_METRICS:
+                    expected = reference_rolling(campaign, metric)
+                    np.testing.assert_allclose(rolling[expected.columns].to_numpy(), expected.to_numpy(),
+                                               rtol=1e-9, atol=1e-9, err_msg=f"{campaign['id']} {metric}")
+            print(f"✅ {len(campaigns)} campaigns' rolling windows match pandas for {', '.join(TREND_METRICS)}")
+            
+            latest = loader.get_latest_trends()
+            assert set(latest) == {c["id"] for c in campaigns}, "latest trends cover the wrong campaigns"
+            for campaign_id, record in trends.items():
+                assert record.keys() == latest[campaign_id].keys() and record["date"] == latest[campaign_id]["date"]
+                np.testing.assert_allclose([v for k, v in record.items() if k not in ("date", "campaign_id")],
+                                           [v for k, v in latest[campaign_id].items() if k not in ("date", "campaign_id")],
+                                           rtol=1e-9, err_msg=campaign_id)
+            print(f"✅ Latest trends from the {len(trends)}-campaign lookback match the full computation")
+        
+        print("\n🎉 Rolling metrics test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Rolling metrics test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = (test_metrics_store() and test_performance_windows() and test_performance_range()
+               and test_portfolio_frame() and test_rolling_metrics())
+    sys.exit(0 if success else 1)
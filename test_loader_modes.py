@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Loader Modes Test for Meta Ads RAG Demo
+Tests campaign lookups and the streaming and lazy loading modes against plain scans of the JSON file
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append('src')
+
+DATA_PATHS = ["data/demo/campaigns.json", "data/real/campaigns.json"]
+
+def campaign_ids(campaigns):
+    """Ids of a list of campaigns"""
+    return [campaign["id"] for campaign in campaigns]
+
+def awkward_campaigns(count=25):
+    """Demo campaigns repeated under new ids, with names holding quotes, brackets and non-ASCII text"""
+    with open(DATA_PATHS[0], 'r') as f:
+        campaigns_data = json.load(f)
+    demo = campaigns_data["campaigns"]
+    campaigns = []
+    for i in range(count):
+        campaign = json.loads(json.dumps(demo[i % len(demo)]))
+        campaign["id"] = f"camp_{i:03d}"
+        campaign["name"] = f'{campaign["name"]} "{i}" }}],{{[ café ✓'
+        campaigns.append(campaign)
+    return {"global_insights": campaigns_data["global_insights"], "campaigns": campaigns}
+
+def test_campaign_indexes():
+    """Test that indexed lookups by id, industry, audience and status return what a scan of every campaign does"""
+    print("🚀 Testing Campaign Lookup Indexes\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        
+        for data_path in DATA_PATHS:
+            with open(data_path, 'r') as f:
+                campaigns = json.load(f)["campaigns"]
+            industries = {c.get("industry", "") for c in campaigns} | {"unknown industry"}
+            statuses = {c.get("status", "") for c in campaigns} | {"ARCHIVED"}
+            audience_words = {word for c in campaigns for word in c.get("audience", "").split()} | {"nobody"}
+            
+            for mode, options in (("dict", {}), ("compact", {"compact": True})):
+                loader = CampaignDataLoader(data_path=data_path, **options)
+                for campaign in campaigns:
+                    assert loader.get_campaign_by_id(campaign["id"])["name"] == campaign["name"], \
+                        f"{mode}: lookup of {campaign['id']} failed"
+                assert loader.get_campaign_by_id("missing") == {}, f"{mode}: unknown id found"
+                
+                for industry in industries:
+                    for query in (industry, industry.upper()):
+                        expected = [c["id"] for c in campaigns if c.get("industry", "").lower() == query.lower()]
+                        assert campaign_ids(loader.get_campaigns_by_industry(query)) == expected, \
+                            f"{mode}: industry '{query}' differs"
+                for status in statuses:
+                    expected = [c["id"] for c in campaigns if c.get("status", "").lower() == status.lower()]
+                    assert campaign_ids(loader.get_campaigns_by_status(status.lower())) == expected, \
+                        f"{mode}: status '{status}' differs"
+                for word in audience_words:
+                    expected = [c["id"] for c in campaigns if word.lower() in c.get("audience", "").lower()]
+                    assert campaign_ids(loader.get_campaigns_by_audience(word.upper())) == expected, \
+                        f"{mode}: audience '{word}' differs"
+            print(f"✅ {os.path.basename(os.path.dirname(data_path))}: lookups match scans of {len(campaigns)} campaigns")
+        
+        with open(DATA_PATHS[0], 'r') as f:
+            campaigns_data = json.load(f)
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, "campaigns.json")
+            with open(data_path, 'w') as f:
+                json.dump(campaigns_data, f)
+            loader = CampaignDataLoader(data_path=data_path)
+            moved = {**campaigns_data["campaigns"][0], "industry": "Travel", "status": "PAUSED"}
+            campaigns = [moved] + campaigns_data["campaigns"][2:]
+            with open(data_path, 'w') as f:
+                json.dump({**campaigns_data, "campaigns": campaigns}, f)
+            loader.load_data()
+            
+            assert loader.get_campaign_by_id(campaigns_data["campaigns"][1]["id"]) == {}, "removed campaign found"
+            for industry in ("travel", campaigns_data["campaigns"][0]["industry"]):
+                expected = [c["id"] for c in campaigns if c["industry"].lower() == industry.lower()]
+                assert campaign_ids(loader.get_campaigns_by_industry(industry)) == expected, \
+                    f"industry '{industry}' stale after reload"
+            expected = [c["id"] for c in campaigns if c["status"] == "PAUSED"]
+            assert campaign_ids(loader.get_campaigns_by_status("PAUSED")) == expected, "status stale after reload"
+            print("✅ Lookups follow a reload that moves and removes campaigns")
+        
+        print("\n🎉 Campaign index test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Campaign index test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_streaming_load():
+    """Test that streaming loads hold the same campaigns as json.load and serve each batch as it arrives"""
+    print("🚀 Testing Streaming Load\n")
+    
+    try:
+        import pandas as pd
+        from data_loader import CampaignDataLoader
+        
+        campaigns_data = awkward_campaigns()
+        campaigns = campaigns_data["campaigns"]
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, "campaigns.json")
+            with open(data_path, 'w') as f:
+                json.dump(campaigns_data, f, indent=2, ensure_ascii=False)
+            
+            loader = CampaignDataLoader(data_path=data_path, streaming=True)
+            assert loader.get_all_campaigns() == campaigns, "streamed campaigns differ from json.load"
+            assert loader.get_global_insights() == campaigns_data["global_insights"], "global insights differ"
+            reference = CampaignDataLoader(data_path=data_path)
+            pd.testing.assert_frame_equal(loader.get_all_performance_df(), reference.get_all_performance_df())
+            print(f"✅ {len(campaigns)} streamed campaigns and global insights match json.load")
+            
+            counts = []
+            for count in loader.iter_load(batch_size=10):
+                counts.append(count)
+                assert len(loader.get_all_campaigns()) == count, "campaigns loaded so far not served"
+                last = campaigns[count - 1]
+                assert loader.get_campaign_by_id(last["id"])["name"] == last["name"], "latest batch not indexed"
+                assert loader.get_latest_performance(last["id"]) == \
+                    last["daily_performance"][max(last["daily_performance"])], "latest batch metrics missing"
+            assert counts == [10, 20, 25], f"unexpected batch counts {counts}"
+            assert loader.get_all_campaigns() == campaigns and loader.load_stats["source"] == "json"
+            print(f"✅ iter_load served campaigns after each batch: {counts}")
+        
+        print("\n🎉 Streaming load test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Streaming load test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_lazy_load():
+    """Test that lazy campaigns keep only headers resident and decode bodies on demand through a bounded LRU"""
+    print("🚀 Testing Lazy Load\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        from data_chunker import CampaignDataChunker
+        from lazy_campaigns import LAZY_FIELDS
+        
+        campaigns_data = awkward_campaigns()
+        campaigns = campaigns_data["campaigns"]
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, "campaigns.json")
+            with open(data_path, 'w') as f:
+                json.dump(campaigns_data, f, indent=2, ensure_ascii=False)
+            
+            loader = CampaignDataLoader(data_path=data_path, lazy=True, lazy_cache_size=4)
+            for campaign in loader.get_all_campaigns():
+                assert not set(dict.keys(campaign)) & set(LAZY_FIELDS), f"{campaign['id']} body resident"
+            loader.get_performance_summary("30d")
+            loader.get_campaign_performance_df(campaigns[0]["id"])
+            loader.get_campaigns_by_industry(campaigns[0]["industry"])
+            assert loader.get_load_stats()["lazy_cache"]["misses"] == 0, "headers or metrics queries decoded a body"
+            print("✅ Headers, summaries and performance frames served without decoding a body")
+            
+            for campaign, lazy in zip(campaigns, loader.get_all_campaigns()):
+                assert lazy.materialize() == campaign, f"{campaign['id']} decoded differently"
+                assert lazy["insights"] == campaign["insights"] and "daily_performance" in lazy
+            cache = loader.get_load_stats()["lazy_cache"]
+            assert cache["cached"] == 4 and cache["misses"] >= len(campaigns), f"LRU not bounded: {cache}"
+            loader.get_campaign_by_id(campaigns[-1]["id"])["insights"]
+            assert loader.get_load_stats()["lazy_cache"]["hits"] > cache["hits"], "recent body not served from cache"
+            print(f"✅ Bodies decode to the original campaigns, LRU holds {cache['cached']} of {len(campaigns)}")
+            
+            eager_loader = CampaignDataLoader(data_path=data_path)
+            eager = CampaignDataChunker(eager_loader.campaigns_data, loader=eager_loader).create_all_chunks()
+            lazy_chunks = CampaignDataChunker(loader.campaigns_data, loader=loader).create_all_chunks()
+            assert lazy_chunks == eager, "chunks from lazy campaigns differ"
+            print(f"✅ Chunker builds the same {len(eager)} chunks from lazy campaigns")
+        
+        print("\n🎉 Lazy load test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Lazy load test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = test_campaign_indexes() and test_streaming_load() and test_lazy_load()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Search Index Test for Meta Ads RAG Demo
+Tests prefix matching, ranking and incremental updates of campaign search
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append('src')
+
+DATA_PATH = "data/demo/campaigns.json"
+
+def reference_search(campaigns, query):
+    """Campaign ids ranked by query tokens that prefix one of their tokens, by scanning every campaign"""
+    from search_index import tokenize, CampaignSearchIndex
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens:
+        return [campaign["id"] for campaign in campaigns]
+    scored = []
+    for position, campaign in enumerate(campaigns):
+        words = CampaignSearchIndex._tokens(CampaignSearchIndex._signature(campaign))
+        score = sum(1 for token in tokens if any(word.startswith(token) for word in words))
+        if score:
+            scored.append((-score, position, campaign["id"]))
+    return [campaign_id for _, _, campaign_id in sorted(scored)]
+
+def test_search_ranking():
+    """Test that searches match token prefixes and rank campaigns by matched tokens"""
+    print("🚀 Testing Campaign Search Ranking\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        
+        loader = CampaignDataLoader(data_path=DATA_PATH)
+        campaigns = loader.get_all_campaigns()
+        ids = [campaign["id"] for campaign in campaigns]
+        
+        for query in ("elec", "Black Friday", "retarget feed", "stories reels", "tech gadgets", "nomatch", "a"):
+            results = [campaign["id"] for campaign in loader.search_campaigns(query)]
+            assert results == reference_search(campaigns, query), f"'{query}' results differ from a full scan"
+        assert "camp_001" in [campaign["id"] for campaign in loader.search_campaigns("elec")], "prefix did not match"
+        print("✅ Prefix queries match a full scan")
+        
+        top = loader.search_campaigns("black friday electronics")[0]
+        assert top["id"] == "camp_001", "campaign matching every token not ranked first"
+        print("✅ Campaigns matching more tokens rank first")
+        
+        for query in ("", " ", "!!"):
+            assert [campaign["id"] for campaign in loader.search_campaigns(query)] == ids, \
+                f"'{query}' did not return every campaign"
+        print("✅ Queries without tokens return every campaign")
+        
+        print("\n🎉 Search ranking test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Search ranking test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_search_reload():
+    """Test that a reload updates only changed campaigns in the index"""
+    print("🚀 Testing Incremental Search Index Updates\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        
+        with open(DATA_PATH, 'r') as f:
+            campaigns_data = json.load(f)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, "campaigns.json")
+            with open(data_path, 'w') as f:
+                json.dump(campaigns_data, f)
+            loader = CampaignDataLoader(data_path=data_path)
+            
+            campaigns = campaigns_data["campaigns"]
+            renamed = {**campaigns[1], "name": "Zeppelin Launch"}
+            with open(data_path, 'w') as f:
+                json.dump({**campaigns_data, "campaigns": [campaigns[0], renamed] + campaigns[3:]}, f)
+            loader.load_data()
+            
+            assert loader.load_stats["search_index_changes"] == {"added": 0, "updated": 1, "removed": 1}, \
+                f"unexpected index changes {loader.load_stats['search_index_changes']}"
+            assert [campaign["id"] for campaign in loader.search_campaigns("zepp")] == [renamed["id"]], \
+                "renamed campaign not found"
+            assert campaigns[2]["id"] not in [c["id"] for c in loader.search_campaigns(campaigns[2]["name"])], \
+                "removed campaign still found"
+            print("✅ Reload re-indexed one campaign and dropped one")
+        
+        print("\n🎉 Incremental search index test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Incremental search index test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = test_search_ranking() and test_search_reload()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Snapshot Cache Test for Meta Ads RAG Demo
+Tests that loaders restored from a snapshot answer like a loader that parsed the JSON file
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append('src')
+
+DATA_PATH = "data/demo/campaigns.json"
+
+def campaign_view(loader):
+    """Campaign dicts, daily chunk count and per-campaign frames, to compare loaders"""
+    from data_chunker import CampaignDataChunker
+    campaigns = [dict(campaign) for campaign in loader.get_all_campaigns()]
+    for campaign in campaigns:
+        campaign["daily_performance"] = dict(campaign["daily_performance"])
+    chunks = CampaignDataChunker(loader.campaigns_data, loader=loader).create_all_chunks()
+    daily_chunks = sum(1 for chunk in chunks if chunk["metadata"]["chunk_type"] == "daily_performance")
+    frames = {campaign["id"]: len(loader.get_campaign_performance_df(campaign["id"])) for campaign in campaigns}
+    return json.loads(json.dumps(campaigns, default=list)), daily_chunks, frames
+
+def test_snapshot_representations():
+    """Test that compact and dict loaders sharing a snapshot directory each restore their own representation"""
+    print("🚀 Testing Snapshot Restore Across Representations\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        from campaign_records import CampaignRecord
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, "campaigns.json")
+            with open(DATA_PATH, 'r') as f:
+                campaigns_data = json.load(f)
+            with open(data_path, 'w') as f:
+                json.dump(campaigns_data, f)
+            snapshot_dir = os.path.join(tmp, "snapshots")
+            expected = campaign_view(CampaignDataLoader(data_path=data_path))
+            assert expected[1] > 0, "no daily chunks in the reference load"
+            
+            for compact in (True, False, True, False):
+                name = "compact" if compact else "dict"
+                loader = CampaignDataLoader(data_path=data_path, use_snapshot=True, snapshot_dir=snapshot_dir,
+                                            compact=compact)
+                records = isinstance(loader.get_all_campaigns()[0], CampaignRecord)
+                assert records == compact, f"{name} loader got {'records' if records else 'dicts'}"
+                assert campaign_view(loader) == expected, f"{name} loader ({loader.load_stats['source']}) differs"
+                print(f"✅ {name} loader from {loader.load_stats['source']} matches the JSON load")
+            
+            # Ingests reach daily_performance of snapshot-restored campaigns
+            campaign_id = campaigns_data["campaigns"][0]["id"]
+            loader.ingest_daily([{"campaign_id": campaign_id, "date": "2030-01-01", "impressions": 5}])
+            assert "2030-01-01" in loader.get_campaign_by_id(campaign_id)["daily_performance"], "ingest not visible"
+            print("✅ Ingested day visible after a snapshot restore")
+        
+        print("\n🎉 Snapshot representation test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Snapshot representation test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_snapshot_invalidation():
+    """Test that a changed source file or a snapshot writable by others is not restored"""
+    print("🚀 Testing Snapshot Invalidation\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        from snapshot_cache import SnapshotCache
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, "campaigns.json")
+            with open(DATA_PATH, 'r') as f:
+                campaigns_data = json.load(f)
+            with open(data_path, 'w') as f:
+                json.dump(campaigns_data, f)
+            snapshot_dir = os.path.join(tmp, "snapshots")
+            options = {"data_path": data_path, "use_snapshot": True, "snapshot_dir": snapshot_dir}
+            
+            CampaignDataLoader(**options)
+            assert CampaignDataLoader(**options).load_stats["source"] == "snapshot", "snapshot not restored"
+            
+            with open(data_path, 'w') as f:
+                json.dump({**campaigns_data, "campaigns": campaigns_data["campaigns"][1:]}, f)
+            loader = CampaignDataLoader(**options)
+            assert loader.load_stats["source"] != "snapshot", "snapshot of the old file restored"
+            assert len(loader.get_all_campaigns()) == len(campaigns_data["campaigns"]) - 1, "changed file not loaded"
+            print("✅ Changed source file is parsed again")
+            
+            # The reload above refreshed the snapshot; once writable by others it must be ignored
+            meta_path = os.path.join(SnapshotCache(snapshot_dir).snapshot_path(data_path), "meta.json")
+            os.chmod(meta_path, 0o666)
+            assert CampaignDataLoader(**options).load_stats["source"] != "snapshot", "shared snapshot restored"
+            print("✅ Snapshot writable by others is ignored")
+        
+        print("\n🎉 Snapshot invalidation test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Snapshot invalidation test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = test_snapshot_representations() and test_snapshot_invalidation()
+    sys.exit(0 if success else 1)
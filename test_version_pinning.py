@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Version Pinning Test for Meta Ads RAG Demo
+Tests that reads pinned to a loader version are isolated from concurrent ingests and reloads
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+sys.path.append('src')
+
+def write_sources(tmp, campaigns_data):
+    """Loader options per mode, over copies of the campaigns as one file, account files and a Parquet dataset"""
+    from parquet_store import write_parquet_dataset
+    
+    data_path = os.path.join(tmp, "campaigns.json")
+    with open(data_path, 'w') as f:
+        json.dump(campaigns_data, f)
+    accounts_dir = os.path.join(tmp, "accounts")
+    os.makedirs(accounts_dir)
+    campaigns = campaigns_data["campaigns"]
+    for i in range(2):
+        with open(os.path.join(accounts_dir, f"account_{i}.json"), 'w') as f:
+            json.dump({"campaigns": campaigns[i::2], "global_insights": campaigns_data["global_insights"]}, f)
+    
+    return {
+        "dict": {"data_path": data_path},
+        "compact": {"data_path": data_path, "compact": True},
+        "lazy": {"data_path": data_path, "lazy": True},
+        "streaming": {"data_path": data_path, "streaming": True},
+        "lazy accounts": {"data_path": accounts_dir, "lazy": True, "load_workers": 1},
+        "parquet": {"data_path": write_parquet_dataset(campaigns_data, os.path.join(tmp, "parquet"))}
+    }
+
+def loader_view(loader, campaign_id):
+    """Answers of several accessors, to compare what a reader sees across versions"""
+    return (
+        loader.get_performance_summary("all"),
+        sorted(loader.get_campaign_by_id(campaign_id)["daily_performance"]),
+        loader.get_latest_performance(campaign_id),
+        len(loader.get_all_performance_df()),
+        len(loader.get_rolling_metrics()),
+        len(loader.get_performance_range(campaign_id))
+    )
+
+def in_thread(function, *args):
+    """Run function in another thread and return its result"""
+    results = []
+    thread = threading.Thread(target=lambda: results.append(function(*args)))
+    thread.start()
+    thread.join()
+    return results[0]
+
+def test_pinned_reads_during_ingest():
+    """Test that a pinned reader keeps its version while another thread ingests, in every loading mode"""
+    print("🚀 Testing Pinned Reads During Ingest\n")
+    
+    try:
+        import pandas as pd
+        from data_loader import CampaignDataLoader
+        
+        with open("data/demo/campaigns.json", 'r') as f:
+            campaigns_data = json.load(f)
+        last = max(max(c["daily_performance"]) for c in campaigns_data["campaigns"])
+        new_day = str((pd.Timestamp(last) + pd.Timedelta(days=1)).date())
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for mode, options in write_sources(tmp, campaigns_data).items():
+                print(f"📊 Mode: {mode}...")
+                loader = CampaignDataLoader(**options)
+                # Campaign ids of account files are namespaced by account
+                campaign_ids = [campaign["id"] for campaign in loader.get_all_campaigns()]
+                campaign_id = campaign_ids[0]
+                rows = [{"campaign_id": cid, "date": new_day, "impressions": 1000, "clicks": 10, "spend": 99.0,
+                         "conversions": 3, "ctr": 1.0, "cpm": 99.0, "cpc": 9.9, "roas": 1.5} for cid in campaign_ids]
+                before = loader_view(loader, campaign_id)
+                
+                with loader.pin():
+                    in_thread(loader.ingest_daily, rows)
+                    pinned = loader_view(loader, campaign_id)
+                    current = in_thread(loader_view, loader, campaign_id)
+                after = loader_view(loader, campaign_id)
+                
+                assert pinned == before, f"{mode}: pinned reader saw the ingest"
+                assert current == after != before, f"{mode}: other threads did not see the ingest"
+                assert after[1] == before[1] + [new_day], f"{mode}: ingested day missing"
+                stats = loader.versions.stats()
+                assert not stats["pinned_versions"] and not stats["retired_versions"], f"{mode}: version not reclaimed"
+                print(f"✅ Pinned reader isolated, {stats['reclaimed']} version(s) reclaimed")
+        
+        print("\n🎉 Pinned ingest test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Pinned ingest test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_pinned_reads_during_reload():
+    """Test that a pinned reader keeps its version while another thread reloads changed data"""
+    print("🚀 Testing Pinned Reads During Reload\n")
+    
+    try:
+        from data_loader import CampaignDataLoader
+        
+        with open("data/demo/campaigns.json", 'r') as f:
+            campaigns_data = json.load(f)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, "campaigns.json")
+            with open(data_path, 'w') as f:
+                json.dump(campaigns_data, f)
+            loader = CampaignDataLoader(data_path=data_path)
+            count = len(campaigns_data["campaigns"])
+            
+            with open(data_path, 'w') as f:
+                json.dump({**campaigns_data, "campaigns": campaigns_data["campaigns"][1:]}, f)
+            with loader.pin():
+                in_thread(loader.load_data)
+                assert loader.get_performance_summary()["total_campaigns"] == count, "pinned reader saw the reload"
+                assert loader.get_campaign_by_id(campaigns_data["campaigns"][0]["id"]), "pinned campaign disappeared"
+            assert loader.get_performance_summary()["total_campaigns"] == count - 1, "reload not published"
+            print(f"✅ Pinned reader kept {count} campaigns while the reload published {count - 1}")
+        
+        print("\n🎉 Pinned reload test passed!")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Pinned reload test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    success = test_pinned_reads_during_ingest() and test_pinned_reads_during_reload()
+    sys.exit(0 if success else 1)